@@ -0,0 +1,48 @@
+"""add unique index on active bookings per user and dinner
+
+Revision ID: 3435e5f0037f
+Revises: 84ee585e5049
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3435e5f0037f'
+down_revision: Union[str, Sequence[str], None] = '84ee585e5049'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Cancel duplicate active bookings (keeping the oldest) so the index can be built
+    op.execute("""
+        UPDATE bookings SET status = 'CANCELLED'
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY user_id, dinner_id ORDER BY id
+                ) AS rn
+                FROM bookings
+                WHERE status IN ('PENDING', 'CONFIRMED')
+            ) ranked
+            WHERE ranked.rn > 1
+        )
+    """)
+    op.create_index(
+        'uq_bookings_active_user_dinner',
+        'bookings',
+        ['user_id', 'dinner_id'],
+        unique=True,
+        postgresql_where=sa.text("status IN ('PENDING', 'CONFIRMED')")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_bookings_active_user_dinner', table_name='bookings')
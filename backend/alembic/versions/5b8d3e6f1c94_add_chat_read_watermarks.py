@@ -0,0 +1,61 @@
+"""add per-participant read watermarks to chats
+
+Revision ID: 5b8d3e6f1c94
+Revises: e2b7f08c3a51
+Create Date: 2026-10-17 13:41:02.118530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8d3e6f1c94'
+down_revision: Union[str, Sequence[str], None] = 'e2b7f08c3a51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chats', sa.Column('user1_last_read_message_id', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('chats', sa.Column('user2_last_read_message_id', sa.Integer(), server_default='0', nullable=False))
+
+    # Seed each watermark from the newest message the participant had read
+    op.execute("""
+        UPDATE chats SET
+            user1_last_read_message_id = COALESCE((
+                SELECT MAX(m.id) FROM messages m
+                WHERE m.chat_id = chats.id AND m.sender_id = chats.user2_id AND m.is_read = true
+            ), 0),
+            user2_last_read_message_id = COALESCE((
+                SELECT MAX(m.id) FROM messages m
+                WHERE m.chat_id = chats.id AND m.sender_id = chats.user1_id AND m.is_read = true
+            ), 0)
+    """)
+
+    # messages.is_read is no longer updated, so the partial unread index would cover every row
+    op.drop_index('ix_messages_unread_chat_sender', table_name='messages', if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Write the watermarks back onto the messages they cover
+    op.execute("""
+        UPDATE messages SET is_read = true
+        FROM chats
+        WHERE messages.chat_id = chats.id AND messages.is_read = false AND (
+            (messages.sender_id = chats.user2_id AND messages.id <= chats.user1_last_read_message_id)
+            OR (messages.sender_id = chats.user1_id AND messages.id <= chats.user2_last_read_message_id)
+        )
+    """)
+    op.create_index(
+        'ix_messages_unread_chat_sender',
+        'messages',
+        ['chat_id', 'sender_id'],
+        postgresql_where=sa.text('is_read = false')
+    )
+    op.drop_column('chats', 'user2_last_read_message_id')
+    op.drop_column('chats', 'user1_last_read_message_id')
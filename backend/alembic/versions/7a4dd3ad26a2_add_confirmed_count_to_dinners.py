@@ -0,0 +1,40 @@
+"""add confirmed_count to dinners
+
+Revision ID: 7a4dd3ad26a2
+Revises: 3435e5f0037f
+Create Date: 2026-10-17 11:03:27.845102
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a4dd3ad26a2'
+down_revision: Union[str, Sequence[str], None] = '3435e5f0037f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('dinners', sa.Column('confirmed_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the active (pending/confirmed) bookings
+    op.execute("""
+        UPDATE dinners SET confirmed_count = counts.active
+        FROM (
+            SELECT dinner_id, COUNT(*) AS active
+            FROM bookings
+            WHERE status IN ('PENDING', 'CONFIRMED')
+            GROUP BY dinner_id
+        ) counts
+        WHERE dinners.id = counts.dinner_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('dinners', 'confirmed_count')
@@ -0,0 +1,53 @@
+"""add composite and partial indexes for hot query paths
+
+Revision ID: 9fbdd7c21234
+Revises: 7a4dd3ad26a2
+Create Date: 2026-10-17 11:24:09.513870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9fbdd7c21234'
+down_revision: Union[str, Sequence[str], None] = '7a4dd3ad26a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ('ix_bookings_dinner_id_status', 'bookings', ['dinner_id', 'status'], None),
+    ('ix_bookings_user_id_status', 'bookings', ['user_id', 'status'], None),
+    ('ix_messages_chat_id_sent_at', 'messages', ['chat_id', 'sent_at'], None),
+    ('ix_messages_unread_chat_sender', 'messages', ['chat_id', 'sender_id'], 'is_read = false'),
+    ('ix_notifications_user_read_created', 'notifications', ['user_id', 'is_read', 'created_at'], None),
+    ('ix_scheduled_notifications_pending_time', 'scheduled_notifications', ['scheduled_time'], 'is_sent = false'),
+    ('ix_connections_receiver_id_status', 'connections', ['receiver_id', 'status'], None),
+    ('ix_chats_user1_user2_active', 'chats', ['user1_id', 'user2_id', 'is_active'], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,38 @@
+"""add change sequence to chats for delta sync
+
+Revision ID: a7c3e9d15f20
+Revises: 5b8d3e6f1c94
+Create Date: 2026-10-17 16:02:37.540193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c3e9d15f20'
+down_revision: Union[str, Sequence[str], None] = '5b8d3e6f1c94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE SEQUENCE IF NOT EXISTS chat_change_seq")
+    # The volatile default numbers every existing row as the column is added
+    op.add_column(
+        'chats',
+        sa.Column('change_seq', sa.BigInteger(), server_default=sa.text("nextval('chat_change_seq')"), nullable=False)
+    )
+    op.create_index('ix_chats_user1_change_seq', 'chats', ['user1_id', 'change_seq'])
+    op.create_index('ix_chats_user2_change_seq', 'chats', ['user2_id', 'change_seq'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chats_user2_change_seq', table_name='chats')
+    op.drop_index('ix_chats_user1_change_seq', table_name='chats')
+    op.drop_column('chats', 'change_seq')
+    op.execute("DROP SEQUENCE IF EXISTS chat_change_seq")
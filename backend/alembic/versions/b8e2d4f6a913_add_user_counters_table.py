@@ -0,0 +1,48 @@
+"""add user_counters table with maintained unread counts
+
+Revision ID: b8e2d4f6a913
+Revises: f41d6b2e8c07
+Create Date: 2026-10-17 17:30:52.216480
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e2d4f6a913'
+down_revision: Union[str, Sequence[str], None] = 'f41d6b2e8c07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_counters',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('unread_notifications', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('unread_messages', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Seed from the current unread rows; the repair job uses the same counts
+    op.execute("""
+        INSERT INTO user_counters (user_id, unread_notifications, unread_messages)
+        SELECT u.id,
+            (SELECT COUNT(*) FROM notifications n WHERE n.user_id = u.id AND n.is_read = false),
+            (SELECT COUNT(*) FROM messages m JOIN chats c ON c.id = m.chat_id
+             WHERE c.is_active = true AND m.sender_id <> u.id AND (
+                 (c.user1_id = u.id AND m.id > c.user1_last_read_message_id)
+                 OR (c.user2_id = u.id AND m.id > c.user2_last_read_message_id)
+             ))
+        FROM users u
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_counters')
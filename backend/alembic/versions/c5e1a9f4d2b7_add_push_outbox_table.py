@@ -0,0 +1,54 @@
+"""add push_outbox table
+
+Revision ID: c5e1a9f4d2b7
+Revises: 9fbdd7c21234
+Create Date: 2026-10-17 12:02:51.207448
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e1a9f4d2b7'
+down_revision: Union[str, Sequence[str], None] = '9fbdd7c21234'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('push_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('notification_id', sa.Integer(), nullable=True),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('data', sa.JSON(), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'SENT', 'FAILED', 'SKIPPED', name='pushoutboxstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['notification_id'], ['notifications.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_push_outbox_id'), 'push_outbox', ['id'], unique=False)
+    op.create_index(
+        'ix_push_outbox_pending_next_attempt',
+        'push_outbox',
+        ['next_attempt_at'],
+        postgresql_where=sa.text("status = 'PENDING'")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_push_outbox_pending_next_attempt', table_name='push_outbox')
+    op.drop_index(op.f('ix_push_outbox_id'), table_name='push_outbox')
+    op.drop_table('push_outbox')
+    sa.Enum(name='pushoutboxstatus').drop(op.get_bind(), checkfirst=True)
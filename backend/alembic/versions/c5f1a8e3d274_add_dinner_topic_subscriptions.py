@@ -0,0 +1,49 @@
+"""add dinner topic subscriptions and topic push outbox rows
+
+Revision ID: c5f1a8e3d274
+Revises: b8e2d4f6a913
+Create Date: 2026-10-17 19:04:11.583207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f1a8e3d274'
+down_revision: Union[str, Sequence[str], None] = 'b8e2d4f6a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('dinner_topic_subscriptions',
+    sa.Column('dinner_id', sa.Integer(), nullable=False),
+    sa.Column('token', sa.String(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['dinner_id'], ['dinners.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('dinner_id', 'token')
+    )
+    op.create_index(op.f('ix_dinner_topic_subscriptions_user_id'), 'dinner_topic_subscriptions', ['user_id'], unique=False)
+
+    op.alter_column('push_outbox', 'user_id', existing_type=sa.Integer(), nullable=True)
+    op.add_column('push_outbox', sa.Column('topic', sa.String(length=100), nullable=True))
+    op.add_column('push_outbox', sa.Column('dedupe_key', sa.String(length=100), nullable=True))
+    op.create_unique_constraint('push_outbox_dedupe_key_key', 'push_outbox', ['dedupe_key'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM push_outbox WHERE user_id IS NULL")
+    op.drop_constraint('push_outbox_dedupe_key_key', 'push_outbox', type_='unique')
+    op.drop_column('push_outbox', 'dedupe_key')
+    op.drop_column('push_outbox', 'topic')
+    op.alter_column('push_outbox', 'user_id', existing_type=sa.Integer(), nullable=False)
+
+    op.drop_index(op.f('ix_dinner_topic_subscriptions_user_id'), table_name='dinner_topic_subscriptions')
+    op.drop_table('dinner_topic_subscriptions')
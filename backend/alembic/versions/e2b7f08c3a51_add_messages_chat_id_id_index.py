@@ -0,0 +1,36 @@
+"""add (chat_id, id) index on messages for keyset pagination
+
+Revision ID: e2b7f08c3a51
+Revises: c5e1a9f4d2b7
+Create Date: 2026-10-17 13:10:44.602318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7f08c3a51'
+down_revision: Union[str, Sequence[str], None] = 'c5e1a9f4d2b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_messages_chat_id_id',
+            'messages',
+            ['chat_id', 'id'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_messages_chat_id_id', table_name='messages', postgresql_concurrently=True, if_exists=True)
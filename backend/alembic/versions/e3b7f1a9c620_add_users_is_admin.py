@@ -0,0 +1,28 @@
+"""add is_admin flag to users
+
+Revision ID: e3b7f1a9c620
+Revises: d9a4c2e7b815
+Create Date: 2026-10-18 09:41:26.318054
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b7f1a9c620'
+down_revision: Union[str, Sequence[str], None] = 'd9a4c2e7b815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('is_admin', sa.Boolean(), server_default='false', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'is_admin')
@@ -0,0 +1,31 @@
+"""add ACKNOWLEDGED push outbox status for websocket-delivered notifications
+
+Revision ID: f41d6b2e8c07
+Revises: a7c3e9d15f20
+Create Date: 2026-10-17 16:48:15.902734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f41d6b2e8c07'
+down_revision: Union[str, Sequence[str], None] = 'a7c3e9d15f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ADD VALUE can't run inside a transaction block on older PostgreSQL
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE pushoutboxstatus ADD VALUE IF NOT EXISTS 'ACKNOWLEDGED'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Enum values can't be dropped; park the rows under a status the old code knows
+    op.execute("UPDATE push_outbox SET status = 'SKIPPED' WHERE status = 'ACKNOWLEDGED'")
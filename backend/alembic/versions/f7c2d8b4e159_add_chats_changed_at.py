@@ -0,0 +1,31 @@
+"""add changed_at to chats for settling delta sync
+
+Revision ID: f7c2d8b4e159
+Revises: e3b7f1a9c620
+Create Date: 2026-10-18 14:12:05.671342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7c2d8b4e159'
+down_revision: Union[str, Sequence[str], None] = 'e3b7f1a9c620'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'chats',
+        sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('chats', 'changed_at')
@@ -0,0 +1,24 @@
+# app/core/chat_cache.py
+from typing import Tuple
+
+from .config import settings
+from .ttl_cache import CountingTTLCache
+
+
+class ChatMembershipCache(CountingTTLCache[int, Tuple[int, int]]):
+    """In-process LRU+TTL cache of active chat participants, keyed by chat ID.
+
+    Participants of a chat never change, so entries only need dropping when
+    a chat is deleted or deactivated; call invalidate() on those paths. The
+    TTL bounds how long another worker's delete can go unnoticed.
+    """
+
+    def set(self, chat_id: int, participants: Tuple[int, int]):
+        self.put(chat_id, participants)
+
+
+# Global chat membership cache instance
+chat_cache = ChatMembershipCache(
+    maxsize=settings.CHAT_CACHE_MAX_SIZE,
+    ttl=settings.CHAT_CACHE_TTL_SECONDS
+)
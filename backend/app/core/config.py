@@ -28,6 +28,8 @@ def get_env_var(key: str, default=None, cast_type=str):
         return value.lower() in ('true', '1', 'yes', 'on')
     elif cast_type == int:
         return int(value)
+    elif cast_type == float:
+        return float(value)
     else:
         return value
 
@@ -45,8 +47,29 @@ class Settings:
         self.ALGORITHM = get_env_var("ALGORITHM", "HS256")
         self.ACCESS_TOKEN_EXPIRE_MINUTES = get_env_var("ACCESS_TOKEN_EXPIRE_MINUTES", 43200, int)
         
+        # Authenticated user snapshot cache (per worker; bounds how long another
+        # worker's change to a user can go unseen)
+        self.USER_CACHE_TTL_SECONDS = get_env_var("USER_CACHE_TTL_SECONDS", 30, int)
+        self.USER_CACHE_MAX_SIZE = get_env_var("USER_CACHE_MAX_SIZE", 10000, int)
+        
+        # Chat membership cache (websocket send path)
+        self.CHAT_CACHE_TTL_SECONDS = get_env_var("CHAT_CACHE_TTL_SECONDS", 300, int)
+        self.CHAT_CACHE_MAX_SIZE = get_env_var("CHAT_CACHE_MAX_SIZE", 50000, int)
+        
+        # Opt-in group commit of chat messages (one transaction per burst)
+        self.CHAT_GROUP_COMMIT = get_env_var("CHAT_GROUP_COMMIT", False, bool)
+        self.CHAT_GROUP_COMMIT_WINDOW_MS = get_env_var("CHAT_GROUP_COMMIT_WINDOW_MS", 5, float)
+        self.CHAT_GROUP_COMMIT_MAX_BATCH = get_env_var("CHAT_GROUP_COMMIT_MAX_BATCH", 500, int)
+        
+        # /chat/sync: messages per response, and how old a message must be before the
+        # cursor moves past it (later commits of lower IDs are picked up meanwhile)
+        self.CHAT_SYNC_MAX_MESSAGES = get_env_var("CHAT_SYNC_MAX_MESSAGES", 500, int)
+        self.CHAT_SYNC_SETTLE_SECONDS = get_env_var("CHAT_SYNC_SETTLE_SECONDS", 2, float)
+        
         # Database
         self.DATABASE_URL = get_env_var("DATABASE_URL")
+        # Identical statements per request before it is logged as a possible N+1
+        self.SQL_REPEAT_THRESHOLD = get_env_var("SQL_REPEAT_THRESHOLD", 5, int)
 
         self.SUPABASE_URL = get_env_var("SUPABASE_URL", "https://vdsymjzmfrqzvetomswx.supabase.co")
         self.SUPABASE_SERVICE_KEY = get_env_var("SUPABASE_SERVICE_KEY", "")
@@ -91,6 +114,70 @@ class Settings:
         self.FIREBASE_CLIENT_EMAIL = get_env_var("FIREBASE_CLIENT_EMAIL", "")
         self.FIREBASE_CLIENT_ID = get_env_var("FIREBASE_CLIENT_ID", "")
         
+        # Push outbox delivery
+        self.PUSH_SENDER = get_env_var("PUSH_SENDER", "firebase")  # "firebase" or "fake"
+        self.PUSH_FAKE_LATENCY_SECONDS = get_env_var("PUSH_FAKE_LATENCY_SECONDS", 0.05, float)
+        self.PUSH_OUTBOX_WORKERS = get_env_var("PUSH_OUTBOX_WORKERS", 2, int)
+        self.PUSH_OUTBOX_BATCH_SIZE = get_env_var("PUSH_OUTBOX_BATCH_SIZE", 500, int)
+        self.PUSH_OUTBOX_POLL_SECONDS = get_env_var("PUSH_OUTBOX_POLL_SECONDS", 5, float)
+        self.PUSH_MAX_ATTEMPTS = get_env_var("PUSH_MAX_ATTEMPTS", 5, int)
+        self.PUSH_OUTBOX_RETENTION_DAYS = get_env_var("PUSH_OUTBOX_RETENTION_DAYS", 7, int)
+        # Dinner-wide pushes go to a per-dinner FCM topic that confirmed attendees'
+        # tokens are subscribed to; membership is reconciled in batches (FCM max 1000)
+        self.PUSH_DINNER_TOPICS = get_env_var("PUSH_DINNER_TOPICS", True, bool)
+        self.PUSH_TOPIC_BATCH_SIZE = get_env_var("PUSH_TOPIC_BATCH_SIZE", 1000, int)
+        self.PUSH_TOPIC_RECONCILE_INTERVAL_MINUTES = get_env_var("PUSH_TOPIC_RECONCILE_INTERVAL_MINUTES", 60, float)
+        # Deliver notifications over the websocket to online users; their push is held
+        # back and only sent if the client doesn't acknowledge within the deadline
+        self.WS_NOTIFICATIONS = get_env_var("WS_NOTIFICATIONS", True, bool)
+        self.WS_NOTIFICATION_ACK_SECONDS = get_env_var("WS_NOTIFICATION_ACK_SECONDS", 10, float)
+        
+        # Websocket fan-out across workers: "memory", "redis" or "postgres"
+        self.WS_BACKPLANE = get_env_var("WS_BACKPLANE", "memory")
+        self.REDIS_URL = get_env_var("REDIS_URL", "redis://localhost:6379/0")
+        # Per-connection outbound queue; what happens when a client can't keep up:
+        # "disconnect" closes the socket, "drop" discards the new message
+        self.WS_OUTBOUND_QUEUE_SIZE = get_env_var("WS_OUTBOUND_QUEUE_SIZE", 256, int)
+        self.WS_SLOW_CONSUMER_POLICY = get_env_var("WS_SLOW_CONSUMER_POLICY", "disconnect")
+        self.WS_SEND_TIMEOUT_SECONDS = get_env_var("WS_SEND_TIMEOUT_SECONDS", 10, float)
+        # Inbound flood control (token bucket per connection)
+        self.WS_INBOUND_RATE = get_env_var("WS_INBOUND_RATE", 20, float)
+        self.WS_INBOUND_BURST = get_env_var("WS_INBOUND_BURST", 40, int)
+        self.WS_INBOUND_MAX_DROPPED = get_env_var("WS_INBOUND_MAX_DROPPED", 200, int)
+        # Server heartbeats: idle sockets are pinged every interval and reaped
+        # once nothing has been received from them for the timeout
+        self.WS_HEARTBEAT_INTERVAL_SECONDS = get_env_var("WS_HEARTBEAT_INTERVAL_SECONDS", 25, float)
+        self.WS_HEARTBEAT_TIMEOUT_SECONDS = get_env_var("WS_HEARTBEAT_TIMEOUT_SECONDS", 60, float)
+        self.WS_MAX_CONNECTIONS = get_env_var("WS_MAX_CONNECTIONS", 10000, int)
+        # Devices one user may keep connected at once; the oldest is closed beyond this
+        self.WS_MAX_DEVICES_PER_USER = get_env_var("WS_MAX_DEVICES_PER_USER", 5, int)
+        # Session resume: recent events per user kept for replay, and how long a
+        # user's buffer outlives their last socket
+        self.WS_REPLAY_BUFFER_SIZE = get_env_var("WS_REPLAY_BUFFER_SIZE", 32, int)
+        self.WS_RESUME_WINDOW_SECONDS = get_env_var("WS_RESUME_WINDOW_SECONDS", 120, float)
+        # Reconnect hints spread a reconnect storm so roughly this many clients return per second
+        self.WS_RECONNECT_RATE = get_env_var("WS_RECONNECT_RATE", 1000, float)
+        self.WS_RECONNECT_MIN_DELAY_MS = get_env_var("WS_RECONNECT_MIN_DELAY_MS", 250, int)
+        
+        # Reminder scheduler
+        self.REMINDER_BATCH_SIZE = get_env_var("REMINDER_BATCH_SIZE", 100, int)
+        # Upper bound on idle sleep, so reminders scheduled by other processes are picked up promptly
+        self.REMINDER_MAX_SLEEP_SECONDS = get_env_var("REMINDER_MAX_SLEEP_SECONDS", 30, float)
+        # Lower bound, so due rows locked by another scheduler don't make this one spin
+        self.REMINDER_MIN_SLEEP_SECONDS = get_env_var("REMINDER_MIN_SLEEP_SECONDS", 1, float)
+        
+        # Unread counter repair: recompute every user's counters in batches this often
+        self.COUNTER_REPAIR_INTERVAL_HOURS = get_env_var("COUNTER_REPAIR_INTERVAL_HOURS", 24, float)
+        self.COUNTER_REPAIR_BATCH_SIZE = get_env_var("COUNTER_REPAIR_BATCH_SIZE", 1000, int)
+        
+        # Announcement campaigns: recipients are streamed in chunks, and pushes and
+        # emails are dispatched at no more than these rates (per second)
+        self.CAMPAIGN_CHUNK_SIZE = get_env_var("CAMPAIGN_CHUNK_SIZE", 1000, int)
+        self.CAMPAIGN_PUSH_RATE = get_env_var("CAMPAIGN_PUSH_RATE", 500, float)
+        self.CAMPAIGN_EMAIL_RATE = get_env_var("CAMPAIGN_EMAIL_RATE", 20, float)
+        self.CAMPAIGN_LEASE_SECONDS = get_env_var("CAMPAIGN_LEASE_SECONDS", 300, int)
+        self.CAMPAIGN_POLL_SECONDS = get_env_var("CAMPAIGN_POLL_SECONDS", 30, float)
+        
         # Google Services
         self.GOOGLE_GEOCODING_API_KEY = get_env_var("GOOGLE_GEOCODING_API_KEY", "")
 
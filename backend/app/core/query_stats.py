@@ -0,0 +1,151 @@
+# app/core/query_stats.py
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings, is_production
+
+logger = logging.getLogger("timeleft_api")
+
+# Collapses expanded IN (...) parameter lists so "IN (1, 2)" and
+# "IN (1, 2, 3)" count as the same statement shape
+_PARAM_LIST = re.compile(r"\(\s*(?:%\(\w+\)s|\?|\$\d+)(?:\s*,\s*(?:%\(\w+\)s|\?|\$\d+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a compiled statement so repeated queries compare equal"""
+    return _WHITESPACE.sub(" ", _PARAM_LIST.sub("(?)", statement)).strip()
+
+
+class QueryStats:
+    """SQL statements issued while serving one request"""
+
+    def __init__(self, request_id: Optional[str] = None):
+        self.request_id = request_id
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration: float):
+        with self._lock:
+            self.count += 1
+            self.total_time += duration
+            self.shapes[statement_shape(statement)] += 1
+
+    def repeated_shapes(self, threshold: int) -> Dict[str, int]:
+        """Statement shapes issued at least `threshold` times (likely N+1 loops)"""
+        with self._lock:
+            return {shape: n for shape, n in self.shapes.items() if n >= threshold}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by query_budget() when a block issues more statements than allowed"""
+    pass
+
+
+# Stats for the request being served; set by RequestLoggingMiddleware and
+# inherited by the endpoint task / threadpool worker that runs the handler
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+# Active query_budget() collectors. These are process-wide rather than
+# context-bound so a budget wrapped around a TestClient call still sees the
+# statements the app runs on the client's portal thread.
+_budgets: List[QueryStats] = []
+_budgets_lock = threading.Lock()
+
+_totals = {"statements": 0, "flagged_requests": 0}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_time")
+    duration = time.perf_counter() - start_times.pop() if start_times else 0.0
+
+    _totals["statements"] += 1
+
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+    if _budgets:
+        with _budgets_lock:
+            for budget in _budgets:
+                budget.record(statement, duration)
+
+
+def instrument_engine(engine: Engine):
+    """Attach the statement counters to an engine (use .sync_engine for async engines)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def report_request(stats: QueryStats, method: str, path: str):
+    """Log statement shapes repeated often enough to look like an N+1 loop"""
+    repeated = stats.repeated_shapes(settings.SQL_REPEAT_THRESHOLD)
+    if not repeated:
+        return
+
+    _totals["flagged_requests"] += 1
+    for shape, count in repeated.items():
+        logger.warning(
+            f"Possible N+1: statement repeated {count}x in {method} {path}",
+            extra={
+                "request_id": stats.request_id,
+                "method": method,
+                "path": path,
+                "repeat_count": count,
+                "statement": shape[:500]
+            }
+        )
+
+
+def query_stats_summary() -> Dict[str, int]:
+    """Process-wide counters for the /metrics endpoint"""
+    return {
+        "statements": _totals["statements"],
+        "flagged_requests": _totals["flagged_requests"],
+        "repeat_threshold": settings.SQL_REPEAT_THRESHOLD
+    }
+
+
+@contextmanager
+def query_budget(max_queries: int):
+    """Fail if the wrapped block issues more than `max_queries` SQL statements.
+
+    Intended for tests, e.g.:
+
+        with query_budget(3):
+            client.get("/api/chats/")
+    """
+    if is_production():
+        raise RuntimeError("query_budget() is a test helper and is disabled in production")
+
+    stats = QueryStats()
+    with _budgets_lock:
+        _budgets.append(stats)
+    try:
+        yield stats
+    finally:
+        with _budgets_lock:
+            _budgets.remove(stats)
+
+    if stats.count > max_queries:
+        repeated = stats.repeated_shapes(2)
+        detail = "; ".join(f"{n}x {shape[:200]}" for shape, n in repeated.items())
+        raise QueryBudgetExceeded(
+            f"Expected at most {max_queries} queries, got {stats.count}"
+            + (f" (repeated: {detail})" if detail else "")
+        )
@@ -1,13 +1,17 @@
 from datetime import datetime, timedelta
-from typing import Union
+from typing import Optional, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from .config import settings
-from ..database import get_db
+from ..database import get_db, get_async_db
 from ..models.user import User
+from ..schemas.user import UserSnapshot
+from .user_cache import user_cache
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
@@ -36,10 +40,8 @@ def verify_token(token: str):
     except JWTError:
         return None
 
-def get_current_user(
-    token: str = Depends(security), 
-    db: Session = Depends(get_db)
-) -> User:
+def _get_user_id_from_token(token) -> int:
+    """Decode the bearer token and return the user ID it was issued for"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -56,13 +58,87 @@ def get_current_user(
             raise credentials_exception
         
         # Convert string ID to int for database query
-        user_id = int(user_id_str)
+        return int(user_id_str)
             
     except (JWTError, ValueError):
         raise credentials_exception
+
+def get_current_user(
+    token: str = Depends(security), 
+    db: Session = Depends(get_db)
+) -> User:
+    user_id = _get_user_id_from_token(token)
     
     # Use the integer user_id for the query
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+async def get_user_snapshot(db: AsyncSession, user_id: int) -> Optional[UserSnapshot]:
+    """Return the user's snapshot from the cache, loading it on a miss"""
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        return snapshot
+    
+    # Only load the snapshot columns instead of the full user row
+    result = await db.execute(
+        select(
+            User.id,
+            User.email,
+            User.display_name,
+            User.profile_picture_url,
+            User.is_active,
+            User.is_admin
+        ).where(User.id == user_id)
+    )
+    row = result.first()
+    if row is None:
+        return None
+    
+    snapshot = UserSnapshot(**row._mapping)
+    user_cache.set(snapshot)
+    return snapshot
+
+async def get_current_user_snapshot(
+    token: str = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> UserSnapshot:
+    """Resolve the current user as a cached snapshot; only a cache miss hits the database"""
+    user_id = _get_user_id_from_token(token)
+    
+    snapshot = await get_user_snapshot(db, user_id)
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return snapshot
+
+async def get_current_admin_snapshot(
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
+) -> UserSnapshot:
+    """Like get_current_user_snapshot, but only for active users flagged is_admin.
+
+    The flags are re-read from the database rather than trusted from the
+    cache, so revoking an admin takes effect on every worker at once.
+    """
+    result = await db.execute(
+        select(User.is_active, User.is_admin).where(User.id == current_user.id)
+    )
+    row = result.first()
+    if row is None or (row.is_active, row.is_admin) != (current_user.is_active, current_user.is_admin):
+        # Changed on another worker; reload the snapshot on the next request
+        user_cache.invalidate(current_user.id)
+    if row is None or not (row.is_active and row.is_admin):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
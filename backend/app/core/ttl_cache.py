@@ -0,0 +1,58 @@
+# app/core/ttl_cache.py
+import threading
+from typing import Dict, Generic, Hashable, Optional, TypeVar
+
+from cachetools import TTLCache
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class CountingTTLCache(Generic[K, V]):
+    """Thread-safe in-process LRU+TTL cache that counts hits, misses and invalidations.
+
+    Entries are per process: invalidate() only drops this worker's copy, so
+    the TTL bounds how long a change made elsewhere can go unnoticed.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key: K, value: V):
+        with self._lock:
+            self._cache[key] = value
+
+    def invalidate(self, key: K):
+        with self._lock:
+            self._cache.pop(key, None)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "ttl_seconds": self._cache.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,27 @@
+# app/core/user_cache.py
+from .config import settings
+from .ttl_cache import CountingTTLCache
+from ..schemas.user import UserSnapshot
+
+
+class UserSnapshotCache(CountingTTLCache[int, UserSnapshot]):
+    """In-process LRU+TTL cache of authenticated user snapshots, keyed by user ID.
+
+    Token signature and expiry are still checked on every request; the cache
+    only saves the users lookup that follows. Any code path that changes a
+    user must call invalidate() so the next request reloads the snapshot.
+
+    invalidate() only reaches this process: other workers keep serving the
+    old snapshot for up to USER_CACHE_TTL_SECONDS. Checks that must not lag
+    (admin access) read the flags from the database instead.
+    """
+
+    def set(self, snapshot: UserSnapshot):
+        self.put(snapshot.id, snapshot)
+
+
+# Global user snapshot cache instance
+user_cache = UserSnapshotCache(
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS
+)
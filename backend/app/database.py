@@ -1,8 +1,10 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool
 from .core.config import settings
+from .core.query_stats import instrument_engine
 
 # Convert postgresql:// to postgresql+psycopg:// for psycopg3
 DATABASE_URL = settings.DATABASE_URL
@@ -23,7 +25,35 @@ engine = create_engine(
     }
 )
 
+# Async engine for async def routes - the same postgresql+psycopg URL
+# resolves to psycopg3's async driver under create_async_engine
+async_engine = create_async_engine(
+    DATABASE_URL,
+    pool_size=5,
+    max_overflow=10,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    connect_args={
+        "connect_timeout": 60,
+        "application_name": "TimeLeft-API-async",
+    }
+)
+
+# Per-request statement counting (see RequestLoggingMiddleware)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# expire_on_commit=False so attributes stay readable after commit without
+# an implicit (and in async, illegal) lazy refresh
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 def get_db():
@@ -31,4 +61,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,6 +1,6 @@
 import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from sqlalchemy.exc import SQLAlchemyError
@@ -13,11 +13,15 @@ import os
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("timeleft_api")
 
-from .database import engine
+from .database import engine, async_engine
 from .models import user
-from .routers import auth, gemini, imagegen, gemini_image_edit, dinner, notification, rating, websocket, chat, connection
+from .routers import auth, gemini, imagegen, gemini_image_edit, dinner, notification, rating, websocket, chat, connection, campaign
 from .core.config import settings, is_development, is_production
 from .core.health import HealthChecker
+from .core.user_cache import user_cache
+from .core.chat_cache import chat_cache
+from .core.query_stats import query_stats_summary
+from .core.security import get_current_admin_snapshot
 from .core.exceptions import (
     custom_http_exception_handler, 
     custom_timeleft_exception_handler,
@@ -27,6 +31,10 @@ from .core.exceptions import (
 
 from .middleware import RequestLoggingMiddleware, SecurityHeadersMiddleware, RateLimitMiddleware
 from app.services.background_service import BackgroundTaskService
+from app.services.push_outbox_service import PushOutboxService
+from app.services.push_topic_service import PushTopicService
+from app.services.websocket_service import manager as websocket_manager
+from app.services.message_writer import message_writer
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -48,6 +56,9 @@ async def lifespan(app: FastAPI):
         
         # Start background services (only if available and not blocking)
         background_task = None
+        repair_task = None
+        topic_task = None
+        campaign_task = None
         if BackgroundTaskService:
             try:
                 print("Starting background services...")
@@ -55,6 +66,16 @@ async def lifespan(app: FastAPI):
                 background_task = asyncio.create_task(
                     BackgroundTaskService.start_notification_scheduler()
                 )
+                repair_task = asyncio.create_task(
+                    BackgroundTaskService.start_counter_repair()
+                )
+                campaign_task = asyncio.create_task(
+                    BackgroundTaskService.start_campaign_runner()
+                )
+                if settings.PUSH_DINNER_TOPICS:
+                    topic_task = asyncio.create_task(
+                        BackgroundTaskService.start_topic_reconciliation()
+                    )
                 print("✓ Background services task created")
             except Exception as e:
                 print(f"✗ Failed to start background services: {str(e)}")
@@ -62,6 +83,23 @@ async def lifespan(app: FastAPI):
         else:
             print("⚠ Background service not available, skipping...")
         
+        # Websocket backplane, so messages reach sockets held by other workers
+        try:
+            await websocket_manager.start()
+            print(f"✓ Websocket backplane started ({settings.WS_BACKPLANE})")
+        except Exception as e:
+            print(f"✗ Failed to start websocket backplane: {str(e)}")
+            logger.error(f"Failed to start websocket backplane: {str(e)}")
+        
+        # Push outbox delivery workers
+        push_workers = []
+        try:
+            push_workers = PushOutboxService.start_workers()
+            print(f"✓ {len(push_workers)} push outbox workers started")
+        except Exception as e:
+            print(f"✗ Failed to start push outbox workers: {str(e)}")
+            logger.error(f"Failed to start push outbox workers: {str(e)}")
+        
         print("=== STARTUP COMPLETE ===")
         logger.info(f"=== {settings.APP_NAME} API Started Successfully ===")
         
@@ -80,6 +118,17 @@ async def lifespan(app: FastAPI):
         logger.info("Shutting down...")
         if background_task and not background_task.done():
             background_task.cancel()
+        if repair_task and not repair_task.done():
+            repair_task.cancel()
+        if topic_task and not topic_task.done():
+            topic_task.cancel()
+        if campaign_task and not campaign_task.done():
+            campaign_task.cancel()
+        for worker in push_workers:
+            worker.cancel()
+        await websocket_manager.stop()
+        await message_writer.stop()
+        await async_engine.dispose()
         logger.info("=== Shutdown complete ===")
     except Exception as e:
         logger.error(f"Shutdown error: {str(e)}")
@@ -147,6 +196,7 @@ try:
     app.include_router(websocket.router, prefix="/api")
     app.include_router(chat.router, prefix="/api")
     app.include_router(connection.router, prefix="/api")
+    app.include_router(campaign.router, prefix="/api")
     print("✓ All routers included")
 except Exception as e:
     print(f"✗ Router setup failed: {e}")
@@ -185,6 +235,20 @@ async def test_endpoint():
         "port": os.getenv("PORT", "unknown")
     }
 
+@app.get("/metrics", dependencies=[Depends(get_current_admin_snapshot)])
+async def metrics():
+    """In-process runtime counters for this worker (admins only)"""
+    return {
+        "user_cache": user_cache.stats(),
+        "chat_cache": chat_cache.stats(),
+        "message_writer": message_writer.stats(),
+        "sql": query_stats_summary(),
+        "push_outbox": PushOutboxService.stats(),
+        "push_topics": PushTopicService.stats(),
+        "websocket": websocket_manager.stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
 print("=== APP SETUP COMPLETE ===")
 print(f"Environment: {settings.ENVIRONMENT.value}")
 print(f"Debug mode: {settings.DEBUG}")
@@ -9,6 +9,8 @@ from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 import json
 
+from ..core.query_stats import QueryStats, current_query_stats, report_request
+
 # Configure structured logging
 logging.basicConfig(
     level=logging.INFO,
@@ -30,6 +32,10 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         request_id = str(uuid.uuid4())
         request.state.request_id = request_id
         
+        # Count SQL issued while handling this request
+        query_stats = QueryStats(request_id)
+        stats_token = current_query_stats.set(query_stats)
+        
         # Start timing
         start_time = time.time()
         
@@ -40,6 +46,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         try:
             response = await call_next(request)
         except Exception as e:
+            current_query_stats.reset(stats_token)
             # Log exceptions
             processing_time = time.time() - start_time
             logger.error(
@@ -50,7 +57,8 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                     "url": str(request.url),
                     "processing_time": f"{processing_time:.4f}s",
                     "error": str(e),
-                    "error_type": type(e).__name__
+                    "error_type": type(e).__name__,
+                    "db_queries": query_stats.count
                 }
             )
             
@@ -64,15 +72,24 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                 }
             )
         
+        current_query_stats.reset(stats_token)
+        
         # Calculate processing time
         processing_time = time.time() - start_time
         
         # Add headers to response
         response.headers["X-Request-ID"] = request_id
         response.headers["X-Response-Time"] = f"{processing_time:.4f}s"
+        response.headers["X-DB-Queries"] = str(query_stats.count)
+        response.headers["Server-Timing"] = (
+            f'db;dur={query_stats.total_time * 1000:.2f};desc="{query_stats.count} queries", '
+            f"total;dur={processing_time * 1000:.2f}"
+        )
+        
+        report_request(query_stats, request.method, request.url.path)
         
         # Log response
-        await self._log_response(request, response, request_id, processing_time)
+        await self._log_response(request, response, request_id, processing_time, query_stats)
         
         return response
     
@@ -97,7 +114,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             }
         )
     
-    async def _log_response(self, request: Request, response: Response, request_id: str, processing_time: float):
+    async def _log_response(self, request: Request, response: Response, request_id: str, processing_time: float, query_stats: QueryStats):
         """Log response details"""
         logger.info(
             "Request completed",
@@ -107,6 +124,8 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                 "url": str(request.url),
                 "status_code": response.status_code,
                 "processing_time": f"{processing_time:.4f}s",
+                "db_queries": query_stats.count,
+                "db_time": f"{query_stats.total_time:.4f}s",
                 "response_size": response.headers.get("content-length", "unknown")
             }
         )
\ No newline at end of file
@@ -5,6 +5,10 @@ from .notification import Notification, NotificationType
 from .scheduled_notification import ScheduledNotification, ScheduledNotificationType
 from .chat import Chat, Message
 from .connection import Connection, ConnectionStatus
+from .push_outbox import PushOutbox, PushOutboxStatus
+from .user_counter import UserCounter
+from .dinner_topic_subscription import DinnerTopicSubscription
+from .campaign import Campaign, CampaignStatus
 
 __all__ = [
     "User",
@@ -17,5 +21,11 @@ __all__ = [
     "Chat",
     "Message",
     "Connection",
-    "ConnectionStatus"
+    "ConnectionStatus",
+    "PushOutbox",
+    "PushOutboxStatus",
+    "UserCounter",
+    "DinnerTopicSubscription",
+    "Campaign",
+    "CampaignStatus"
 ]
\ No newline at end of file
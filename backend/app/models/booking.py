@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -29,5 +29,17 @@ class Booking(Base):
     user = relationship("User", back_populates="bookings")
     dinner = relationship("Dinner", back_populates="bookings")
 
+    # A user can hold at most one active (pending/confirmed) booking per dinner
+    __table_args__ = (
+        Index(
+            'uq_bookings_active_user_dinner',
+            'user_id', 'dinner_id',
+            unique=True,
+            postgresql_where=text("status IN ('PENDING', 'CONFIRMED')")
+        ),
+        Index('ix_bookings_dinner_id_status', 'dinner_id', 'status'),
+        Index('ix_bookings_user_id_status', 'user_id', 'status'),
+    )
+
     class Config:
         use_enum_values = True
\ No newline at end of file
@@ -0,0 +1,47 @@
+# backend/app/models/campaign.py
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Enum, JSON
+from app.database import Base
+from datetime import datetime
+import enum
+
+
+class CampaignStatus(enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+
+class Campaign(Base):
+    """A user-wide announcement sent to a segment of users.
+
+    Recipients are processed in user ID order and `last_user_id` is
+    checkpointed in the same transaction as each chunk's notifications, so
+    a run that dies part-way resumes after the last committed chunk.
+    """
+    __tablename__ = "campaigns"
+
+    id = Column(Integer, primary_key=True, index=True)
+    title = Column(String(200), nullable=False)
+    message = Column(Text, nullable=False)
+    # Filters on User columns, see CampaignSegment
+    segment = Column(JSON, nullable=False, default=dict)
+    send_push = Column(Boolean, default=True, nullable=False)
+    send_email = Column(Boolean, default=False, nullable=False)
+    status = Column(Enum(CampaignStatus), default=CampaignStatus.PENDING, nullable=False)
+
+    # Progress checkpoint
+    last_user_id = Column(Integer, default=0, nullable=False)
+    recipients = Column(Integer, default=0, nullable=False)
+    pushes_queued = Column(Integer, default=0, nullable=False)
+    emails_sent = Column(Integer, default=0, nullable=False)
+    emails_failed = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    # Refreshed at every checkpoint; a running campaign whose lease has lapsed is resumed by another worker
+    heartbeat_at = Column(DateTime, nullable=True)
@@ -1,10 +1,13 @@
 # Update your chat model (app/models/chat.py)
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, ForeignKey, Text, Index, Sequence
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
+# Monotonic change counter behind /chat/sync
+chat_change_seq = Sequence("chat_change_seq")
+
 class Chat(Base):
     __tablename__ = "chats"
     
@@ -16,14 +19,41 @@ class Chat(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
     
+    # Read watermarks: the highest message ID each participant has read
+    user1_last_read_message_id = Column(Integer, default=0, server_default="0", nullable=False)
+    user2_last_read_message_id = Column(Integer, default=0, server_default="0", nullable=False)
+    
+    # Bumped on every change /chat/sync reports: creation, read watermarks, deletion
+    change_seq = Column(BigInteger, chat_change_seq, server_default=chat_change_seq.next_value(), nullable=False)
+    # When change_seq was last drawn; lets /chat/sync wait out uncommitted lower seqs
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
     # Relationships
     user1 = relationship("User", foreign_keys=[user1_id], passive_deletes=True, overlaps="chats_as_user1")
     user2 = relationship("User", foreign_keys=[user2_id], passive_deletes=True, overlaps="chats_as_user2")
     messages = relationship("Message", back_populates="chat", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        Index('ix_chats_user1_user2_active', 'user1_id', 'user2_id', 'is_active'),
+        # Changes since a sync cursor, from either participant's side
+        Index('ix_chats_user1_change_seq', 'user1_id', 'change_seq'),
+        Index('ix_chats_user2_change_seq', 'user2_id', 'change_seq'),
+    )
     
     def get_other_user_id(self, current_user_id: int) -> int:
         """Get the other user's ID in this chat"""
         return self.user2_id if self.user1_id == current_user_id else self.user1_id
+    
+    def get_last_read_message_id(self, user_id: int) -> int:
+        """Read watermark for one participant"""
+        if self.user1_id == user_id:
+            return self.user1_last_read_message_id or 0
+        return self.user2_last_read_message_id or 0
+    
+    def is_message_read(self, message_id: int, sender_id: int) -> bool:
+        """Whether the recipient of a message has read it (replaces Message.is_read)"""
+        recipient_id = self.get_other_user_id(sender_id)
+        return message_id <= self.get_last_read_message_id(recipient_id)
 
 
 class Message(Base):
@@ -35,8 +65,15 @@ class Message(Base):
     content = Column(Text, nullable=False)
     message_type = Column(String(20), default="text", nullable=False)
     sent_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Deprecated: no longer maintained; read state comes from the Chat watermarks
     is_read = Column(Boolean, default=False, nullable=False)
     
     # Relationships
     chat = relationship("Chat", back_populates="messages")
-    sender = relationship("User")
\ No newline at end of file
+    sender = relationship("User")
+
+    __table_args__ = (
+        Index('ix_messages_chat_id_sent_at', 'chat_id', 'sent_at'),
+        # Keyset pagination of message history (before_id / after_id)
+        Index('ix_messages_chat_id_id', 'chat_id', 'id'),
+    )
@@ -1,5 +1,5 @@
 # backend/app/models/connection.py
-from sqlalchemy import Column, Integer, ForeignKey, Enum, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, Enum, DateTime, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -30,6 +30,7 @@ class Connection(Base):
     # Ensure unique connection between two users (regardless of who initiated)
     __table_args__ = (
         UniqueConstraint('sender_id', 'receiver_id', name='unique_connection'),
+        Index('ix_connections_receiver_id_status', 'receiver_id', 'status'),
     )
 
     class Config:
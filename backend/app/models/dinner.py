@@ -15,6 +15,8 @@ class Dinner(Base):
     latitude = Column(Float, nullable=True)  
     longitude = Column(Float, nullable=True)  
     max_attendees = Column(Integer, default=6, nullable=False)
+    # Pending + confirmed bookings, maintained by BookingService in the booking transaction
+    confirmed_count = Column(Integer, default=0, server_default="0", nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -25,12 +27,7 @@ class Dinner(Base):
     @property
     def current_attendees(self):
         """Get current number of confirmed bookings"""
-        if not self.bookings:
-            return 0
-        # Import BookingStatus here to avoid circular imports
-        from app.models.booking import BookingStatus
-        return len([booking for booking in self.bookings 
-                   if booking.status in [BookingStatus.CONFIRMED, BookingStatus.PENDING]])
+        return self.confirmed_count or 0
     
     @property
     def is_full(self):
@@ -40,4 +37,4 @@ class Dinner(Base):
     @property
     def available_spots(self):
         """Get number of available spots"""
-        return max(0, self.max_attendees - self.current_attendees)
\ No newline at end of file
+        return max(0, self.max_attendees - self.current_attendees)
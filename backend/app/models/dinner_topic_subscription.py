@@ -0,0 +1,19 @@
+# backend/app/models/dinner_topic_subscription.py
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class DinnerTopicSubscription(Base):
+    """An FCM token we have subscribed to a dinner's topic.
+
+    FCM can't list a topic's members, so this is our record of what was
+    subscribed; topic sends only count as reaching users whose current
+    token appears here, and reconciliation diffs it against bookings.
+    """
+    __tablename__ = "dinner_topic_subscriptions"
+
+    dinner_id = Column(Integer, ForeignKey("dinners.id", ondelete="CASCADE"), primary_key=True)
+    token = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
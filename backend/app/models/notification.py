@@ -1,5 +1,5 @@
 # backend/app/models/notification.py
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime, timezone, timedelta
@@ -16,6 +16,7 @@ class NotificationType(enum.Enum):
     LAST_MINUTE_SPOT = "LAST_MINUTE_SPOT"
     CONNECTION_REQUEST = "connection_request"
     CONNECTION_ACCEPTED = "connection_accepted"
+    ANNOUNCEMENT = "ANNOUNCEMENT"
 
 class Notification(Base):
     __tablename__ = "notifications"
@@ -41,5 +42,9 @@ class Notification(Base):
     dinner = relationship("Dinner")
     booking = relationship("Booking")
 
+    __table_args__ = (
+        Index('ix_notifications_user_read_created', 'user_id', 'is_read', 'created_at'),
+    )
+
     class Config:
         use_enum_values = True
\ No newline at end of file
@@ -0,0 +1,53 @@
+# backend/app/models/push_outbox.py
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum, JSON, Index, text
+from sqlalchemy.orm import relationship
+from app.database import Base
+from datetime import datetime
+import enum
+
+
+class PushOutboxStatus(enum.Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+    SKIPPED = "skipped"  # recipient had no device token
+    ACKNOWLEDGED = "acknowledged"  # delivered over the websocket instead; no push needed
+
+
+class PushOutbox(Base):
+    """A push notification waiting to be delivered by the outbox workers.
+
+    Rows are written in the same transaction as the Notification they
+    announce, so a committed notification always gets a delivery attempt.
+    Topic rows carry one dinner-wide push for all subscribed attendees.
+    """
+    __tablename__ = "push_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Exactly one of user_id (sent to the user's current token) or topic is set
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    topic = Column(String(100), nullable=True)
+    notification_id = Column(Integer, ForeignKey("notifications.id", ondelete="CASCADE"), nullable=True)
+    title = Column(String(200), nullable=False)
+    body = Column(Text, nullable=False)
+    data = Column(JSON, nullable=True)
+    status = Column(Enum(PushOutboxStatus), default=PushOutboxStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+    # Lets concurrent producers enqueue the same broadcast at most once
+    dedupe_key = Column(String(100), nullable=True, unique=True)
+
+    # Relationships
+    notification = relationship("Notification")
+
+    # Workers only ever scan pending rows that are due
+    __table_args__ = (
+        Index(
+            'ix_push_outbox_pending_next_attempt',
+            'next_attempt_at',
+            postgresql_where=text("status = 'PENDING'")
+        ),
+    )
@@ -1,5 +1,5 @@
 # backend/app/models/scheduled_notification.py
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, Enum, Index, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -21,4 +21,13 @@ class ScheduledNotification(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
-    booking = relationship("Booking")
\ No newline at end of file
+    booking = relationship("Booking")
+
+    # The scheduler only ever scans pending rows
+    __table_args__ = (
+        Index(
+            'ix_scheduled_notifications_pending_time',
+            'scheduled_time',
+            postgresql_where=text('is_sent = false')
+        ),
+    )
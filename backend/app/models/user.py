@@ -14,6 +14,7 @@ class User(Base):
     profile_picture_url = Column(String, nullable=True)
     phone_number = Column(String, nullable=True)  # Add this column if missing
     is_active = Column(Boolean, default=True)
+    is_admin = Column(Boolean, default=False, server_default="false", nullable=False)
     is_verified = Column(Boolean, default=False)  
     verification_token = Column(String, nullable=True)  
     verification_sent_at = Column(DateTime(timezone=True), nullable=True)  
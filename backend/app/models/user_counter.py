@@ -0,0 +1,20 @@
+# backend/app/models/user_counter.py
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class UserCounter(Base):
+    """Per-user unread counters, kept in step with the rows they count.
+
+    Updated in the same transactions that create notifications and messages
+    or mark them read, so badges are a primary-key lookup instead of a
+    COUNT(*). A periodic repair job recomputes them to correct drift from
+    cascaded deletes.
+    """
+    __tablename__ = "user_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    unread_notifications = Column(Integer, default=0, server_default="0", nullable=False)
+    unread_messages = Column(Integer, default=0, server_default="0", nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -1,5 +1,6 @@
 import os
-from app.models.booking import Booking
+from app.models.booking import Booking, BookingStatus
+from app.models.dinner import Dinner
 from app.models.notification import Notification
 from app.models.connection import Connection
 from app.models.chat import Chat
@@ -20,6 +21,7 @@ from ..models.user import User
 from ..schemas.user import PasswordReset, PasswordResetRequest, UserCreate, UserGoogleAuthWithOnboarding, UserLogin, UserGoogleAuth, Token, UserPreferencesUpdate, UserResponse, EmailVerification, UserSubscriptionUpdate, UserUpdate
 from ..core.security import get_current_user, verify_password, get_password_hash, create_access_token
 from ..core.config import settings
+from ..core.user_cache import user_cache
 from ..services.email_service import EmailService
 from ..schemas.user import AccountDeletionRequest
 from ..services.s3_service import S3Service
@@ -42,6 +44,7 @@ async def update_fcm_token(
     """Update user's FCM token"""
     current_user.fcm_token = request.token
     db.commit()
+    user_cache.invalidate(current_user.id)
     return {"message": "FCM token updated successfully"}
 
 def get_user_by_email(db: Session, email: str):
@@ -110,6 +113,7 @@ async def google_auth(google_data: UserGoogleAuth, db: Session = Depends(get_db)
             if not db_user.is_verified:
                 db_user.is_verified = True  # Auto-verify when linking Google
             db.commit()
+            user_cache.invalidate(db_user.id)
             db.refresh(db_user)
             print(f"DEBUG: Successfully linked account")
         
@@ -463,6 +467,7 @@ async def update_profile(
             current_user.phone_number = phone if phone else None
         
         db.commit()
+        user_cache.invalidate(current_user.id)
         db.refresh(current_user)
         
         # Return updated user with proper JSON parsing
@@ -614,6 +619,7 @@ async def update_preferences(
             user.marketing_email = preferences_update.marketing_email
         
         db.commit()
+        user_cache.invalidate(user.id)
         db.refresh(user)
         
         # Use custom from_orm method to properly parse JSON fields
@@ -688,6 +694,7 @@ async def upload_profile_photo(
         # Update database
         current_user.profile_picture_url = new_photo_url
         db.commit()
+        user_cache.invalidate(current_user.id)
         db.refresh(current_user)
         
         # Delete old photo after successful update
@@ -789,9 +796,23 @@ async def delete_account(
                 except Exception as sub_error:
                     print(f"Failed to cancel subscription: {sub_error}")
             
-            # 4. Delete the user record from database
+            # 4. Release the seats held by the user's active bookings
+            active_dinner_ids = db.query(Booking.dinner_id).filter(
+                Booking.user_id == user_id,
+                Booking.status.in_([BookingStatus.PENDING, BookingStatus.CONFIRMED])
+            )
+            db.query(Dinner).filter(
+                Dinner.id.in_(active_dinner_ids),
+                Dinner.confirmed_count > 0
+            ).update(
+                {Dinner.confirmed_count: Dinner.confirmed_count - 1},
+                synchronize_session=False
+            )
+            
+            # 5. Delete the user record from database
             db.delete(current_user)
             db.commit()
+            user_cache.invalidate(user_id)
             
             return {
                 "message": "Account and all associated data successfully deleted"
@@ -849,6 +870,7 @@ async def update_subscription(
             user.subscription_plan_id = subscription_update.subscription_plan_id
         
         db.commit()
+        user_cache.invalidate(user.id)
         db.refresh(user)
         
         return UserResponse.from_orm(user)
@@ -877,6 +899,7 @@ async def activate_subscription(
         user.subscription_plan_id = subscription_data.subscription_plan_id
         
         db.commit()
+        user_cache.invalidate(user.id)
         db.refresh(user)
         
         return {
@@ -908,6 +931,7 @@ async def cancel_subscription(
         user.subscription_plan_id = None
         
         db.commit()
+        user_cache.invalidate(user.id)
         db.refresh(user)
         
         return {
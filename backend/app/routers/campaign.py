@@ -0,0 +1,108 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from app.database import get_async_db
+from app.models.campaign import Campaign, CampaignStatus
+from app.schemas.campaign import CampaignCreate, CampaignResponse
+from app.core.security import get_current_admin_snapshot
+from app.schemas.user import UserSnapshot
+from app.services.campaign_service import CampaignService
+
+router = APIRouter(prefix="/admin/campaigns", tags=["campaigns"])
+
+
+def _to_response(campaign: Campaign, remaining: int = None) -> CampaignResponse:
+    return CampaignResponse(
+        id=campaign.id,
+        title=campaign.title,
+        message=campaign.message,
+        segment=campaign.segment or {},
+        send_push=campaign.send_push,
+        send_email=campaign.send_email,
+        status=campaign.status.value,
+        last_user_id=campaign.last_user_id,
+        recipients=campaign.recipients,
+        pushes_queued=campaign.pushes_queued,
+        emails_sent=campaign.emails_sent,
+        emails_failed=campaign.emails_failed,
+        last_error=campaign.last_error,
+        created_at=campaign.created_at,
+        started_at=campaign.started_at,
+        completed_at=campaign.completed_at,
+        remaining=remaining
+    )
+
+
+@router.post("/", response_model=CampaignResponse, status_code=status.HTTP_201_CREATED)
+async def create_campaign(
+    campaign_data: CampaignCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_admin_snapshot)
+):
+    """Create an announcement campaign; a background runner starts sending it"""
+    campaign = await CampaignService.create(db, campaign_data, created_by=current_user.id)
+    return _to_response(campaign, await CampaignService.count_remaining(db, campaign))
+
+
+@router.get("/", response_model=List[CampaignResponse])
+async def list_campaigns(
+    skip: int = 0,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_admin_snapshot)
+):
+    """Recent campaigns with their progress"""
+    result = await db.execute(
+        select(Campaign).order_by(Campaign.id.desc()).offset(skip).limit(limit)
+    )
+    return [_to_response(campaign) for campaign in result.scalars().all()]
+
+
+@router.get("/{campaign_id}", response_model=CampaignResponse)
+async def get_campaign_progress(
+    campaign_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_admin_snapshot)
+):
+    """Progress of one campaign, including how many segment members are left"""
+    campaign = await db.get(Campaign, campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+
+    remaining = 0
+    if campaign.status in (CampaignStatus.PENDING, CampaignStatus.RUNNING, CampaignStatus.FAILED):
+        remaining = await CampaignService.count_remaining(db, campaign)
+    return _to_response(campaign, remaining)
+
+
+@router.post("/{campaign_id}/cancel")
+async def cancel_campaign(
+    campaign_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_admin_snapshot)
+):
+    """Stop a campaign after its current chunk"""
+    cancelled = await CampaignService.set_status(
+        db, campaign_id, CampaignStatus.CANCELLED,
+        allowed=[CampaignStatus.PENDING, CampaignStatus.RUNNING]
+    )
+    if not cancelled:
+        raise HTTPException(status_code=400, detail="Campaign is not pending or running")
+    return {"message": "Campaign cancelled"}
+
+
+@router.post("/{campaign_id}/resume")
+async def resume_campaign(
+    campaign_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_admin_snapshot)
+):
+    """Continue a failed or cancelled campaign from its checkpoint"""
+    resumed = await CampaignService.set_status(
+        db, campaign_id, CampaignStatus.PENDING,
+        allowed=[CampaignStatus.FAILED, CampaignStatus.CANCELLED]
+    )
+    if not resumed:
+        raise HTTPException(status_code=400, detail="Only failed or cancelled campaigns can be resumed")
+    return {"message": "Campaign resumed"}
@@ -1,12 +1,15 @@
-from app.core.security import get_current_user
+from app.core.security import get_current_user_snapshot
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.database import get_async_db
 from app.services.chat_service import ChatService
-from app.schemas.chat import ChatResponse, ChatDetailResponse, ChatCreate, MessageResponse
+from app.core.config import settings
+from app.schemas.chat import ChatResponse, ChatDetailResponse, ChatCreate, MessageResponse, ChatSyncChat, ChatSyncResponse
 from app.models.user import User
-from app.models.chat import Message, Chat
+from app.schemas.user import UserSnapshot
+from app.models.chat import Message
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,13 +18,13 @@ router = APIRouter(prefix="/chat", tags=["chat"])
 @router.post("/start", response_model=ChatResponse)
 async def start_chat(
     chat_data: ChatCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Start a new chat or get existing chat between two users"""
     try:
         # Verify the other user exists
-        other_user = db.query(User).filter(User.id == chat_data.other_user_id).first()
+        other_user = await db.get(User, chat_data.other_user_id)
         if not other_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -29,7 +32,7 @@ async def start_chat(
             )
         
         # Create or get existing chat
-        chat = ChatService.get_or_create_chat(
+        chat = await ChatService.get_or_create_chat(
             db=db,
             user1_id=current_user.id,
             user2_id=chat_data.other_user_id,
@@ -38,12 +41,15 @@ async def start_chat(
         
         # Get other user info
         other_user_id = chat.get_other_user_id(current_user.id)
-        other_user = db.query(User).filter(User.id == other_user_id).first()
+        other_user = await db.get(User, other_user_id)
         
         # Get last message
-        last_message = db.query(Message).filter(
-            Message.chat_id == chat.id
-        ).order_by(Message.sent_at.desc()).first()
+        result = await db.execute(
+            select(Message).where(
+                Message.chat_id == chat.id
+            ).order_by(Message.sent_at.desc()).limit(1)
+        )
+        last_message = result.scalars().first()
         
         return ChatResponse(
             id=chat.id,
@@ -63,7 +69,7 @@ async def start_chat(
                 chat_id=last_message.chat_id,
                 sender_id=last_message.sender_id,
                 sent_at=last_message.sent_at,
-                is_read=last_message.is_read
+                is_read=chat.is_message_read(last_message.id, last_message.sender_id)
             ) if last_message else None,
             unread_count=0  # Calculate if needed
         )
@@ -78,26 +84,21 @@ async def start_chat(
 @router.delete("/{chat_id}")
 async def delete_chat(
     chat_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a chat and all its messages for both users"""
     try:
         # Verify user is part of this chat
-        chat = ChatService.get_chat_by_id(db, chat_id, current_user.id)
+        chat = await ChatService.get_chat_by_id(db, chat_id, current_user.id)
         if not chat:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Chat not found"
             )
         
-        # Delete all messages in this chat
-        db.query(Message).filter(Message.chat_id == chat_id).delete()
-        
-        # Delete the chat itself
-        db.query(Chat).filter(Chat.id == chat_id).delete()
-        
-        db.commit()
+        # Delete all messages and deactivate the chat (kept as a tombstone for /chat/sync)
+        await ChatService.delete_chat(db, chat_id)
         
         return {"message": "Chat deleted successfully"}
         
@@ -105,7 +106,7 @@ async def delete_chat(
         raise
     except Exception as e:
         logger.error(f"Error deleting chat: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Could not delete chat"
@@ -113,62 +114,46 @@ async def delete_chat(
     
 @router.get("/", response_model=List[ChatResponse])
 async def get_user_chats(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all chats for the current user"""
     try:
-        chats = ChatService.get_user_chats(db, current_user.id)
+        # One query for the whole inbox (participant, last message, unread count)
+        rows = await ChatService.get_inbox(db, current_user.id)
         
         chat_responses = []
-        for chat in chats:
-            # FIX: Handle None values for updated_at
-            if chat.updated_at is None:
-                chat.updated_at = chat.created_at
-                db.commit()
-            
-            # Get other user info
-            other_user_id = chat.get_other_user_id(current_user.id)
-            other_user = db.query(User).filter(User.id == other_user_id).first()
-            
-            # Get last message
-            last_message = db.query(Message).filter(
-                Message.chat_id == chat.id
-            ).order_by(Message.sent_at.desc()).first()
-            
-            # Get unread count
-            unread_count = db.query(Message).filter(
-                Message.chat_id == chat.id,
-                Message.sender_id != current_user.id,
-                Message.is_read == False
-            ).count()
+        for row in rows:
+            chat = row.Chat
+            other_user_exists = row.other_user_name is not None
             
             chat_responses.append(ChatResponse(
                 id=chat.id,
                 created_at=chat.created_at,
-                updated_at=chat.updated_at,
+                # Handle None values for updated_at
+                updated_at=chat.updated_at or chat.created_at,
                 is_active=chat.is_active,
                 dinner_id=chat.dinner_id,
                 other_user={
-                    "id": other_user.id,
-                    "display_name": other_user.display_name,
-                    "profile_picture_url": other_user.profile_picture_url
-                } if other_user else {
-                    "id": other_user_id,
+                    "id": row.other_user_id,
+                    "display_name": row.other_user_name,
+                    "profile_picture_url": row.other_user_picture
+                } if other_user_exists else {
+                    "id": row.other_user_id,
                     "display_name": "Unknown User",
                     "profile_picture_url": None
                 },
                 last_message=MessageResponse(
-                    id=last_message.id,
-                    content=last_message.content,
-                    message_type=last_message.message_type,
-                    chat_id=last_message.chat_id,
-                    sender_id=last_message.sender_id,
-                    sent_at=last_message.sent_at,
-                    is_read=last_message.is_read,
-                    sender_name=other_user.display_name if other_user and last_message.sender_id == other_user.id else "You"
-                ) if last_message else None,
-                unread_count=unread_count
+                    id=row.last_message_id,
+                    content=row.last_message_content,
+                    message_type=row.last_message_type,
+                    chat_id=chat.id,
+                    sender_id=row.last_message_sender_id,
+                    sent_at=row.last_message_sent_at,
+                    is_read=row.last_message_is_read,
+                    sender_name=row.other_user_name if other_user_exists and row.last_message_sender_id == row.other_user_id else "You"
+                ) if row.last_message_id is not None else None,
+                unread_count=row.unread_count
             ))
         
         return chat_responses
@@ -180,34 +165,127 @@ async def get_user_chats(
             detail="Could not retrieve chats"
         )
 
+@router.get("/sync", response_model=ChatSyncResponse)
+async def sync_chats(
+    since: Optional[str] = None,
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Changes across all of the user's chats since a cursor, for app resume.
+
+    Call without `since` once to get the chat list and a starting cursor,
+    then pass back the returned `cursor` each time. Keep calling while
+    `has_more` is true. Messages may repeat across calls; de-duplicate by ID.
+    """
+    try:
+        cursor = ChatService.parse_sync_cursor(since) if since is not None else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync cursor"
+        )
+    
+    try:
+        changes = await ChatService.get_changes(
+            db, current_user.id, cursor, settings.CHAT_SYNC_MAX_MESSAGES
+        )
+        
+        chats = []
+        deleted_chat_ids = []
+        for row in changes["chats"]:
+            chat = row.Chat
+            if not chat.is_active:
+                deleted_chat_ids.append(chat.id)
+                continue
+            
+            other_user_id = chat.get_other_user_id(current_user.id)
+            chats.append(ChatSyncChat(
+                id=chat.id,
+                created_at=chat.created_at,
+                updated_at=chat.updated_at or chat.created_at,
+                is_active=chat.is_active,
+                dinner_id=chat.dinner_id,
+                other_user={
+                    "id": other_user_id,
+                    "display_name": row.other_user_name or "Unknown User",
+                    "profile_picture_url": row.other_user_picture
+                },
+                my_last_read_message_id=chat.get_last_read_message_id(current_user.id),
+                other_last_read_message_id=chat.get_last_read_message_id(other_user_id)
+            ))
+        
+        messages = []
+        for message in changes["messages"]:
+            watermarks = changes["watermarks"][message.chat_id]
+            # Read once the recipient's watermark has passed it
+            recipient_last_read = (
+                watermarks.user2_last_read_message_id if message.sender_id == watermarks.user1_id
+                else watermarks.user1_last_read_message_id
+            )
+            sender = changes["profiles"].get(message.sender_id)
+            messages.append(MessageResponse(
+                id=message.id,
+                content=message.content,
+                message_type=message.message_type,
+                chat_id=message.chat_id,
+                sender_id=message.sender_id,
+                sent_at=message.sent_at,
+                is_read=message.id <= recipient_last_read,
+                sender_name=sender.display_name if sender else "Unknown",
+                sender_profile_picture=sender.profile_picture_url if sender else None
+            ))
+        
+        return ChatSyncResponse(
+            cursor=changes["cursor"],
+            chats=chats,
+            deleted_chat_ids=deleted_chat_ids,
+            messages=messages,
+            has_more=changes["has_more"]
+        )
+        
+    except Exception as e:
+        logger.error(f"Error syncing chats: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Could not sync chats"
+        )
+
 @router.get("/{chat_id}", response_model=ChatDetailResponse)
 async def get_chat_detail(
     chat_id: int,
     limit: int = 50,
     offset: int = 0,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get chat details with messages"""
     try:
-        chat = ChatService.get_chat_by_id(db, chat_id, current_user.id)
+        chat = await ChatService.get_chat_by_id(db, chat_id, current_user.id)
         if not chat:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Chat not found"
             )
         
-        # Get messages
-        messages = ChatService.get_chat_messages(db, chat_id, current_user.id, limit, offset)
+        # Get messages (before_id / after_id take precedence over offset)
+        messages = await ChatService.get_chat_messages(
+            db, chat_id, current_user.id, limit, offset,
+            before_id=before_id, after_id=after_id
+        )
         
-        # Get other user info
+        # Resolve the other participant and every sender on the page at once
         other_user_id = chat.get_other_user_id(current_user.id)
-        other_user = db.query(User).filter(User.id == other_user_id).first()
+        profiles = await ChatService.get_sender_profiles(
+            db, {other_user_id} | {message.sender_id for message in messages}
+        )
+        other_user = profiles.get(other_user_id)
         
         # Convert messages to response format
         message_responses = []
         for message in messages:
-            sender = db.query(User).filter(User.id == message.sender_id).first()
+            sender = profiles.get(message.sender_id)
             message_responses.append(MessageResponse(
                 id=message.id,
                 content=message.content,
@@ -215,13 +293,13 @@ async def get_chat_detail(
                 chat_id=message.chat_id,
                 sender_id=message.sender_id,
                 sent_at=message.sent_at,
-                is_read=message.is_read,
+                is_read=chat.is_message_read(message.id, message.sender_id),
                 sender_name=sender.display_name if sender else "Unknown",
                 sender_profile_picture=sender.profile_picture_url if sender else None
             ))
         
         # Mark messages as read
-        ChatService.mark_messages_as_read(db, chat_id, current_user.id)
+        await ChatService.mark_messages_as_read(db, chat_id, current_user.id)
         
         return ChatDetailResponse(
             id=chat.id,
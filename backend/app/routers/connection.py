@@ -2,14 +2,15 @@
 from app.models.notification import NotificationType
 from app.services.notification_service import NotificationService
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy import select, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.connection import Connection, ConnectionStatus
 from app.models.user import User
-from app.core.security import get_current_user
+from app.schemas.user import UserSnapshot
+from app.core.security import get_current_user_snapshot
 from app.services.connection_service import ConnectionService
 
 router = APIRouter(prefix="/connections", tags=["connections"])
@@ -18,24 +19,24 @@ router = APIRouter(prefix="/connections", tags=["connections"])
 @router.post("/send-request")
 async def send_connection_request(
     receiver_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Send a connection request to another user"""
     try:
         # Check if receiver exists
-        receiver = db.query(User).filter(User.id == receiver_id).first()
+        receiver = await db.get(User, receiver_id)
         if not receiver:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
-        connection = ConnectionService.send_connection_request(
+        connection = await ConnectionService.send_connection_request(
             db, current_user.id, receiver_id
         )
 
-        NotificationService.create_notification(
+        await NotificationService.create_notification(
             db=db,
             user_id=receiver_id,
             notification_type=NotificationType.CONNECTION_REQUEST,
@@ -59,33 +60,36 @@ async def send_connection_request(
 @router.put("/accept/{connection_id}")
 async def accept_connection_request(
     connection_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Accept a connection request"""
     try:
-        connection = ConnectionService.accept_connection_request(
+        connection = await ConnectionService.accept_connection_request(
             db, connection_id, current_user.id
         )
         
         # Get the other user (the sender of the request)
-        other_user = db.query(User).filter(User.id == connection.sender_id).first()
+        other_user = await db.get(User, connection.sender_id)
 
         # **ADD THIS: Mark the related connection request notification as read**
         from app.models.notification import Notification  # Import if not already imported
         
-        notification = db.query(Notification).filter(
-            Notification.connection_id == connection_id,
-            Notification.user_id == current_user.id,
-            Notification.type == NotificationType.CONNECTION_REQUEST
-        ).first()
+        result = await db.execute(
+            select(Notification).where(
+                Notification.connection_id == connection_id,
+                Notification.user_id == current_user.id,
+                Notification.type == NotificationType.CONNECTION_REQUEST
+            )
+        )
+        notification = result.scalars().first()
         
         if notification:
-            notification.is_read = True
+            await NotificationService.mark_as_read(db, current_user.id, [notification.id])
             print(f"Marked notification {notification.id} as read for connection {connection_id}")
 
         # Create acceptance notification for the sender
-        NotificationService.create_notification(
+        await NotificationService.create_notification(
             db=db,
             user_id=connection.sender_id,
             notification_type=NotificationType.CONNECTION_ACCEPTED,
@@ -94,7 +98,7 @@ async def accept_connection_request(
         )
         
         # Commit all changes
-        db.commit()
+        await db.commit()
         
         return {
             "message": "Connection request accepted",
@@ -112,12 +116,12 @@ async def accept_connection_request(
 @router.put("/reject/{connection_id}")
 async def reject_connection_request(
     connection_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Reject a connection request"""
     try:
-        connection = ConnectionService.reject_connection_request(
+        connection = await ConnectionService.reject_connection_request(
             db, connection_id, current_user.id
         )
         
@@ -135,13 +139,13 @@ async def reject_connection_request(
 @router.delete("/remove/{user_id}")
 async def remove_connection(
     user_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Remove an existing connection between current user and specified user"""
     try:
         # Check if the target user exists
-        target_user = db.query(User).filter(User.id == user_id).first()
+        target_user = await db.get(User, user_id)
         if not target_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -156,12 +160,15 @@ async def remove_connection(
             )
         
         # Find the connection between the two users
-        connection = db.query(Connection).filter(
-            or_(
-                and_(Connection.sender_id == current_user.id, Connection.receiver_id == user_id),
-                and_(Connection.sender_id == user_id, Connection.receiver_id == current_user.id)
+        result = await db.execute(
+            select(Connection).where(
+                or_(
+                    and_(Connection.sender_id == current_user.id, Connection.receiver_id == user_id),
+                    and_(Connection.sender_id == user_id, Connection.receiver_id == current_user.id)
+                )
             )
-        ).first()
+        )
+        connection = result.scalars().first()
         
         if not connection:
             raise HTTPException(
@@ -177,8 +184,8 @@ async def remove_connection(
             )
         
         # Delete the connection from database
-        db.delete(connection)
-        db.commit()
+        await db.delete(connection)
+        await db.commit()
         
         return {
             "message": f"Connection with {target_user.display_name} removed successfully",
@@ -198,11 +205,11 @@ async def remove_connection(
     
 @router.get("/my-connections")
 async def get_my_connections(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all accepted connections for the current user"""
-    connections = ConnectionService.get_user_connections(
+    connections = await ConnectionService.get_user_connections(
         db, current_user.id, ConnectionStatus.ACCEPTED
     )
     
@@ -224,11 +231,11 @@ async def get_my_connections(
 
 @router.get("/pending-requests")
 async def get_pending_requests(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all pending connection requests received by the current user"""
-    pending_requests = ConnectionService.get_pending_requests(
+    pending_requests = await ConnectionService.get_pending_requests(
         db, current_user.id
     )
     
@@ -256,11 +263,11 @@ async def get_pending_requests(
 @router.get("/status/{user_id}")
 async def get_connection_status_with_user(
     user_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get connection status between current user and specified user"""
-    status_info = ConnectionService.get_connection_status(
+    status_info = await ConnectionService.get_connection_status(
         db, current_user.id, user_id
     )
     
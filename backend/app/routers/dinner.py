@@ -1,12 +1,16 @@
 from app.models.notification import NotificationType
 from app.services.notification_service import NotificationService
 from app.services.connection_service import ConnectionService
+from app.services.booking_service import BookingService
+from app.services.push_topic_service import PushTopicService
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import datetime, timedelta
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.dinner import Dinner
 from app.models.booking import Booking, BookingStatus
 from app.schemas.dinner import (
@@ -17,14 +21,22 @@ from app.schemas.dinner import (
     BookingCreate,
     BookingResponse
 )
-from app.core.security import get_current_user
+from app.core.security import get_current_user_snapshot, get_current_admin_snapshot
 from app.models.user import User
+from app.schemas.user import UserSnapshot
 from ..services.geocoding_service import GeocodingService 
 
 router = APIRouter(prefix="/dinners", tags=["dinners"])
 
+async def _get_dinner_with_bookings(db: AsyncSession, dinner_id: int):
+    """Load a dinner with its bookings so the attendee properties don't lazy load"""
+    result = await db.execute(
+        select(Dinner).options(selectinload(Dinner.bookings)).where(Dinner.id == dinner_id)
+    )
+    return result.scalars().first()
+
 @router.post("/seed-dinners-no-auth")
-async def seed_dinners_no_auth(db: Session = Depends(get_db)):
+async def seed_dinners_no_auth(db: AsyncSession = Depends(get_async_db)):
     """Create test dinners WITHOUT authentication (temporary)"""
     from app.models.dinner import Dinner
     from datetime import datetime, timedelta
@@ -48,7 +60,7 @@ async def seed_dinners_no_auth(db: Session = Depends(get_db)):
     
     for dinner in test_dinners:
         db.add(dinner)
-    db.commit()
+    await db.commit()
     
     return {"message": f"Created {len(test_dinners)} test dinners"}
 
@@ -57,43 +69,44 @@ async def seed_dinners_no_auth(db: Session = Depends(get_db)):
 async def get_available_dinners(
     skip: int = 0,
     limit: int = 20,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all available dinners (not full and active)"""
-    dinners = db.query(Dinner).filter(
-        Dinner.is_active == True,
-        Dinner.date > datetime.utcnow()  # Only future dinners
-    ).offset(skip).limit(limit).all()
-    
-    # Filter out full dinners
-    available_dinners = [
-        dinner for dinner in dinners 
-        if not dinner.is_full
-    ]
+    # Full dinners are filtered in SQL so offset/limit page over bookable dinners only
+    result = await db.execute(
+        select(Dinner).where(
+            Dinner.is_active == True,
+            Dinner.date > datetime.utcnow(),  # Only future dinners
+            Dinner.confirmed_count < Dinner.max_attendees
+        ).order_by(Dinner.date, Dinner.id).offset(skip).limit(limit)
+    )
     
-    return available_dinners
+    return result.scalars().all()
 
 @router.get("/all", response_model=List[DinnerResponse])
 async def get_all_dinners(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user_snapshot)
 ):
     """Get all dinners (including past ones) - for user's booking history"""
-    dinners = db.query(Dinner).filter(
-        Dinner.is_active == True
-    ).order_by(Dinner.date.desc()).offset(skip).limit(limit).all()
+    result = await db.execute(
+        select(Dinner).options(selectinload(Dinner.bookings)).where(
+            Dinner.is_active == True
+        ).order_by(Dinner.date.desc()).offset(skip).limit(limit)
+    )
+    dinners = result.scalars().all()
     
     return dinners
 
 @router.get("/{dinner_id}", response_model=DinnerResponse)
 async def get_dinner(
     dinner_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific dinner with booking details"""
-    dinner = db.query(Dinner).filter(Dinner.id == dinner_id).first()
+    dinner = await _get_dinner_with_bookings(db, dinner_id)
     if not dinner:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -105,8 +118,8 @@ async def get_dinner(
 @router.post("/", response_model=DinnerResponse)
 async def create_dinner(
     dinner: DinnerCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user_snapshot)
 ):
     """Create a new dinner with geocoded coordinates"""
     
@@ -123,20 +136,19 @@ async def create_dinner(
     # BUG: You're using dinner.dict() instead of dinner_data
     db_dinner = Dinner(**dinner_data)  # Change this line
     db.add(db_dinner)
-    db.commit()
-    db.refresh(db_dinner)
-    return db_dinner
+    await db.commit()
+    return await _get_dinner_with_bookings(db, db_dinner.id)
 
 
 @router.put("/{dinner_id}", response_model=DinnerResponse)
 async def update_dinner(
     dinner_id: int,
     dinner_update: DinnerUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user_snapshot)
 ):
     """Update a dinner (admin only for now)"""
-    db_dinner = db.query(Dinner).filter(Dinner.id == dinner_id).first()
+    db_dinner = await _get_dinner_with_bookings(db, dinner_id)
     if not db_dinner:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -148,27 +160,26 @@ async def update_dinner(
     for field, value in update_data.items():
         setattr(db_dinner, field, value)
     
-    db.commit()
-    db.refresh(db_dinner)
+    await db.commit()
     return db_dinner
 
 
 @router.delete("/{dinner_id}")
 async def delete_dinner(
     dinner_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user_snapshot)
 ):
     """Delete a dinner (admin only for now)"""
-    db_dinner = db.query(Dinner).filter(Dinner.id == dinner_id).first()
+    db_dinner = await _get_dinner_with_bookings(db, dinner_id)
     if not db_dinner:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Dinner not found"
         )
     
-    db.delete(db_dinner)
-    db.commit()
+    await db.delete(db_dinner)
+    await db.commit()
     return {"message": "Dinner deleted successfully"}
 
 
@@ -176,83 +187,43 @@ async def delete_dinner(
 async def book_dinner(
     dinner_id: int,
     booking_data: dict = None,  # Change this line - accept optional dict
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user_snapshot)
 ):
     """Book a dinner for the current user"""
-    # Check if dinner exists
-    dinner = db.query(Dinner).filter(Dinner.id == dinner_id).first()
-    if not dinner:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Dinner not found"
-        )
-    
-    # Check if dinner is active and not in the past
-    if not dinner.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="This dinner is no longer available"
-        )
-    
-    if dinner.date <= datetime.utcnow():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot book past dinners"
-        )
-    
-    # Check if dinner is full
-    if dinner.is_full:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="This dinner is fully booked"
-        )
-    
-    # Check if user already has a booking for this dinner
-    existing_booking = db.query(Booking).filter(
-        Booking.user_id == current_user.id,
-        Booking.dinner_id == dinner_id,
-        Booking.status.in_([BookingStatus.PENDING, BookingStatus.CONFIRMED])
-    ).first()
-    
-    if existing_booking:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You already have a booking for this dinner"
-        )
-    
     # Extract notes from booking_data if provided
     notes = None
     if booking_data and isinstance(booking_data, dict):
         notes = booking_data.get('notes')
     
-    # Create the booking
-    db_booking = Booking(
-        user_id=current_user.id,
+    # Seat check and insert happen atomically under a lock on the dinner row
+    db_booking = await BookingService.reserve_seat(
+        db,
         dinner_id=dinner_id,
-        notes=notes,  # Use the extracted notes
-        status=BookingStatus.CONFIRMED
+        user_id=current_user.id,
+        notes=notes
     )
-    
-    db.add(db_booking)
-    db.commit()
-    db.refresh(db_booking)
 
     from app.services.notification_service import NotificationService
-    NotificationService.schedule_booking_reminders(db, db_booking.id)
+    await NotificationService.schedule_booking_reminders(db, db_booking.id)
     
     # Send immediate confirmation notification
-    NotificationService.notify_booking_confirmed(db, db_booking.id)
+    await NotificationService.notify_booking_confirmed(db, db_booking.id)
+
+    PushTopicService.schedule_member_sync(dinner_id, current_user.id)
     
     return db_booking
 
 @router.get("/user/bookings")
 async def get_user_bookings(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all bookings for the current user"""
-    bookings = db.query(Booking).filter(Booking.user_id == current_user.id).all()
+    result = await db.execute(
+        select(Booking).options(selectinload(Booking.dinner)).where(Booking.user_id == current_user.id)
+    )
+    bookings = result.scalars().all()
     
     result = []
     for booking in bookings:
@@ -279,14 +250,17 @@ async def get_user_bookings(
 @router.put("/bookings/{booking_id}/cancel")
 async def cancel_booking(
     booking_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user_snapshot)
 ):
     """Cancel a booking"""
-    booking = db.query(Booking).filter(
-        Booking.id == booking_id,
-        Booking.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Booking).where(
+            Booking.id == booking_id,
+            Booking.user_id == current_user.id
+        )
+    )
+    booking = result.scalars().first()
     
     if not booking:
         raise HTTPException(
@@ -300,28 +274,37 @@ async def cancel_booking(
             detail="Booking is already cancelled"
         )
     
-    booking.status = BookingStatus.CANCELLED
-    NotificationService.delete_scheduled_notifications_for_booking(db, booking.id)
-
-    NotificationService.notify_booking_cancelled(db, booking.id)
+    # Flip the status and release the seat in one transaction
+    if not await BookingService.cancel_booking(db, booking):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Booking is already cancelled"
+        )
     
-    db.commit()
+    await NotificationService.delete_scheduled_notifications_for_booking(db, booking.id)
+
+    await NotificationService.notify_booking_cancelled(db, booking.id)
+
+    PushTopicService.schedule_member_sync(booking.dinner_id, current_user.id)
     
     return {"message": "Booking cancelled successfully"}
 
 @router.delete("/bookings/{booking_id}/remove")
 async def remove_booking(
     booking_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user_snapshot)
 ):
     """Remove a booking from database (only for past or cancelled bookings)"""
     
     # Get the booking with dinner details
-    booking = db.query(Booking).join(Dinner).filter(
-        Booking.id == booking_id,
-        Booking.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Booking).join(Dinner).options(selectinload(Booking.dinner)).where(
+            Booking.id == booking_id,
+            Booking.user_id == current_user.id
+        )
+    )
+    booking = result.scalars().first()
     
     if not booking:
         raise HTTPException(
@@ -354,14 +337,16 @@ async def remove_booking(
     
     # Delete any scheduled notifications for this booking
     try:
-        NotificationService.delete_scheduled_notifications_for_booking(db, booking.id)
+        await NotificationService.delete_scheduled_notifications_for_booking(db, booking.id)
     except Exception as e:
         print(f"Error deleting notifications for booking {booking.id}: {e}")
         # Continue with deletion even if notification cleanup fails
     
-    # Delete the booking from database
-    db.delete(booking)
-    db.commit()
+    # Delete the booking from database (releasing its seat if still active)
+    dinner_id = booking.dinner_id
+    await BookingService.remove_booking(db, booking)
+
+    PushTopicService.schedule_member_sync(dinner_id, current_user.id)
     
     return {
         "message": "Booking removed successfully",
@@ -372,13 +357,13 @@ async def remove_booking(
 @router.get("/{dinner_id}/users")
 async def get_users_from_dinner(
     dinner_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user_snapshot)
 ):
     """Get all users who have bookings for a specific dinner"""
     
     # Check if dinner exists
-    dinner = db.query(Dinner).filter(Dinner.id == dinner_id).first()
+    dinner = await db.get(Dinner, dinner_id)
     if not dinner:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -386,10 +371,13 @@ async def get_users_from_dinner(
         )
     
     # Get users with confirmed/pending bookings
-    users = db.query(User).join(Booking).filter(
-        Booking.dinner_id == dinner_id,
-        Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.PENDING])
-    ).all()
+    result = await db.execute(
+        select(User).join(Booking).where(
+            Booking.dinner_id == dinner_id,
+            Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.PENDING])
+        )
+    )
+    users = result.scalars().all()
     
     # Format response
     user_list = []
@@ -457,19 +445,22 @@ async def get_users_from_dinner(
 
 @router.get("/user/recent-dinner-attendees")
 async def get_recent_dinner_attendees(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get attendees from user's most recent confirmed dinner (only if dinner is max 1 day old)"""
     
     # Get user's most recent confirmed booking (within the last 2 days)
     one_day_ago = datetime.utcnow() - timedelta(days=2)
-    recent_booking = db.query(Booking).join(Dinner).filter(
-        Booking.user_id == current_user.id,
-        Booking.status == BookingStatus.CONFIRMED,
-        Dinner.date < datetime.utcnow(),  # Only past dinners
-        Dinner.date >= one_day_ago  # Only dinners within the last day
-    ).order_by(Dinner.date.desc()).first()
+    result = await db.execute(
+        select(Booking).join(Dinner).options(selectinload(Booking.dinner)).where(
+            Booking.user_id == current_user.id,
+            Booking.status == BookingStatus.CONFIRMED,
+            Dinner.date < datetime.utcnow(),  # Only past dinners
+            Dinner.date >= one_day_ago  # Only dinners within the last day
+        ).order_by(Dinner.date.desc()).limit(1)
+    )
+    recent_booking = result.scalars().first()
     
     if not recent_booking:
         return {
@@ -479,17 +470,20 @@ async def get_recent_dinner_attendees(
         }
     
     # Get all other users who have confirmed bookings for the same dinner
-    other_users = db.query(User).join(Booking).filter(
-        Booking.dinner_id == recent_booking.dinner_id,
-        Booking.status == BookingStatus.CONFIRMED,
-        Booking.user_id != current_user.id  # Exclude current user
-    ).all()
+    result = await db.execute(
+        select(User).join(Booking).where(
+            Booking.dinner_id == recent_booking.dinner_id,
+            Booking.status == BookingStatus.CONFIRMED,
+            Booking.user_id != current_user.id  # Exclude current user
+        )
+    )
+    other_users = result.scalars().all()
     
     # Check connection status for each user
     attendees_list = []
     for user in other_users:
         # Get connection status between current user and this attendee
-        connection_status = ConnectionService.get_connection_status(
+        connection_status = await ConnectionService.get_connection_status(
             db, current_user.id, user.id
         )
         
@@ -511,13 +505,13 @@ async def get_recent_dinner_attendees(
 @router.get("/user/dinner-id-attendees")
 async def get_dinner_id_attendees(
     dinner_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get attendees for a specific dinner by dinner ID (user must have confirmed booking for this dinner)"""
     
     # Check if dinner exists
-    dinner = db.query(Dinner).filter(Dinner.id == dinner_id).first()
+    dinner = await db.get(Dinner, dinner_id)
     if not dinner:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -525,11 +519,14 @@ async def get_dinner_id_attendees(
         )
     
     # Check if current user has a confirmed booking for this dinner
-    user_booking = db.query(Booking).filter(
-        Booking.user_id == current_user.id,
-        Booking.dinner_id == dinner_id,
-        Booking.status == BookingStatus.CONFIRMED
-    ).first()
+    result = await db.execute(
+        select(Booking).where(
+            Booking.user_id == current_user.id,
+            Booking.dinner_id == dinner_id,
+            Booking.status == BookingStatus.CONFIRMED
+        )
+    )
+    user_booking = result.scalars().first()
     
     if not user_booking:
         raise HTTPException(
@@ -538,17 +535,20 @@ async def get_dinner_id_attendees(
         )
     
     # Get all other users who have confirmed bookings for this dinner
-    other_users = db.query(User).join(Booking).filter(
-        Booking.dinner_id == dinner_id,
-        Booking.status == BookingStatus.CONFIRMED,
-        Booking.user_id != current_user.id  # Exclude current user
-    ).all()
+    result = await db.execute(
+        select(User).join(Booking).where(
+            Booking.dinner_id == dinner_id,
+            Booking.status == BookingStatus.CONFIRMED,
+            Booking.user_id != current_user.id  # Exclude current user
+        )
+    )
+    other_users = result.scalars().all()
     
     # Check connection status for each user
     attendees_list = []
     for user in other_users:
         # Get connection status between current user and this attendee
-        connection_status = ConnectionService.get_connection_status(
+        connection_status = await ConnectionService.get_connection_status(
             db, current_user.id, user.id
         )
         
@@ -574,22 +574,18 @@ async def admin_send_notification_to_dinner(
     dinner_id: int,
     title: str,
     message: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_admin_snapshot)
 ):
     """Admin endpoint to send notification to all users of a specific dinner"""
-    # TODO: Add admin role check here
-    # if not current_user.is_admin:
-    #     raise HTTPException(status_code=403, detail="Admin access required")
-    
     from app.services.notification_service import NotificationService
     
     # Check if dinner exists
-    dinner = db.query(Dinner).filter(Dinner.id == dinner_id).first()
+    dinner = await db.get(Dinner, dinner_id)
     if not dinner:
         raise HTTPException(status_code=404, detail="Dinner not found")
     
-    notifications = NotificationService.send_admin_notification_to_dinner_users(
+    notifications = await NotificationService.send_admin_notification_to_dinner_users(
         db=db,
         dinner_id=dinner_id,
         title=title,
@@ -607,20 +603,18 @@ async def admin_send_notification_to_booking(
     booking_id: int,
     title: str,
     message: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_admin_snapshot)
 ):
     """Admin endpoint to send notification to a specific booking user"""
-    # TODO: Add admin role check
-    
     from app.services.notification_service import NotificationService
     
     # Check if booking exists
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    booking = await db.get(Booking, booking_id)
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
-    notification = NotificationService.create_notification(
+    notification = await NotificationService.create_notification(
         db=db,
         user_id=booking.user_id,
         notification_type=NotificationType.DINNER_UPDATED,
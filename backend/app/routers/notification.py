@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.database import get_db
+from app.database import get_async_db
 from app.models.notification import Notification
 from app.schemas.notification import NotificationResponse, NotificationUpdate
-from app.core.security import get_current_user
+from app.core.security import get_current_user_snapshot
 from app.models.user import User
-from datetime import datetime
+from app.schemas.user import UserSnapshot
+from app.services.notification_service import NotificationService
+from app.services.counter_service import UnreadCounterService
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
@@ -15,17 +18,19 @@ async def get_user_notifications(
     skip: int = 0,
     limit: int = 50,
     unread_only: bool = False,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user_snapshot)
 ):
     """Get notifications for the current user"""
-    query = db.query(Notification).filter(Notification.user_id == current_user.id)
+    query = select(Notification).where(Notification.user_id == current_user.id)
     
     if unread_only:
-        query = query.filter(Notification.is_read == False)
+        query = query.where(Notification.is_read == False)
     
-    notifications = query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
-    return notifications
+    result = await db.execute(
+        query.order_by(Notification.created_at.desc()).offset(skip).limit(limit)
+    )
+    return result.scalars().all()
 
 @router.post("/test-notification")
 async def create_test_notification(
@@ -33,12 +38,11 @@ async def create_test_notification(
     title: str = "Test Notification",
     message: str = "This is a test notification",
     notification_type: str = "booking_confirmed",
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)  # Only authenticated users can create test notifications
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user_snapshot)  # Only authenticated users can create test notifications
 ):
     """Create a test notification (for development only)"""
     from app.models.notification import NotificationType
-    from app.services.notification_service import NotificationService
     
     # Convert string to enum
     try:
@@ -46,7 +50,7 @@ async def create_test_notification(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid notification type")
     
-    notification = NotificationService.create_notification(
+    notification = await NotificationService.create_notification(
         db=db,
         user_id=user_id,
         notification_type=type_enum,
@@ -59,16 +63,19 @@ async def create_test_notification(
 @router.delete("/{notification_id}")
 async def delete_notification(
     notification_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a specific notification"""
     try:
         # Find the notification
-        notification = db.query(Notification).filter(
-            Notification.id == notification_id,
-            Notification.user_id == current_user.id  # Ensure user owns the notification
-        ).first()
+        result = await db.execute(
+            select(Notification).where(
+                Notification.id == notification_id,
+                Notification.user_id == current_user.id  # Ensure user owns the notification
+            )
+        )
+        notification = result.scalars().first()
         
         if not notification:
             raise HTTPException(
@@ -77,8 +84,7 @@ async def delete_notification(
             )
         
         # Delete the notification
-        db.delete(notification)
-        db.commit()
+        await NotificationService.delete_notification(db, notification)
         
         return {
             "message": "Notification deleted successfully",
@@ -88,7 +94,7 @@ async def delete_notification(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Failed to delete notification: {str(e)}"
@@ -97,50 +103,41 @@ async def delete_notification(
 @router.put("/{notification_id}/read")
 async def mark_notification_read(
     notification_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user_snapshot)
 ):
     """Mark a notification as read"""
-    notification = db.query(Notification).filter(
-        Notification.id == notification_id,
-        Notification.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Notification).where(
+            Notification.id == notification_id,
+            Notification.user_id == current_user.id
+        )
+    )
+    notification = result.scalars().first()
     
     if not notification:
         raise HTTPException(status_code=404, detail="Notification not found")
     
-    notification.is_read = True
-    notification.read_at = datetime.utcnow()
-    db.commit()
+    await NotificationService.mark_as_read(db, current_user.id, [notification.id])
     
     return {"message": "Notification marked as read"}
 
 @router.put("/read-all")
 async def mark_all_notifications_read(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user_snapshot)
 ):
     """Mark all notifications as read for the current user"""
-    db.query(Notification).filter(
-        Notification.user_id == current_user.id,
-        Notification.is_read == False
-    ).update({
-        "is_read": True,
-        "read_at": datetime.utcnow()
-    })
-    db.commit()
+    await NotificationService.mark_as_read(db, current_user.id)
     
     return {"message": "All notifications marked as read"}
 
 @router.get("/unread-count")
 async def get_unread_count(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user_snapshot)
 ):
-    """Get count of unread notifications"""
-    count = db.query(Notification).filter(
-        Notification.user_id == current_user.id,
-        Notification.is_read == False
-    ).count()
+    """Get count of unread notifications (a maintained counter, not a COUNT)"""
+    count, _ = await UnreadCounterService.get(db, current_user.id)
     
     return {"unread_count": count}
\ No newline at end of file
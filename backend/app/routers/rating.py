@@ -100,7 +100,8 @@ async def create_test_ratable_booking(
         location="Test Restaurant, Bangalore",
         latitude=12.9716,
         longitude=77.5946,
-        max_attendees=6
+        max_attendees=6,
+        confirmed_count=1  # The confirmed booking created below
     )
     db.add(test_dinner)
     db.flush()  # Get the ID
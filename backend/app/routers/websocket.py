@@ -1,19 +1,26 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.services.websocket_service import manager
+from app.database import AsyncSessionLocal
+from app.services.websocket_service import ClientConnection, manager
 from app.services.chat_service import ChatService
+from app.services.notification_service import NotificationService
 from app.schemas.chat import WebSocketMessage, WebSocketMessageSend, WebSocketTyping
-from app.core.security import verify_token  # Add this import
-from app.models.user import User
+from app.core.security import verify_token, get_user_snapshot
+from app.schemas.user import UserSnapshot
+from typing import Optional
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-async def get_user_from_token(token: str, db: Session) -> User:
-    """Validate token and return user"""
+PONG = json.dumps({"type": "pong", "data": {}})
+
+async def get_user_from_token(token: str) -> UserSnapshot:
+    """Validate token and return user.
+
+    Uses its own short-lived session (and the user snapshot cache), so no
+    pooled connection is held once authentication is done.
+    """
     try:
         logger.info(f"Attempting to validate token: {token[:20]}...")
         
@@ -34,7 +41,8 @@ async def get_user_from_token(token: str, db: Session) -> User:
         user_id = int(user_id_str)
         logger.info(f"Extracted user_id: {user_id}")
         
-        user = db.query(User).filter(User.id == user_id).first()
+        async with AsyncSessionLocal() as db:
+            user = await get_user_snapshot(db, user_id)
         if user is None:
             logger.error(f"User {user_id} not found in database")
             raise HTTPException(status_code=401, detail="User not found")
@@ -56,20 +64,23 @@ async def websocket_endpoint(
     websocket: WebSocket, 
     user_id: int,
     token: str = Query(...),  # Get token from query parameter
+    resume_token: Optional[str] = Query(None),
+    last_seq: Optional[int] = Query(None),
 ):
-    """WebSocket endpoint for real-time chat"""
-    db = None
+    """WebSocket endpoint for real-time chat.
+
+    The socket never holds a database session of its own: authentication and
+    every inbound frame each borrow a pooled connection only while they run.
+    Pass the `resume_token` from the last "session" event and the last seen
+    `seq` to have events missed while disconnected replayed.
+    """
     try:
         logger.info(f"=== WebSocket connection attempt ===")
         logger.info(f"User ID: {user_id}")
         logger.info(f"Token received: {token[:50]}...")
         
-        # Get database session
-        db = next(get_db())
-        logger.info("Database session created")
-        
         # Validate token and user
-        user = await get_user_from_token(token, db)
+        user = await get_user_from_token(token)
         logger.info(f"Token validation successful for user: {user.id}")
         
         # Verify that the user_id matches the token
@@ -79,29 +90,43 @@ async def websocket_endpoint(
             return
         
         # Accept the connection
-        await manager.connect(websocket, user_id)
+        connection = await manager.connect(websocket, user_id, resume_token, last_seq)
+        if connection is None:
+            return
         logger.info(f"WebSocket connected successfully for user {user_id}")
         
         try:
             while True:
                 # Receive message from client
                 data = await websocket.receive_text()
+                connection.touch()
+                
+                # Flood control: drop frames over the rate, and cut off clients that keep at it
+                if not connection.allow_inbound():
+                    if connection.flooding:
+                        logger.warning(f"Closing flooding websocket for user {user_id}")
+                        await connection.close(status.WS_1008_POLICY_VIOLATION)
+                        break
+                    continue
                 
                 try:
                     message_data = json.loads(data)
                     message_type = message_data.get("type")
                     
                     if message_type == "message":
-                        await handle_message(message_data.get("data"), user_id)
+                        await handle_message(message_data.get("data"), user_id, connection)
                     elif message_type == "typing":
                         await handle_typing(message_data.get("data"), user_id)
                     elif message_type == "read":
-                        await handle_read_receipt(message_data.get("data"), user_id)
+                        await handle_read_receipt(message_data.get("data"), user_id, connection)
                     elif message_type == "ping":
                         # Heartbeat response
-                        await manager.send_personal_message(
-                            {"type": "pong", "data": {}}, user_id
-                        )
+                        connection.enqueue(PONG)
+                    elif message_type == "notification_ack":
+                        await handle_notification_ack(message_data.get("data"), user_id)
+                    elif message_type == "pong":
+                        # Reply to a server heartbeat; touch() above already recorded it
+                        pass
                     
                 except json.JSONDecodeError:
                     logger.error(f"Invalid JSON received from user {user_id}: {data}")
@@ -109,11 +134,11 @@ async def websocket_endpoint(
                     logger.error(f"Error handling WebSocket message from user {user_id}: {e}")
                     
         except WebSocketDisconnect:
-            manager.disconnect(user_id)
+            await manager.disconnect(user_id, websocket)
             logger.info(f"User {user_id} disconnected")
         except Exception as e:
             logger.error(f"Unexpected error in WebSocket connection for user {user_id}: {e}")
-            manager.disconnect(user_id)
+            await manager.disconnect(user_id, websocket)
             
     except HTTPException as e:
         # Authentication failed
@@ -122,36 +147,40 @@ async def websocket_endpoint(
     except Exception as e:
         logger.error(f"❌ Unexpected error during WebSocket authentication: {e}")
         await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
-    finally:
-        if db:
-            db.close()
-            logger.info("Database session closed")
 
-async def handle_message(data: dict, sender_id: int):
-    """Handle incoming chat message"""
+async def handle_message(data: dict, sender_id: int, origin: Optional[ClientConnection] = None):
+    """Handle incoming chat message.
+
+    The message goes to every device of the recipient and to the sender's
+    other devices, so all of them show the conversation in sync.
+    """
     try:
-        db = next(get_db())
         message_data = WebSocketMessageSend(**data)
         
         logger.info(f"Attempting to save message: chat_id={message_data.chat_id}, sender_id={sender_id}, content='{message_data.content}'")
         
-        message = ChatService.send_message(
-            db=db,
-            chat_id=message_data.chat_id,
-            sender_id=sender_id,
-            content=message_data.content,
-            message_type=message_data.message_type
-        )
-        
-        if message:
-            # Get chat to find recipient
-            logger.info(f"Message saved successfully: id={message.id}")
-            chat = ChatService.get_chat_by_id(db, message_data.chat_id, sender_id)
-            if chat:
-                recipient_id = chat.get_other_user_id(sender_id)
+        ws_message = None
+        recipient_id = None
+        
+        # Hold the connection only for the write, not for the send to the recipient.
+        # Membership and sender data come from in-process caches, so a warm
+        # send is just the INSERT and the chat updated_at bump.
+        async with AsyncSessionLocal() as db:
+            message = await ChatService.send_message(
+                db=db,
+                chat_id=message_data.chat_id,
+                sender_id=sender_id,
+                content=message_data.content,
+                message_type=message_data.message_type
+            )
+            
+            if message:
+                logger.info(f"Message saved successfully: id={message.id}")
+                user1_id, user2_id = await ChatService.get_participants(db, message_data.chat_id)
+                recipient_id = user2_id if user1_id == sender_id else user1_id
                 
                 # Get sender info
-                sender = db.query(User).filter(User.id == sender_id).first()
+                sender = await get_user_snapshot(db, sender_id)
                 
                 # Prepare message for WebSocket
                 ws_message = {
@@ -163,19 +192,19 @@ async def handle_message(data: dict, sender_id: int):
                         "content": message.content,
                         "message_type": message.message_type,
                         "sent_at": message.sent_at.isoformat(),
-                        "is_read": message.is_read,
+                        "is_read": False,
                         "sender_name": sender.display_name if sender else "Unknown",
                         "sender_profile_picture": sender.profile_picture_url if sender else None
                     }
                 }
-                
-                # Send to recipient
-                await manager.send_personal_message(ws_message, recipient_id)
-        else:
-            logger.error(f"Failed to save message for chat_id={message_data.chat_id}, sender_id={sender_id}")
-            
-             
-        db.close()
+            else:
+                logger.error(f"Failed to save message for chat_id={message_data.chat_id}, sender_id={sender_id}")
+        
+        # Send to recipient and the sender's other devices, serialized once
+        if ws_message:
+            payload = json.dumps(ws_message)
+            await manager.send_payload(payload, recipient_id)
+            await manager.send_payload(payload, sender_id, exclude=origin)
         
     except Exception as e:
         logger.error(f"Error handling message: {e}")
@@ -183,14 +212,15 @@ async def handle_message(data: dict, sender_id: int):
 async def handle_typing(data: dict, sender_id: int):
     """Handle typing indicator"""
     try:
-        db = next(get_db())
-        
         typing_data = WebSocketTyping(**data)
         
-        # Get chat to find recipient
-        chat = ChatService.get_chat_by_id(db, typing_data.chat_id, sender_id)
-        if chat:
-            recipient_id = chat.get_other_user_id(sender_id)
+        # Get chat participants to find recipient (normally a cache hit)
+        async with AsyncSessionLocal() as db:
+            participants = await ChatService.get_participants(db, typing_data.chat_id)
+        
+        if participants and sender_id in participants:
+            user1_id, user2_id = participants
+            recipient_id = user2_id if user1_id == sender_id else user1_id
             
             # Send typing indicator to recipient
             ws_message = {
@@ -204,38 +234,54 @@ async def handle_typing(data: dict, sender_id: int):
             
             await manager.send_personal_message(ws_message, recipient_id)
         
-        db.close()
-        
     except Exception as e:
         logger.error(f"Error handling typing indicator: {e}")
 
-async def handle_read_receipt(data: dict, user_id: int):
-    """Handle message read receipt"""
+async def handle_read_receipt(data: dict, user_id: int, origin: Optional[ClientConnection] = None):
+    """Handle message read receipt.
+
+    The receipt also reaches the reader's other devices so they clear their
+    unread state.
+    """
     try:
-        db = next(get_db())
-        
         chat_id = data.get("chat_id")
         if chat_id:
-            # Mark messages as read
-            ChatService.mark_messages_as_read(db, chat_id, user_id)
+            async with AsyncSessionLocal() as db:
+                # Advance the read watermark (optionally only up to a given message)
+                last_read_message_id = await ChatService.mark_messages_as_read(
+                    db, chat_id, user_id, up_to_message_id=data.get("message_id")
+                )
+                
+                # Get chat to find other user
+                chat = await ChatService.get_chat_by_id(db, chat_id, user_id)
             
-            # Get chat to find other user
-            chat = ChatService.get_chat_by_id(db, chat_id, user_id)
             if chat:
                 other_user_id = chat.get_other_user_id(user_id)
                 
-                # Send read receipt to other user
+                # Send read receipt to other user and the reader's other devices
                 ws_message = {
                     "type": "read_receipt",
                     "data": {
                         "chat_id": chat_id,
-                        "reader_id": user_id
+                        "reader_id": user_id,
+                        "last_read_message_id": last_read_message_id
                     }
                 }
                 
-                await manager.send_personal_message(ws_message, other_user_id)
+                payload = json.dumps(ws_message)
+                await manager.send_payload(payload, other_user_id)
+                await manager.send_payload(payload, user_id, exclude=origin)
         
-        db.close()
+    except Exception as e:
+        logger.error(f"Error handling read receipt: {e}")
+
+async def handle_notification_ack(data: dict, user_id: int):
+    """Client received "notification" events; cancel their fallback pushes"""
+    try:
+        notification_ids = [int(i) for i in (data or {}).get("notification_ids", [])]
+        if notification_ids:
+            async with AsyncSessionLocal() as db:
+                await NotificationService.acknowledge_realtime(db, user_id, notification_ids)
         
     except Exception as e:
-        logger.error(f"Error handling read receipt: {e}")
\ No newline at end of file
+        logger.error(f"Error handling notification ack: {e}")
@@ -0,0 +1,43 @@
+# backend/app/schemas/campaign.py
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+
+class CampaignSegment(BaseModel):
+    """Users to target; unset fields don't filter"""
+    marketing_email: Optional[bool] = None
+    event_push_notifications: Optional[bool] = None
+    country: Optional[List[str]] = None
+    industry: Optional[List[str]] = None
+    is_subscription_active: Optional[bool] = None
+
+
+class CampaignCreate(BaseModel):
+    title: str
+    message: str
+    segment: CampaignSegment = CampaignSegment()
+    send_push: bool = True
+    # Email only goes to recipients who opted in to marketing email
+    send_email: bool = False
+
+
+class CampaignResponse(BaseModel):
+    id: int
+    title: str
+    message: str
+    segment: dict
+    send_push: bool
+    send_email: bool
+    status: str
+    last_user_id: int
+    recipients: int
+    pushes_queued: int
+    emails_sent: int
+    emails_failed: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    # Segment members not yet processed (only filled in for a single campaign)
+    remaining: Optional[int] = None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional, List
 
@@ -57,6 +57,24 @@ class ChatResponse(BaseModel):
 class ChatDetailResponse(ChatResponse):
     messages: List[MessageResponse] = []
 
+# Delta sync
+class ChatSyncChat(BaseModel):
+    id: int
+    created_at: datetime
+    updated_at: datetime
+    is_active: bool
+    dinner_id: Optional[int] = None
+    other_user: ChatParticipant
+    my_last_read_message_id: int = 0
+    other_last_read_message_id: int = 0
+
+class ChatSyncResponse(BaseModel):
+    cursor: str
+    chats: List[ChatSyncChat] = []
+    deleted_chat_ids: List[int] = []
+    messages: List[MessageResponse] = []
+    has_more: bool = False
+
 # WebSocket Message Schemas
 class WebSocketMessage(BaseModel):
     type: str  # "message", "typing", "read", "user_status"
@@ -65,7 +83,7 @@ class WebSocketMessage(BaseModel):
 class WebSocketMessageSend(BaseModel):
     chat_id: int
     content: str
-    message_type: str = "text"
+    message_type: str = Field("text", max_length=20)  # messages.message_type is String(20)
 
 class WebSocketTyping(BaseModel):
     chat_id: int
@@ -12,6 +12,7 @@ class NotificationTypeEnum(str, Enum):
     LAST_MINUTE_SPOT = "LAST_MINUTE_SPOT"    # uppercase to match DB
     CONNECTION_REQUEST = "connection_request"  # lowercase to match DB
     CONNECTION_ACCEPTED = "connection_accepted"
+    ANNOUNCEMENT = "ANNOUNCEMENT"
 
 class NotificationCreate(BaseModel):
     user_id: int
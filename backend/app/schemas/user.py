@@ -176,4 +176,17 @@ class PasswordReset(BaseModel):
 
 class AccountDeletionRequest(BaseModel):
     password: str
-    confirmation_text: str  # User must type "delete my account"
\ No newline at end of file
+    confirmation_text: str  # User must type "delete my account"
+
+class UserSnapshot(BaseModel):
+    """Lightweight view of the authenticated user, cached between requests"""
+    id: int
+    email: str
+    display_name: str
+    profile_picture_url: Optional[str] = None
+    is_active: Optional[bool] = True
+    is_admin: bool = False
+
+    class Config:
+        from_attributes = True
+        frozen = True
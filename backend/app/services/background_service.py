@@ -1,29 +1,152 @@
 # backend/app/services/background_service.py
 import asyncio
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from app.database import get_db
+from app.core.config import settings
+from app.database import AsyncSessionLocal
 from app.services.notification_service import NotificationService
+from app.services.counter_service import UnreadCounterService
+from app.services.push_topic_service import PushTopicService
+from app.services.campaign_service import CampaignService
 import logging
 
 logger = logging.getLogger(__name__)
 
 class BackgroundTaskService:
-    
+
+    @staticmethod
+    async def run_due_reminders() -> int:
+        """Drain all currently due reminders in bounded batches"""
+        total = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                processed = await NotificationService.process_scheduled_notifications(
+                    db, batch_size=settings.REMINDER_BATCH_SIZE
+                )
+            total += processed
+            if processed < settings.REMINDER_BATCH_SIZE:
+                return total
+
+    @staticmethod
+    async def seconds_until_next_reminder() -> float:
+        """Sleep until the next scheduled_time, capped so new rows are noticed quickly.
+
+        Called after a pass has drained everything it could claim, so any row
+        that is already due is held by another scheduler (SKIP LOCKED); the
+        floor keeps this one from polling it in a tight loop meanwhile.
+        """
+        async with AsyncSessionLocal() as db:
+            next_time = await NotificationService.get_next_scheduled_time(db)
+
+        if next_time is None:
+            return settings.REMINDER_MAX_SLEEP_SECONDS
+
+        delay = (next_time - datetime.utcnow()).total_seconds()
+        return max(settings.REMINDER_MIN_SLEEP_SECONDS, min(delay, settings.REMINDER_MAX_SLEEP_SECONDS))
+
     @staticmethod
     async def start_notification_scheduler():
-        """Start the notification scheduler background task"""
+        """Start the notification scheduler background task.
+
+        Safe to run in every worker and replica: reminders are claimed with
+        SKIP LOCKED, so each one is sent by exactly one scheduler.
+        """
         while True:
             try:
-                # Process notifications every 5 minutes
-                with next(get_db()) as db:
-                    processed = NotificationService.process_scheduled_notifications(db)
-                    if processed > 0:
-                        logger.info(f"Processed {processed} scheduled notifications")
-                
-                # Wait 5 minutes before next check
-                await asyncio.sleep(300)  # 5 minutes
-                
+                processed = await BackgroundTaskService.run_due_reminders()
+                if processed > 0:
+                    logger.info(f"Processed {processed} scheduled notifications")
+
+                await asyncio.sleep(await BackgroundTaskService.seconds_until_next_reminder())
+
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"Error in notification scheduler: {e}")
-                await asyncio.sleep(60)  # Wait 1 minute on error
\ No newline at end of file
+                await asyncio.sleep(60)  # Wait 1 minute on error
+
+    @staticmethod
+    async def repair_unread_counters() -> int:
+        """Recompute every user's unread counters, one batch per transaction"""
+        after_user_id, batches = 0, 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                last_user_id = await UnreadCounterService.repair_batch(
+                    db, after_user_id, settings.COUNTER_REPAIR_BATCH_SIZE
+                )
+            if last_user_id is None:
+                return batches
+            after_user_id = last_user_id
+            batches += 1
+
+    @staticmethod
+    async def start_counter_repair():
+        """Periodically correct unread counter drift (e.g. from cascaded deletes).
+
+        Running it in several workers at once is harmless, just redundant.
+        """
+        while True:
+            try:
+                await asyncio.sleep(settings.COUNTER_REPAIR_INTERVAL_HOURS * 3600)
+                batches = await BackgroundTaskService.repair_unread_counters()
+                logger.info(f"Repaired unread counters in {batches} batches")
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in unread counter repair: {e}")
+
+    @staticmethod
+    async def reconcile_dinner_topics() -> int:
+        """Reconcile every dinner topic that may be out of line; returns how many were checked"""
+        after_dinner_id, checked = 0, 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                dinner_ids = await PushTopicService.next_dinners(db, after_dinner_id, limit=100)
+            # Each sync reads and writes in its own short sessions, holding none across FCM calls
+            for dinner_id in dinner_ids:
+                try:
+                    await PushTopicService.sync_dinner(dinner_id)
+                except Exception as e:
+                    logger.error(f"Error reconciling topic of dinner {dinner_id}: {e}")
+            if not dinner_ids:
+                return checked
+            after_dinner_id = dinner_ids[-1]
+            checked += len(dinner_ids)
+
+    @staticmethod
+    async def start_topic_reconciliation():
+        """Periodically fix dinner topic membership: tokens that changed since
+        booking, failed (un)subscribes, and dinners that have finished"""
+        while True:
+            try:
+                await asyncio.sleep(settings.PUSH_TOPIC_RECONCILE_INTERVAL_MINUTES * 60)
+                checked = await BackgroundTaskService.reconcile_dinner_topics()
+                logger.info(f"Reconciled {checked} dinner topics")
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in dinner topic reconciliation: {e}")
+
+    @staticmethod
+    async def start_campaign_runner():
+        """Send announcement campaigns one at a time.
+
+        Safe in every worker: campaigns are leased, and one whose runner died
+        is picked up from its checkpoint once the lease lapses.
+        """
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    campaign_id = await CampaignService.claim_next(db)
+                if campaign_id is None:
+                    await CampaignService.wait_for_work()
+                    continue
+                logger.info(f"Running campaign {campaign_id}")
+                await CampaignService.run(campaign_id)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in campaign runner: {e}")
+                await asyncio.sleep(settings.CAMPAIGN_POLL_SECONDS)
@@ -0,0 +1,144 @@
+# backend/app/services/booking_service.py
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete
+from sqlalchemy.exc import IntegrityError
+from typing import Optional
+from datetime import datetime
+from app.models.booking import Booking, BookingStatus
+from app.models.dinner import Dinner
+from app.core.exceptions import NotFoundError, ValidationError
+
+ACTIVE_BOOKING_STATUSES = [BookingStatus.CONFIRMED, BookingStatus.PENDING]
+
+
+class BookingService:
+
+    @staticmethod
+    async def reserve_seat(
+        db: AsyncSession,
+        dinner_id: int,
+        user_id: int,
+        notes: Optional[str] = None
+    ) -> Booking:
+        """
+        Atomically reserve a seat at a dinner.
+        The seat is taken with a conditional UPDATE on dinners.confirmed_count,
+        which row-locks the dinner, so concurrent bookings for the same dinner
+        are serialized and can never overbook. The partial unique index on
+        active (user_id, dinner_id) backs up the duplicate-booking check.
+        """
+        # Check if user already has a booking for this dinner
+        result = await db.execute(
+            select(Booking.id).where(
+                Booking.user_id == user_id,
+                Booking.dinner_id == dinner_id,
+                Booking.status.in_(ACTIVE_BOOKING_STATUSES)
+            )
+        )
+        if result.first():
+            await db.rollback()
+            raise ValidationError("You already have a booking for this dinner")
+
+        result = await db.execute(
+            update(Dinner).where(
+                Dinner.id == dinner_id,
+                Dinner.is_active == True,
+                Dinner.date > datetime.utcnow(),
+                Dinner.confirmed_count < Dinner.max_attendees
+            ).values(
+                confirmed_count=Dinner.confirmed_count + 1
+            ).returning(Dinner.id).execution_options(synchronize_session=False)
+        )
+        if result.first() is None:
+            await db.rollback()
+            await BookingService._raise_unbookable(db, dinner_id)
+
+        booking = Booking(
+            user_id=user_id,
+            dinner_id=dinner_id,
+            notes=notes,
+            status=BookingStatus.CONFIRMED
+        )
+        db.add(booking)
+
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Rolls back the seat increment as well
+            await db.rollback()
+            raise ValidationError("You already have a booking for this dinner")
+
+        await db.refresh(booking)
+        return booking
+
+    @staticmethod
+    async def _raise_unbookable(db: AsyncSession, dinner_id: int):
+        """Explain why the conditional seat update matched no dinner"""
+        dinner = await db.get(Dinner, dinner_id, populate_existing=True)
+        if not dinner:
+            raise NotFoundError("Dinner not found")
+
+        # Check if dinner is active and not in the past
+        if not dinner.is_active:
+            raise ValidationError("This dinner is no longer available")
+
+        if dinner.date <= datetime.utcnow():
+            raise ValidationError("Cannot book past dinners")
+
+        raise ValidationError("This dinner is fully booked")
+
+    @staticmethod
+    async def _release_seat(db: AsyncSession, dinner_id: int):
+        """Give back one seat on the dinner (same transaction as the booking change)"""
+        await db.execute(
+            update(Dinner).where(
+                Dinner.id == dinner_id,
+                Dinner.confirmed_count > 0
+            ).values(
+                confirmed_count=Dinner.confirmed_count - 1
+            ).execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    async def cancel_booking(db: AsyncSession, booking: Booking) -> bool:
+        """
+        Cancel an active booking and release its seat.
+        Returns False if the booking was no longer active (e.g. a concurrent cancel won).
+        """
+        result = await db.execute(
+            update(Booking).where(
+                Booking.id == booking.id,
+                Booking.status.in_(ACTIVE_BOOKING_STATUSES)
+            ).values(
+                status=BookingStatus.CANCELLED,
+                updated_at=datetime.utcnow()
+            ).returning(Booking.dinner_id).execution_options(synchronize_session=False)
+        )
+        if result.first() is None:
+            await db.rollback()
+            return False
+
+        await BookingService._release_seat(db, booking.dinner_id)
+        await db.commit()
+
+        booking.status = BookingStatus.CANCELLED
+        return True
+
+    @staticmethod
+    async def remove_booking(db: AsyncSession, booking: Booking):
+        """
+        Delete a booking, releasing its seat if it was still active.
+        The status is taken from the deleted row rather than the loaded object,
+        so a concurrent cancel or delete can't release the same seat twice.
+        """
+        result = await db.execute(
+            delete(Booking).where(
+                Booking.id == booking.id
+            ).returning(Booking.status).execution_options(synchronize_session=False)
+        )
+        deleted_status = result.scalar_one_or_none()
+        if deleted_status in ACTIVE_BOOKING_STATUSES:
+            await BookingService._release_seat(db, booking.dinner_id)
+
+        await db.commit()
+        db.expunge(booking)
@@ -0,0 +1,282 @@
+# backend/app/services/campaign_service.py
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import select, update, func, or_, and_, not_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.campaign import Campaign, CampaignStatus
+from app.models.notification import NotificationType
+from app.models.user import User
+from app.schemas.campaign import CampaignCreate
+from app.services.email_service import EmailService
+from app.services.notification_service import NotificationService
+import logging
+
+logger = logging.getLogger(__name__)
+
+_wake_event = asyncio.Event()
+
+
+class CampaignService:
+
+    @staticmethod
+    def segment_filters(segment: dict) -> list:
+        """WHERE clauses selecting a campaign's recipients"""
+        filters = [User.is_active == True]
+        for column in ("marketing_email", "event_push_notifications"):
+            if segment.get(column) is not None:
+                filters.append(getattr(User, column) == segment[column])
+        if segment.get("country"):
+            filters.append(User.country.in_(segment["country"]))
+        if segment.get("industry"):
+            filters.append(User.industry.in_(segment["industry"]))
+        if segment.get("is_subscription_active") is not None:
+            # Same rule as User.is_subscription_active
+            active = and_(
+                User.is_subscribed == True,
+                or_(User.subscription_end.is_(None), User.subscription_end > func.now())
+            )
+            filters.append(active if segment["is_subscription_active"] else not_(active))
+        return filters
+
+    @staticmethod
+    async def create(db: AsyncSession, campaign_data: CampaignCreate, created_by: int) -> Campaign:
+        """Store a campaign; a runner picks it up straight away"""
+        campaign = Campaign(
+            title=campaign_data.title,
+            message=campaign_data.message,
+            segment=campaign_data.segment.model_dump(exclude_none=True),
+            send_push=campaign_data.send_push,
+            send_email=campaign_data.send_email,
+            created_by=created_by
+        )
+        db.add(campaign)
+        await db.commit()
+        await db.refresh(campaign)
+        CampaignService.wake()
+        return campaign
+
+    @staticmethod
+    async def count_remaining(db: AsyncSession, campaign: Campaign) -> int:
+        """Segment members after the checkpoint"""
+        result = await db.execute(
+            select(func.count(User.id)).where(
+                *CampaignService.segment_filters(campaign.segment),
+                User.id > campaign.last_user_id
+            )
+        )
+        return result.scalar_one()
+
+    @staticmethod
+    async def set_status(db: AsyncSession, campaign_id: int, status: CampaignStatus, allowed: List[CampaignStatus]) -> bool:
+        """Move a campaign to `status` if it is currently in one of `allowed`"""
+        values = {"status": status}
+        if status == CampaignStatus.PENDING:
+            # Resuming: let a runner claim it without waiting for the lease
+            values.update(heartbeat_at=None, last_error=None)
+        result = await db.execute(
+            update(Campaign)
+            .where(Campaign.id == campaign_id, Campaign.status.in_(allowed))
+            .values(**values)
+        )
+        await db.commit()
+        if result.rowcount and status == CampaignStatus.PENDING:
+            CampaignService.wake()
+        return bool(result.rowcount)
+
+    @staticmethod
+    async def claim_next(db: AsyncSession) -> Optional[int]:
+        """Lease a pending campaign, or a running one whose runner stopped heartbeating"""
+        now = datetime.utcnow()
+        lease_expired = now - timedelta(seconds=settings.CAMPAIGN_LEASE_SECONDS)
+        candidate = (
+            select(Campaign.id)
+            .where(or_(
+                Campaign.status == CampaignStatus.PENDING,
+                and_(Campaign.status == CampaignStatus.RUNNING, Campaign.heartbeat_at < lease_expired)
+            ))
+            .order_by(Campaign.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            update(Campaign)
+            .where(Campaign.id == candidate)
+            .values(
+                status=CampaignStatus.RUNNING,
+                heartbeat_at=now,
+                started_at=func.coalesce(Campaign.started_at, now)
+            )
+            .returning(Campaign.id)
+        )
+        campaign_id = result.scalar_one_or_none()
+        await db.commit()
+        return campaign_id
+
+    @staticmethod
+    async def run(campaign_id: int):
+        """Send a claimed campaign from its checkpoint to the end of the segment.
+
+        Recipients are read a chunk at a time by keyset (User.id after the
+        checkpoint), each page in its own short session, so only one chunk
+        is in memory and no connection or transaction stays open across the
+        throttling sleeps or email sends. Each chunk's notifications, outbox
+        rows and the advanced checkpoint commit in their own transaction; emails
+        follow the commit, so a crash may skip some of a chunk's emails but
+        never sends one twice. Stops when the campaign is cancelled or
+        another runner has taken it over.
+        """
+        async with AsyncSessionLocal() as db:
+            campaign = await db.get(Campaign, campaign_id)
+        if campaign is None:
+            return
+
+        try:
+            while True:
+                started = time.monotonic()
+                chunk = await CampaignService._next_chunk(campaign)
+                if not chunk:
+                    break
+                if not await CampaignService._send_chunk(campaign, chunk):
+                    logger.info(f"Campaign {campaign_id} stopped at user {campaign.last_user_id}")
+                    return
+                # Throttle dispatch to CAMPAIGN_PUSH_RATE recipients per second
+                delay = len(chunk) / settings.CAMPAIGN_PUSH_RATE - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(Campaign)
+                    .where(Campaign.id == campaign_id, Campaign.status == CampaignStatus.RUNNING)
+                    .values(status=CampaignStatus.COMPLETED, completed_at=datetime.utcnow())
+                )
+                await db.commit()
+            logger.info(f"Campaign {campaign_id} completed: {campaign.recipients} recipients")
+
+        except asyncio.CancelledError:
+            # Shutdown: the lease lapses and another worker resumes from the checkpoint
+            raise
+        except Exception as e:
+            logger.error(f"Campaign {campaign_id} failed: {e}")
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(Campaign)
+                    .where(Campaign.id == campaign_id, Campaign.status == CampaignStatus.RUNNING)
+                    .values(status=CampaignStatus.FAILED, last_error=str(e))
+                )
+                await db.commit()
+
+    @staticmethod
+    async def _next_chunk(campaign: Campaign):
+        """The next CAMPAIGN_CHUNK_SIZE segment members after the checkpoint"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(
+                    User.id,
+                    User.email,
+                    User.display_name,
+                    User.fcm_token.isnot(None).label("has_token"),
+                    User.marketing_email
+                )
+                .where(
+                    *CampaignService.segment_filters(campaign.segment),
+                    User.id > campaign.last_user_id
+                )
+                .order_by(User.id)
+                .limit(settings.CAMPAIGN_CHUNK_SIZE)
+            )
+            return result.all()
+
+    @staticmethod
+    async def _send_chunk(campaign: Campaign, chunk) -> bool:
+        """Write one chunk and advance the checkpoint; False if this runner should stop"""
+        last_user_id = chunk[-1].id
+        pushes = sum(1 for row in chunk if row.has_token) if campaign.send_push else 0
+
+        async with AsyncSessionLocal() as db:
+            # Only advances from our own last checkpoint, so a runner that lost
+            # its lease (or a cancelled campaign) writes nothing
+            result = await db.execute(
+                update(Campaign)
+                .where(
+                    Campaign.id == campaign.id,
+                    Campaign.status == CampaignStatus.RUNNING,
+                    Campaign.last_user_id == campaign.last_user_id
+                )
+                .values(
+                    last_user_id=last_user_id,
+                    recipients=Campaign.recipients + len(chunk),
+                    pushes_queued=Campaign.pushes_queued + pushes,
+                    heartbeat_at=datetime.utcnow()
+                )
+            )
+            if not result.rowcount:
+                await db.rollback()
+                return False
+
+            # Commits the checkpoint along with the notifications
+            await NotificationService.create_notifications_bulk(
+                db,
+                [(row.id, None, campaign.send_push and row.has_token, False) for row in chunk],
+                notification_type=NotificationType.ANNOUNCEMENT,
+                title=campaign.title,
+                message=campaign.message
+            )
+
+        campaign.last_user_id = last_user_id
+        campaign.recipients += len(chunk)
+
+        if campaign.send_email:
+            await CampaignService._send_emails(campaign, [row for row in chunk if row.marketing_email])
+        return True
+
+    @staticmethod
+    async def _send_emails(campaign: Campaign, rows):
+        """Send a chunk's emails at CAMPAIGN_EMAIL_RATE per second"""
+        interval = 1 / settings.CAMPAIGN_EMAIL_RATE
+        sent, failed = 0, 0
+        for row in rows:
+            started = time.monotonic()
+            try:
+                await asyncio.to_thread(
+                    EmailService.send_announcement_email,
+                    row.email, row.display_name, campaign.title, campaign.message
+                )
+                sent += 1
+            except Exception as e:
+                logger.error(f"Campaign {campaign.id} email to user {row.id} failed: {e}")
+                failed += 1
+            delay = interval - (time.monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        if sent or failed:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(Campaign)
+                    .where(Campaign.id == campaign.id)
+                    .values(
+                        emails_sent=Campaign.emails_sent + sent,
+                        emails_failed=Campaign.emails_failed + failed,
+                        heartbeat_at=datetime.utcnow()
+                    )
+                )
+                await db.commit()
+
+    @staticmethod
+    def wake():
+        """Nudge idle runners after a campaign is created or resumed"""
+        _wake_event.set()
+
+    @staticmethod
+    async def wait_for_work():
+        try:
+            await asyncio.wait_for(_wake_event.wait(), timeout=settings.CAMPAIGN_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wake_event.clear()
@@ -1,33 +1,41 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, desc
-from app.models.chat import Chat, Message
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, func, or_, and_, desc, case, true
+from app.models.chat import Chat, Message, chat_change_seq
 from app.models.user import User
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
+from app.core.chat_cache import chat_cache
+from app.core.config import settings
+from app.services.message_writer import message_writer
+from app.services.counter_service import UnreadCounterService
 import logging
 
 logger = logging.getLogger(__name__)
 
 class ChatService:
-    
+
     @staticmethod
-    def get_or_create_chat(db: Session, user1_id: int, user2_id: int, dinner_id: Optional[int] = None) -> Chat:
+    async def get_or_create_chat(db: AsyncSession, user1_id: int, user2_id: int, dinner_id: Optional[int] = None) -> Chat:
         """Get existing chat between two users or create a new one"""
         # Ensure consistent ordering (smaller ID first)
         if user1_id > user2_id:
             user1_id, user2_id = user2_id, user1_id
-        
+
         # Check if chat already exists
-        existing_chat = db.query(Chat).filter(
-            and_(
-                Chat.user1_id == user1_id,
-                Chat.user2_id == user2_id,
-                Chat.is_active == True
+        result = await db.execute(
+            select(Chat).where(
+                and_(
+                    Chat.user1_id == user1_id,
+                    Chat.user2_id == user2_id,
+                    Chat.is_active == True
+                )
             )
-        ).first()
-        
+        )
+        existing_chat = result.scalars().first()
+
         if existing_chat:
             return existing_chat
-        
+
         # Create new chat
         new_chat = Chat(
             user1_id=user1_id,
@@ -36,52 +44,169 @@ class ChatService:
             is_active=True
         )
         db.add(new_chat)
-        db.commit()
-        db.refresh(new_chat)
-        
+        await db.commit()
+        await db.refresh(new_chat)
+
         logger.info(f"Created new chat between users {user1_id} and {user2_id}")
         return new_chat
-    
+
     @staticmethod
-    def get_user_chats(db: Session, user_id: int) -> List[Chat]:
+    async def get_user_chats(db: AsyncSession, user_id: int) -> List[Chat]:
         """Get all active chats for a user"""
-        chats = db.query(Chat).filter(
-            and_(
+        result = await db.execute(
+            select(Chat).where(
+                and_(
+                    or_(Chat.user1_id == user_id, Chat.user2_id == user_id),
+                    Chat.is_active == True
+                )
+            ).order_by(desc(Chat.updated_at))
+        )
+
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_inbox(db: AsyncSession, user_id: int):
+        """Active chats for a user with the other participant, last message and
+        unread count, in a single query.
+
+        The last message and unread count come from LATERAL subqueries, so each
+        chat costs an index probe on messages rather than separate round trips.
+        Rows expose `Chat` plus other_user_*, last_message_* and unread_count columns.
+        """
+        other_user_id = case(
+            (Chat.user1_id == user_id, Chat.user2_id),
+            else_=Chat.user1_id
+        )
+        my_last_read = ChatService._last_read_column(user_id)
+
+        last_message = (
+            select(
+                Message.id,
+                Message.sender_id,
+                Message.content,
+                Message.message_type,
+                Message.sent_at
+            )
+            .where(Message.chat_id == Chat.id)
+            .order_by(desc(Message.sent_at), desc(Message.id))
+            .limit(1)
+            .lateral("last_message")
+        )
+
+        unread = (
+            select(func.count(Message.id).label("unread_count"))
+            .where(
+                Message.chat_id == Chat.id,
+                Message.sender_id != user_id,
+                Message.id > my_last_read
+            )
+            .lateral("unread")
+        )
+
+        # Read once the recipient's watermark has passed it
+        last_message_is_read = last_message.c.id <= case(
+            (last_message.c.sender_id == Chat.user1_id, Chat.user2_last_read_message_id),
+            else_=Chat.user1_last_read_message_id
+        )
+
+        result = await db.execute(
+            select(
+                Chat,
+                other_user_id.label("other_user_id"),
+                User.display_name.label("other_user_name"),
+                User.profile_picture_url.label("other_user_picture"),
+                last_message.c.id.label("last_message_id"),
+                last_message.c.sender_id.label("last_message_sender_id"),
+                last_message.c.content.label("last_message_content"),
+                last_message.c.message_type.label("last_message_type"),
+                last_message.c.sent_at.label("last_message_sent_at"),
+                last_message_is_read.label("last_message_is_read"),
+                unread.c.unread_count
+            )
+            .outerjoin(User, User.id == other_user_id)
+            .outerjoin(last_message, true())
+            .join(unread, true())
+            .where(
                 or_(Chat.user1_id == user_id, Chat.user2_id == user_id),
                 Chat.is_active == True
             )
-        ).order_by(desc(Chat.updated_at)).all()
-        
-        return chats
-    
+            .order_by(desc(Chat.updated_at))
+        )
+
+        return result.all()
+
+    @staticmethod
+    def _last_read_column(user_id: int):
+        """SQL expression for `user_id`'s read watermark on a Chat row"""
+        return case(
+            (Chat.user1_id == user_id, Chat.user1_last_read_message_id),
+            else_=Chat.user2_last_read_message_id
+        )
+
     @staticmethod
-    def get_chat_by_id(db: Session, chat_id: int, user_id: int) -> Optional[Chat]:
+    async def get_chat_by_id(db: AsyncSession, chat_id: int, user_id: int) -> Optional[Chat]:
         """Get a specific chat if user is participant"""
-        chat = db.query(Chat).filter(
-            and_(
-                Chat.id == chat_id,
-                or_(Chat.user1_id == user_id, Chat.user2_id == user_id),
-                Chat.is_active == True
+        result = await db.execute(
+            select(Chat).where(
+                and_(
+                    Chat.id == chat_id,
+                    or_(Chat.user1_id == user_id, Chat.user2_id == user_id),
+                    Chat.is_active == True
+                )
             )
-        ).first()
-        
-        return chat
-    
+        )
+
+        return result.scalars().first()
+
     @staticmethod
-    def send_message(db: Session, chat_id: int, sender_id: int, content: str, message_type: str = "text") -> Optional[Message]:
-        """Send a message in a chat"""
-        # Verify user is part of this chat
-        chat = db.query(Chat).filter(
-            and_(
+    async def get_participants(db: AsyncSession, chat_id: int) -> Optional[Tuple[int, int]]:
+        """(user1_id, user2_id) of an active chat, served from the membership cache when possible"""
+        participants = chat_cache.get(chat_id)
+        if participants is not None:
+            return participants
+
+        result = await db.execute(
+            select(Chat.user1_id, Chat.user2_id).where(
                 Chat.id == chat_id,
-                or_(Chat.user1_id == sender_id, Chat.user2_id == sender_id),
                 Chat.is_active == True
             )
-        ).first()
-        
-        if not chat:
+        )
+        row = result.first()
+        if row is None:
             return None
-        
+
+        participants = (row.user1_id, row.user2_id)
+        chat_cache.set(chat_id, participants)
+        return participants
+
+    @staticmethod
+    async def send_message(db: AsyncSession, chat_id: int, sender_id: int, content: str, message_type: str = "text") -> Optional[Message]:
+        """Send a message in a chat.
+
+        With a warm membership cache this is one INSERT (server defaults come
+        back via RETURNING), the chat updated_at bump and the recipient's
+        unread counter. With CHAT_GROUP_COMMIT on, the write is handed to the
+        group-commit writer and the returned Message is a detached copy of
+        the stored row.
+        """
+        # Verify user is part of this chat
+        participants = await ChatService.get_participants(db, chat_id)
+
+        if not participants or sender_id not in participants:
+            return None
+
+        if settings.CHAT_GROUP_COMMIT:
+            message_id, sent_at = await message_writer.submit(chat_id, sender_id, content, message_type)
+            return Message(
+                id=message_id,
+                chat_id=chat_id,
+                sender_id=sender_id,
+                content=content,
+                message_type=message_type,
+                sent_at=sent_at,
+                is_read=False
+            )
+
         # Create message
         message = Message(
             chat_id=chat_id,
@@ -89,63 +214,296 @@ class ChatService:
             content=content,
             message_type=message_type
         )
-        
+
         db.add(message)
-        
+
         # Update chat's updated_at timestamp to current time
-        from datetime import datetime
-        chat.updated_at = datetime.utcnow()  # Use current time instead of message.sent_at
-        
-        db.commit()
-        db.refresh(message)
-        
+        await db.execute(
+            update(Chat)
+            .where(Chat.id == chat_id)
+            .values(updated_at=datetime.utcnow())  # Use current time instead of message.sent_at
+            .execution_options(synchronize_session=False)
+        )
+
+        recipient_id = participants[1] if participants[0] == sender_id else participants[0]
+        badges = await UnreadCounterService.adjust(db, messages={recipient_id: 1})
+
+        await db.commit()
+        await UnreadCounterService.publish(badges)
+
         return message
-    
+
     @staticmethod
-    def get_chat_messages(db: Session, chat_id: int, user_id: int, limit: int = 50, offset: int = 0) -> List[Message]:
-        """Get messages from a chat"""
+    async def get_chat_messages(
+        db: AsyncSession,
+        chat_id: int,
+        user_id: int,
+        limit: int = 50,
+        offset: int = 0,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None
+    ) -> List[Message]:
+        """Get messages from a chat.
+
+        before_id / after_id page by message ID (keyset pagination on the
+        (chat_id, id) index), so scrolling far back costs the same as the
+        first page. offset is kept for older clients.
+        """
         # Verify user is part of this chat
-        chat = ChatService.get_chat_by_id(db, chat_id, user_id)
+        chat = await ChatService.get_chat_by_id(db, chat_id, user_id)
         if not chat:
             return []
-        
-        messages = db.query(Message).filter(
-            Message.chat_id == chat_id
-        ).order_by(desc(Message.sent_at)).offset(offset).limit(limit).all()
-        
+
+        query = select(Message).where(Message.chat_id == chat_id)
+
+        if after_id is not None:
+            # Newer messages, oldest first
+            result = await db.execute(
+                query.where(Message.id > after_id).order_by(Message.id).limit(limit)
+            )
+            return list(result.scalars().all())
+
+        if before_id is not None:
+            query = query.where(Message.id < before_id).order_by(desc(Message.id))
+        else:
+            query = query.order_by(desc(Message.sent_at)).offset(offset)
+
+        result = await db.execute(query.limit(limit))
+        messages = result.scalars().all()
+
         return list(reversed(messages))  # Return in chronological order
-    
+
     @staticmethod
-    def mark_messages_as_read(db: Session, chat_id: int, user_id: int):
-        """Mark all unread messages in a chat as read for a user"""
+    async def get_sender_profiles(db: AsyncSession, user_ids: Iterable[int]) -> Dict[int, User]:
+        """Display name and picture for a set of senders, in one query"""
+        ids = set(user_ids)
+        if not ids:
+            return {}
+
+        result = await db.execute(
+            select(User.id, User.display_name, User.profile_picture_url).where(User.id.in_(ids))
+        )
+        return {row.id: row for row in result.all()}
+
+    @staticmethod
+    async def mark_messages_as_read(db: AsyncSession, chat_id: int, user_id: int, up_to_message_id: Optional[int] = None) -> Optional[int]:
+        """Advance the user's read watermark for a chat.
+
+        A single-row update on chats instead of flipping is_read on every
+        unread message. Watermarks only move forward. Returns the user's
+        watermark afterwards, or None if the chat isn't theirs.
+        """
         # Verify user is part of this chat
-        chat = ChatService.get_chat_by_id(db, chat_id, user_id)
+        chat = await ChatService.get_chat_by_id(db, chat_id, user_id)
         if not chat:
-            return
-        
-        # Mark all unread messages from the other user as read
-        db.query(Message).filter(
-            and_(
+            return None
+
+        result = await db.execute(
+            select(func.max(Message.id)).where(Message.chat_id == chat_id)
+        )
+        latest_id = result.scalar_one_or_none() or 0
+        target = min(up_to_message_id, latest_id) if up_to_message_id is not None else latest_id
+
+        column = Chat.user1_last_read_message_id if chat.user1_id == user_id else Chat.user2_last_read_message_id
+        if target <= chat.get_last_read_message_id(user_id):
+            return chat.get_last_read_message_id(user_id)
+
+        # Lock the row and re-read the watermark, so two devices reading at
+        # once can't both take the same messages off the unread counter
+        result = await db.execute(
+            select(column).where(Chat.id == chat_id).with_for_update()
+        )
+        previous = result.scalar_one()
+        if target <= previous:
+            await db.commit()
+            setattr(chat, column.key, previous)
+            return previous
+
+        # Keep updated_at as is so reading a chat doesn't reorder the inbox
+        await db.execute(
+            update(Chat)
+            .where(Chat.id == chat_id)
+            .values({column: target, Chat.updated_at: Chat.updated_at, Chat.change_seq: chat_change_seq.next_value(), Chat.changed_at: func.now()})
+            .execution_options(synchronize_session=False)
+        )
+
+        # Messages the watermark just moved past come off the unread counter
+        result = await db.execute(
+            select(func.count(Message.id)).where(
                 Message.chat_id == chat_id,
                 Message.sender_id != user_id,
-                Message.is_read == False
+                Message.id > previous,
+                Message.id <= target
+            )
+        )
+        newly_read = result.scalar_one()
+        badges = await UnreadCounterService.adjust(db, messages={user_id: -newly_read}) if newly_read else {}
+        await db.commit()
+        await UnreadCounterService.publish(badges)
+
+        setattr(chat, column.key, target)
+        return target
+
+    @staticmethod
+    async def delete_chat(db: AsyncSession, chat_id: int):
+        """Delete a chat's messages and deactivate it.
+
+        The chat row stays behind as a tombstone so /chat/sync can tell both
+        participants' other devices that it is gone.
+        """
+        # Unread messages disappear with the chat
+        result = await db.execute(
+            select(
+                func.count(Message.id).filter(
+                    Message.sender_id == Chat.user2_id, Message.id > Chat.user1_last_read_message_id
+                ).label("user1_unread"),
+                func.count(Message.id).filter(
+                    Message.sender_id == Chat.user1_id, Message.id > Chat.user2_last_read_message_id
+                ).label("user2_unread"),
+                Chat.user1_id,
+                Chat.user2_id
             )
-        ).update({"is_read": True})
-        
-        db.commit()
-    
+            .join(Chat, Chat.id == Message.chat_id)
+            .where(Message.chat_id == chat_id)
+            .group_by(Chat.id)
+        )
+        unread = result.first()
+
+        await db.execute(delete(Message).where(Message.chat_id == chat_id))
+        await db.execute(
+            update(Chat)
+            .where(Chat.id == chat_id)
+            .values(is_active=False, change_seq=chat_change_seq.next_value(), changed_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        badges = {}
+        if unread is not None:
+            badges = await UnreadCounterService.adjust(db, messages={
+                unread.user1_id: -unread.user1_unread,
+                unread.user2_id: -unread.user2_unread
+            })
+        await db.commit()
+        chat_cache.invalidate(chat_id)
+        await UnreadCounterService.publish(badges)
+
     @staticmethod
-    def get_unread_message_count(db: Session, user_id: int) -> int:
-        """Get total unread message count for a user"""
-        user_chats = ChatService.get_user_chats(db, user_id)
-        chat_ids = [chat.id for chat in user_chats]
-        
-        unread_count = db.query(Message).filter(
-            and_(
-                Message.chat_id.in_(chat_ids),
-                Message.sender_id != user_id,
-                Message.is_read == False
+    def parse_sync_cursor(cursor: str) -> Tuple[int, int]:
+        """Split a "<message_id>.<change_seq>" cursor; raises ValueError if malformed"""
+        message_id, change_seq = cursor.split(".")
+        return int(message_id), int(change_seq)
+
+    @staticmethod
+    async def get_changes(db: AsyncSession, user_id: int, since: Optional[Tuple[int, int]], limit: int) -> dict:
+        """Everything that changed in a user's chats after a sync cursor.
+
+        Returns changed chats (Chat rows with the other participant's profile,
+        including deactivated ones), up to `limit` new messages in ID order
+        with their senders' profiles, `has_more`, and the next cursor. Without
+        `since` only the chat list and a starting cursor are returned.
+
+        Message IDs and chat change_seqs are assigned before commit, so a
+        lower one can become visible after a higher one. The cursor therefore
+        only moves past messages and chat changes older than
+        CHAT_SYNC_SETTLE_SECONDS; newer ones may be returned again next time
+        and should be de-duplicated by ID. has_more is only set when the
+        cursor moved, so following it never spins on unsettled messages.
+        """
+        since_message_id, since_change_seq = since or (0, 0)
+        # Measured on the database clock, like sent_at and changed_at
+        result = await db.execute(select(func.now()))
+        settle_cutoff = result.scalar_one() - timedelta(seconds=settings.CHAT_SYNC_SETTLE_SECONDS)
+        mine = or_(Chat.user1_id == user_id, Chat.user2_id == user_id)
+        other_user_id = case(
+            (Chat.user1_id == user_id, Chat.user2_id),
+            else_=Chat.user1_id
+        )
+
+        chat_query = (
+            select(
+                Chat,
+                User.id.label("other_user_id"),
+                User.display_name.label("other_user_name"),
+                User.profile_picture_url.label("other_user_picture"),
+                (Chat.changed_at <= settle_cutoff).label("settled")
             )
-        ).count()
-        
-        return unread_count
\ No newline at end of file
+            .outerjoin(User, User.id == other_user_id)
+            .where(mine, Chat.change_seq > since_change_seq)
+            .order_by(Chat.change_seq)
+        )
+        if since is None:
+            chat_query = chat_query.where(Chat.is_active == True)
+        chats = (await db.execute(chat_query)).all()
+        next_change_seq = since_change_seq
+        for row in chats:
+            if not row.settled:
+                break
+            next_change_seq = row.Chat.change_seq
+
+        # Watermarks of every active chat, to mark the returned messages read or not
+        result = await db.execute(
+            select(
+                Chat.id,
+                Chat.user1_id,
+                Chat.user1_last_read_message_id,
+                Chat.user2_last_read_message_id
+            ).where(mine, Chat.is_active == True)
+        )
+        watermarks = {row.id: row for row in result.all()}
+
+        settled = (Message.sent_at <= settle_cutoff).label("settled")
+
+        if since is None:
+            # Start from the newest settled message; history is paged per chat
+            start_message_id = 0
+            if watermarks:
+                result = await db.execute(
+                    select(func.max(Message.id)).where(
+                        Message.chat_id.in_(watermarks.keys()),
+                        settled
+                    )
+                )
+                start_message_id = result.scalar_one_or_none() or 0
+            return {
+                "chats": chats,
+                "messages": [],
+                "profiles": {},
+                "watermarks": watermarks,
+                "has_more": False,
+                "cursor": f"{start_message_id}.{next_change_seq}"
+            }
+
+        messages = []
+        next_message_id = since_message_id
+        moving = True
+        if watermarks:
+            # One range scan per chat on (chat_id, id)
+            result = await db.execute(
+                select(Message, settled)
+                .where(Message.chat_id.in_(watermarks.keys()), Message.id > since_message_id)
+                .order_by(Message.id)
+                .limit(limit + 1)
+            )
+            for message, is_settled in result.all():
+                messages.append(message)
+                moving = moving and is_settled
+                if moving and len(messages) <= limit:
+                    next_message_id = message.id
+
+        has_more = len(messages) > limit and next_message_id > since_message_id
+        messages = messages[:limit]
+        profiles = await ChatService.get_sender_profiles(db, {message.sender_id for message in messages})
+
+        return {
+            "chats": chats,
+            "messages": messages,
+            "profiles": profiles,
+            "watermarks": watermarks,
+            "has_more": has_more,
+            "cursor": f"{next_message_id}.{next_change_seq}"
+        }
+
+    @staticmethod
+    async def get_unread_message_count(db: AsyncSession, user_id: int) -> int:
+        """Get total unread message count for a user (a maintained counter)"""
+        _, unread_messages = await UnreadCounterService.get(db, user_id)
+        return unread_messages
@@ -1,6 +1,7 @@
 # backend/app/services/connection_service.py
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, or_, and_, case
+from sqlalchemy.orm import selectinload
 from app.models.connection import Connection, ConnectionStatus
 from app.models.user import User
 from typing import Dict, List, Optional
@@ -10,18 +11,21 @@ from datetime import datetime
 class ConnectionService:
     
     @staticmethod
-    def get_connection_status(db: Session, user1_id: int, user2_id: int) -> Dict[str, bool]:
+    async def get_connection_status(db: AsyncSession, user1_id: int, user2_id: int) -> Dict[str, bool]:
         """
         Get connection status between two users
         Returns dict with connection_request_sent and already_connected flags
         """
         # Check if there's any connection between these users
-        connection = db.query(Connection).filter(
-            or_(
-                and_(Connection.sender_id == user1_id, Connection.receiver_id == user2_id),
-                and_(Connection.sender_id == user2_id, Connection.receiver_id == user1_id)
+        result = await db.execute(
+            select(Connection).where(
+                or_(
+                    and_(Connection.sender_id == user1_id, Connection.receiver_id == user2_id),
+                    and_(Connection.sender_id == user2_id, Connection.receiver_id == user1_id)
+                )
             )
-        ).first()
+        )
+        connection = result.scalars().first()
         
         if not connection:
             return {
@@ -51,7 +55,7 @@ class ConnectionService:
         }
     
     @staticmethod
-    def send_connection_request(db: Session, sender_id: int, receiver_id: int) -> Connection:
+    async def send_connection_request(db: AsyncSession, sender_id: int, receiver_id: int) -> Connection:
         """
         Send a connection request from sender to receiver
         """
@@ -59,12 +63,15 @@ class ConnectionService:
             raise ValueError("Cannot send connection request to yourself")
         
         # Check if connection already exists
-        existing_connection = db.query(Connection).filter(
-            or_(
-                and_(Connection.sender_id == sender_id, Connection.receiver_id == receiver_id),
-                and_(Connection.sender_id == receiver_id, Connection.receiver_id == sender_id)
+        result = await db.execute(
+            select(Connection).where(
+                or_(
+                    and_(Connection.sender_id == sender_id, Connection.receiver_id == receiver_id),
+                    and_(Connection.sender_id == receiver_id, Connection.receiver_id == sender_id)
+                )
             )
-        ).first()
+        )
+        existing_connection = result.scalars().first()
         
         if existing_connection:
             if existing_connection.status == ConnectionStatus.ACCEPTED:
@@ -77,8 +84,8 @@ class ConnectionService:
                 existing_connection.receiver_id = receiver_id
                 existing_connection.status = ConnectionStatus.PENDING
                 existing_connection.updated_at = datetime.utcnow()
-                db.commit()
-                db.refresh(existing_connection)
+                await db.commit()
+                await db.refresh(existing_connection)
                 return existing_connection
         
         # Create new connection request
@@ -89,82 +96,89 @@ class ConnectionService:
         )
         
         db.add(new_connection)
-        db.commit()
-        db.refresh(new_connection)
+        await db.commit()
+        await db.refresh(new_connection)
         
         return new_connection
     
     @staticmethod
-    def accept_connection_request(db: Session, connection_id: int, user_id: int) -> Connection:
+    async def accept_connection_request(db: AsyncSession, connection_id: int, user_id: int) -> Connection:
         """
         Accept a connection request (only receiver can accept)
         """
-        connection = db.query(Connection).filter(
-            Connection.id == connection_id,
-            Connection.receiver_id == user_id,
-            Connection.status == ConnectionStatus.PENDING
-        ).first()
+        result = await db.execute(
+            select(Connection).where(
+                Connection.id == connection_id,
+                Connection.receiver_id == user_id,
+                Connection.status == ConnectionStatus.PENDING
+            )
+        )
+        connection = result.scalars().first()
         
         if not connection:
             raise ValueError("Connection request not found or not authorized")
         
         connection.status = ConnectionStatus.ACCEPTED
         connection.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(connection)
+        await db.commit()
+        await db.refresh(connection)
         
         return connection
     
     @staticmethod
-    def reject_connection_request(db: Session, connection_id: int, user_id: int) -> Connection:
+    async def reject_connection_request(db: AsyncSession, connection_id: int, user_id: int) -> Connection:
         """
         Reject a connection request (only receiver can reject)
         """
-        connection = db.query(Connection).filter(
-            Connection.id == connection_id,
-            Connection.receiver_id == user_id,
-            Connection.status == ConnectionStatus.PENDING
-        ).first()
+        result = await db.execute(
+            select(Connection).where(
+                Connection.id == connection_id,
+                Connection.receiver_id == user_id,
+                Connection.status == ConnectionStatus.PENDING
+            )
+        )
+        connection = result.scalars().first()
         
         if not connection:
             raise ValueError("Connection request not found or not authorized")
         
         connection.status = ConnectionStatus.REJECTED
         connection.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(connection)
+        await db.commit()
+        await db.refresh(connection)
         
         return connection
     
     @staticmethod
-    def get_user_connections(db: Session, user_id: int, status: ConnectionStatus = ConnectionStatus.ACCEPTED) -> List[User]:
+    async def get_user_connections(db: AsyncSession, user_id: int, status: ConnectionStatus = ConnectionStatus.ACCEPTED) -> List[User]:
         """
-        Get all connected users for a given user
+        Get all connected users for a given user, in one query
         """
-        connections = db.query(Connection).filter(
-            or_(
-                Connection.sender_id == user_id,
-                Connection.receiver_id == user_id
-            ),
-            Connection.status == status
-        ).all()
-        
-        connected_users = []
-        for connection in connections:
-            # Get the other user in the connection
-            other_user_id = connection.receiver_id if connection.sender_id == user_id else connection.sender_id
-            user = db.query(User).filter(User.id == other_user_id).first()
-            if user:
-                connected_users.append(user)
-        
-        return connected_users
+        # The other side of each connection, whichever direction it was sent in
+        other_user_id = case(
+            (Connection.sender_id == user_id, Connection.receiver_id),
+            else_=Connection.sender_id
+        )
+        result = await db.execute(
+            select(User).join(Connection, User.id == other_user_id).where(
+                or_(
+                    Connection.sender_id == user_id,
+                    Connection.receiver_id == user_id
+                ),
+                Connection.status == status
+            ).order_by(Connection.id)
+        )
+        return list(result.scalars().all())
     
     @staticmethod
-    def get_pending_requests(db: Session, user_id: int) -> List[Connection]:
+    async def get_pending_requests(db: AsyncSession, user_id: int) -> List[Connection]:
         """
         Get all pending connection requests received by a user
         """
-        return db.query(Connection).filter(
-            Connection.receiver_id == user_id,
-            Connection.status == ConnectionStatus.PENDING
-        ).all()
\ No newline at end of file
+        result = await db.execute(
+            select(Connection).options(selectinload(Connection.sender)).where(
+                Connection.receiver_id == user_id,
+                Connection.status == ConnectionStatus.PENDING
+            )
+        )
+        return list(result.scalars().all())
\ No newline at end of file
@@ -0,0 +1,142 @@
+# backend/app/services/counter_service.py
+from typing import Dict, Optional, Tuple
+from sqlalchemy import select, update, func, and_, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.chat import Chat, Message
+from app.models.notification import Notification
+from app.models.user import User
+from app.models.user_counter import UserCounter
+from app.services.websocket_service import manager as websocket_manager
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (unread_notifications, unread_messages) by user
+Badges = Dict[int, Tuple[int, int]]
+
+
+class UnreadCounterService:
+
+    @staticmethod
+    async def get(db: AsyncSession, user_id: int) -> Tuple[int, int]:
+        """(unread_notifications, unread_messages) for a user"""
+        result = await db.execute(
+            select(UserCounter.unread_notifications, UserCounter.unread_messages)
+            .where(UserCounter.user_id == user_id)
+        )
+        row = result.first()
+        return (row.unread_notifications, row.unread_messages) if row else (0, 0)
+
+    @staticmethod
+    async def adjust(
+        db: AsyncSession,
+        notifications: Optional[Dict[int, int]] = None,
+        messages: Optional[Dict[int, int]] = None
+    ) -> Badges:
+        """Apply per-user deltas in the caller's transaction; returns the new badges.
+
+        Increments are one multi-row upsert (creating missing rows); decrements
+        update existing rows and never go below zero.
+        """
+        notifications = notifications or {}
+        messages = messages or {}
+        badges: Badges = {}
+
+        increments = {
+            user_id: (max(notifications.get(user_id, 0), 0), max(messages.get(user_id, 0), 0))
+            for user_id in set(notifications) | set(messages)
+        }
+        increments = {user_id: delta for user_id, delta in increments.items() if any(delta)}
+        if increments:
+            stmt = pg_insert(UserCounter).values([
+                {"user_id": user_id, "unread_notifications": n, "unread_messages": m}
+                for user_id, (n, m) in sorted(increments.items())
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[UserCounter.user_id],
+                set_={
+                    "unread_notifications": UserCounter.unread_notifications + stmt.excluded.unread_notifications,
+                    "unread_messages": UserCounter.unread_messages + stmt.excluded.unread_messages,
+                    "updated_at": func.now()
+                }
+            ).returning(UserCounter.user_id, UserCounter.unread_notifications, UserCounter.unread_messages)
+            for row in (await db.execute(stmt)).all():
+                badges[row.user_id] = (row.unread_notifications, row.unread_messages)
+
+        for user_id in sorted(set(notifications) | set(messages)):
+            n = min(notifications.get(user_id, 0), 0)
+            m = min(messages.get(user_id, 0), 0)
+            if not (n or m):
+                continue
+            result = await db.execute(
+                update(UserCounter)
+                .where(UserCounter.user_id == user_id)
+                .values(
+                    unread_notifications=func.greatest(UserCounter.unread_notifications + n, 0),
+                    unread_messages=func.greatest(UserCounter.unread_messages + m, 0)
+                )
+                .returning(UserCounter.unread_notifications, UserCounter.unread_messages)
+            )
+            row = result.first()
+            badges[user_id] = (row.unread_notifications, row.unread_messages) if row else (0, 0)
+
+        return badges
+
+    @staticmethod
+    async def publish(badges: Badges):
+        """Push new badge values to the users' connected devices (call after commit)"""
+        for user_id, (unread_notifications, unread_messages) in badges.items():
+            await websocket_manager.send_personal_message({
+                "type": "badge",
+                "data": {
+                    "unread_notifications": unread_notifications,
+                    "unread_messages": unread_messages
+                }
+            }, user_id)
+
+    @staticmethod
+    async def repair_batch(db: AsyncSession, after_user_id: int, batch_size: int) -> Optional[int]:
+        """Recompute the counters of the next `batch_size` users after `after_user_id`.
+
+        One INSERT ... SELECT ... ON CONFLICT per batch. Returns the last user
+        ID handled, or None when there are no users left.
+        """
+        unread_notifications = (
+            select(func.count(Notification.id))
+            .where(Notification.user_id == User.id, Notification.is_read == False)
+            .scalar_subquery()
+        )
+        unread_messages = (
+            select(func.count(Message.id))
+            .join(Chat, Chat.id == Message.chat_id)
+            .where(
+                Chat.is_active == True,
+                Message.sender_id != User.id,
+                or_(
+                    and_(Chat.user1_id == User.id, Message.id > Chat.user1_last_read_message_id),
+                    and_(Chat.user2_id == User.id, Message.id > Chat.user2_last_read_message_id)
+                )
+            )
+            .scalar_subquery()
+        )
+
+        stmt = pg_insert(UserCounter).from_select(
+            ["user_id", "unread_notifications", "unread_messages"],
+            select(User.id, unread_notifications, unread_messages)
+            .where(User.id > after_user_id)
+            .order_by(User.id)
+            .limit(batch_size)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserCounter.user_id],
+            set_={
+                "unread_notifications": stmt.excluded.unread_notifications,
+                "unread_messages": stmt.excluded.unread_messages,
+                "updated_at": func.now()
+            }
+        ).returning(UserCounter.user_id)
+
+        user_ids = (await db.execute(stmt)).scalars().all()
+        await db.commit()
+        return max(user_ids) if user_ids else None
@@ -1,3 +1,4 @@
+import html
 import secrets
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
@@ -151,4 +152,41 @@ class EmailService:
             
         except Exception as e:
             print(f"Failed to send password reset email: {e}")
-            raise e
\ No newline at end of file
+            raise e
+    @staticmethod
+    def send_announcement_email(email: str, display_name: str, subject: str, message: str):
+        """Send a campaign announcement (raises on failure so the caller can count it)"""
+        escaped = html.escape(message).replace("\n", "<br>")
+        html_content = f"""
+            <html>
+            <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+                <div style="background-color: #f8f9fa; padding: 40px 20px; text-align: center;">
+                    <h1 style="color: #333; margin-bottom: 20px;">{html.escape(subject)}</h1>
+                    <p style="color: #666; font-size: 16px; margin-bottom: 30px;">
+                        Hi {html.escape(display_name)},<br><br>
+                        {escaped}
+                    </p>
+                    <p style="color: #999; font-size: 12px;">
+                        You are receiving this because you opted in to marketing emails.
+                        You can turn them off in your notification preferences.
+                    </p>
+                </div>
+            </body>
+            </html>
+            """
+
+        text_content = f"""
+            Hi {display_name},
+
+            {message}
+
+            You are receiving this because you opted in to marketing emails.
+            You can turn them off in your notification preferences.
+            """
+
+        EmailService._send_email(
+            to_email=email,
+            subject=subject,
+            html_content=html_content,
+            text_content=text_content
+        )
@@ -0,0 +1,166 @@
+# backend/app/services/message_writer.py
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import insert, update
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.chat import Chat, Message
+from app.services.counter_service import UnreadCounterService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PendingMessage:
+    """A message waiting for the next group commit"""
+
+    def __init__(self, chat_id: int, sender_id: int, content: str, message_type: str):
+        self.values = {
+            "chat_id": chat_id,
+            "sender_id": sender_id,
+            "content": content,
+            "message_type": message_type
+        }
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class GroupCommitWriter:
+    """Batches chat message inserts from all connections into shared transactions.
+
+    Messages submitted within `window_ms` of each other are written with one
+    multi-row INSERT ... RETURNING, one UPDATE of the affected chats and one
+    upsert of the recipients' unread counters, then committed together, so a
+    burst costs one commit instead of one per message. Each submitter gets
+    back its own (id, sent_at). If a batch fails its messages are retried
+    one at a time, so a bad row only fails its own sender.
+    """
+
+    def __init__(self, window_ms: float, max_batch: int):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.messages = 0
+        self.failures = 0
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, chat_id: int, sender_id: int, content: str, message_type: str = "text") -> Tuple[int, datetime]:
+        """Queue a message and wait for the commit that persists it"""
+        self._ensure_started()
+        pending = PendingMessage(chat_id, sender_id, content, message_type)
+        await self._queue.put(pending)
+        return await pending.future
+
+    async def stop(self):
+        """Let the writer finish its in-flight batch, flush anything queued and stop"""
+        if self._task is None:
+            return
+        # A sentinel rather than cancel(), so a batch already taken off the queue is still written
+        await self._queue.put(None)
+        await self._task
+        remaining = []
+        while not self._queue.empty():
+            pending = self._queue.get_nowait()
+            if pending is not None:
+                remaining.append(pending)
+        if remaining:
+            await self._flush(remaining)
+        self._task = None
+
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                return
+            batch: List[PendingMessage] = [first]
+            stopping = False
+            # Give concurrent senders a moment to join this commit
+            await asyncio.sleep(self.window)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                pending = self._queue.get_nowait()
+                if pending is None:
+                    stopping = True
+                    break
+                batch.append(pending)
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[PendingMessage]):
+        try:
+            rows, badges = await self._write(batch)
+        except Exception as e:
+            if len(batch) > 1:
+                logger.warning(f"Group commit of {len(batch)} messages failed ({e}); retrying them one by one")
+                for pending in batch:
+                    await self._flush([pending])
+                return
+            logger.error(f"Writing chat message failed: {e}")
+            self.failures += 1
+            if not batch[0].future.done():
+                batch[0].future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.messages += len(batch)
+        for pending, row in zip(batch, rows):
+            if not pending.future.done():
+                pending.future.set_result((row.id, row.sent_at))
+
+        try:
+            await UnreadCounterService.publish(badges)
+        except Exception as e:
+            logger.error(f"Error publishing badges after group commit: {e}")
+
+    async def _write(self, batch: List[PendingMessage]):
+        """Insert a batch and update its chats and counters in one transaction"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                insert(Message).returning(
+                    Message.id, Message.sent_at, sort_by_parameter_order=True
+                ),
+                [pending.values for pending in batch]
+            )
+            rows = result.all()
+
+            chat_ids = {pending.values["chat_id"] for pending in batch}
+            result = await db.execute(
+                update(Chat)
+                .where(Chat.id.in_(chat_ids))
+                .values(updated_at=datetime.utcnow())
+                .returning(Chat.id, Chat.user1_id, Chat.user2_id)
+                .execution_options(synchronize_session=False)
+            )
+            participants = {row.id: (row.user1_id, row.user2_id) for row in result.all()}
+
+            unread: Dict[int, int] = {}
+            for pending in batch:
+                user1_id, user2_id = participants[pending.values["chat_id"]]
+                recipient_id = user2_id if pending.values["sender_id"] == user1_id else user1_id
+                unread[recipient_id] = unread.get(recipient_id, 0) + 1
+            badges = await UnreadCounterService.adjust(db, messages=unread)
+            await db.commit()
+        return rows, badges
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "enabled": settings.CHAT_GROUP_COMMIT,
+            "window_ms": self.window * 1000,
+            "batches": self.batches,
+            "messages": self.messages,
+            "failures": self.failures,
+            "avg_batch_size": round(self.messages / self.batches, 2) if self.batches else 0.0
+        }
+
+
+# Global group-commit writer (only used when CHAT_GROUP_COMMIT is enabled)
+message_writer = GroupCommitWriter(
+    window_ms=settings.CHAT_GROUP_COMMIT_WINDOW_MS,
+    max_batch=settings.CHAT_GROUP_COMMIT_MAX_BATCH
+)
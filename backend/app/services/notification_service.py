@@ -1,20 +1,29 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, update, delete, func, and_
+from sqlalchemy.orm import selectinload, joinedload
+from typing import Dict, List, Optional, Tuple
 from app.models.notification import Notification, NotificationType
+from app.schemas.notification import NotificationResponse
+from app.core.config import settings
 from app.models.booking import Booking, BookingStatus
 from app.models.dinner import Dinner
 from app.models.user import User
+from app.models.push_outbox import PushOutbox
+from app.models.dinner_topic_subscription import DinnerTopicSubscription
 from datetime import datetime, timedelta
 
 from app.models.scheduled_notification import ScheduledNotification, ScheduledNotificationType
 
-from app.services.push_notification_service import PushNotificationService
+from app.services.push_outbox_service import PushOutboxService
+from app.services.push_topic_service import dinner_topic
+from app.services.counter_service import UnreadCounterService
+from app.services.websocket_service import manager as websocket_manager
 
 class NotificationService:
-    
+
     @staticmethod
-    def create_notification(
-        db: Session,
+    async def create_notification(
+        db: AsyncSession,
         user_id: int,
         notification_type: NotificationType,
         title: str,
@@ -24,7 +33,131 @@ class NotificationService:
         connection_id: Optional[int] = None,
         send_push: bool = True  # Add this parameter
     ) -> Notification:
-        """Create a single notification"""
+        """Create a single notification.
+
+        Online users get it over their websocket right away; the push is held
+        back until they acknowledge it or the deadline passes.
+        """
+        realtime = NotificationService._realtime_candidate(user_id)
+        notification = NotificationService._add_notification(
+            db, user_id, notification_type, title, message,
+            dinner_id, booking_id, connection_id, send_push, realtime
+        )
+        badges = await UnreadCounterService.adjust(db, notifications={user_id: 1})
+
+        await db.commit()
+        await db.refresh(notification)
+
+        if realtime:
+            await NotificationService._deliver_realtime(db, [notification])
+        await UnreadCounterService.publish(badges)
+        if send_push:
+            PushOutboxService.wake()
+
+        return notification
+
+    @staticmethod
+    async def mark_as_read(db: AsyncSession, user_id: int, notification_ids: Optional[List[int]] = None) -> int:
+        """Mark a user's notifications read (all unread ones if no IDs are given).
+
+        The unread counter moves in the same transaction. Returns how many
+        were newly marked.
+        """
+        query = update(Notification).where(
+            Notification.user_id == user_id,
+            Notification.is_read == False
+        )
+        if notification_ids is not None:
+            query = query.where(Notification.id.in_(notification_ids))
+
+        result = await db.execute(
+            query.values(is_read=True, read_at=datetime.utcnow())
+            .returning(Notification.id)
+            .execution_options(synchronize_session=False)
+        )
+        marked = len(result.all())
+
+        badges = await UnreadCounterService.adjust(db, notifications={user_id: -marked}) if marked else {}
+        await db.commit()
+        await UnreadCounterService.publish(badges)
+        return marked
+
+    @staticmethod
+    async def delete_notification(db: AsyncSession, notification: Notification):
+        """Delete a notification, releasing its unread count if it was unread"""
+        badges = {}
+        if not notification.is_read:
+            badges = await UnreadCounterService.adjust(db, notifications={notification.user_id: -1})
+        await db.delete(notification)
+        await db.commit()
+        await UnreadCounterService.publish(badges)
+
+    @staticmethod
+    def _realtime_candidate(user_id: int) -> bool:
+        """Whether to try the websocket first.
+
+        With the in-memory backplane this process sees every socket; with a
+        shared backplane the user may be connected elsewhere, so always try.
+        """
+        if not settings.WS_NOTIFICATIONS:
+            return False
+        return settings.WS_BACKPLANE != "memory" or websocket_manager.is_user_online(user_id)
+
+    @staticmethod
+    async def _deliver_realtime(db: AsyncSession, notifications: List[Notification]):
+        """Send committed notifications as websocket events, releasing the held-back
+        push for any that no socket took"""
+        undelivered = []
+        for notification in notifications:
+            # Until reloaded, `type` is still the enum; the driver stores its name
+            notification_type = notification.type
+            if isinstance(notification_type, NotificationType):
+                notification_type = notification_type.name
+            event = {
+                "type": "notification",
+                "data": NotificationResponse(
+                    id=notification.id,
+                    user_id=notification.user_id,
+                    dinner_id=notification.dinner_id,
+                    booking_id=notification.booking_id,
+                    connection_id=notification.connection_id,
+                    type=notification_type,
+                    title=notification.title,
+                    message=notification.message,
+                    is_read=bool(notification.is_read),
+                    created_at=notification.created_at,
+                    read_at=notification.read_at
+                ).model_dump(mode="json")
+            }
+            if not await websocket_manager.send_personal_message(event, notification.user_id):
+                undelivered.append(notification.id)
+
+        PushOutboxService.record_websocket_offered(len(notifications) - len(undelivered))
+        await PushOutboxService.release_deferred(db, undelivered)
+
+    @staticmethod
+    async def acknowledge_realtime(db: AsyncSession, user_id: int, notification_ids: List[int]) -> int:
+        """The client confirmed websocket receipt; their pushes are no longer needed"""
+        return await PushOutboxService.acknowledge(db, user_id, notification_ids)
+
+    @staticmethod
+    def _add_notification(
+        db: AsyncSession,
+        user_id: int,
+        notification_type: NotificationType,
+        title: str,
+        message: str,
+        dinner_id: Optional[int] = None,
+        booking_id: Optional[int] = None,
+        connection_id: Optional[int] = None,
+        send_push: bool = True,
+        realtime: bool = False
+    ) -> Notification:
+        """Stage a notification (and its push) in the session without committing.
+
+        With `realtime` the push is deferred by WS_NOTIFICATION_ACK_SECONDS;
+        the caller must pass the notification to _deliver_realtime after commit.
+        """
         notification = Notification(
             user_id=user_id,
             dinner_id=dinner_id,
@@ -35,72 +168,185 @@ class NotificationService:
             message=message
         )
         db.add(notification)
-        db.commit()
-        db.refresh(notification)
-        
-        # Send push notification if enabled
+
+        # Queue the push in the same transaction; the outbox workers deliver it
         if send_push:
-            user = db.query(User).filter(User.id == user_id).first()
-            if user and user.fcm_token:
-                PushNotificationService.send_notification(
-                    token=user.fcm_token,
-                    title=title,
-                    body=message,
-                    data={
-                        "notification_type": notification_type.value if hasattr(notification_type, 'value') else str(notification_type),
-                        "notification_id": str(notification.id),
-                        "connection_id": str(connection_id) if connection_id else None,
-                        "booking_id": str(booking_id) if booking_id else None,
-                        "dinner_id": str(dinner_id) if dinner_id else None,
-                    }
-                )
-        
+            PushOutboxService.enqueue(
+                db,
+                user_id=user_id,
+                title=title,
+                body=message,
+                data=NotificationService._push_data(notification_type, dinner_id, booking_id, connection_id),
+                notification=notification,
+                defer_seconds=settings.WS_NOTIFICATION_ACK_SECONDS if realtime else 0
+            )
+
         return notification
 
     @staticmethod
-    def notify_dinner_users(
-        db: Session,
+    def _push_data(
+        notification_type: NotificationType,
+        dinner_id: Optional[int],
+        booking_id: Optional[int],
+        connection_id: Optional[int]
+    ) -> dict:
+        return {
+            "notification_type": notification_type.value if hasattr(notification_type, 'value') else str(notification_type),
+            "connection_id": str(connection_id) if connection_id else None,
+            "booking_id": str(booking_id) if booking_id else None,
+            "dinner_id": str(dinner_id) if dinner_id else None,
+        }
+
+    @staticmethod
+    async def create_notifications_bulk(
+        db: AsyncSession,
+        recipients: List[Tuple[int, Optional[int], bool, bool]],
+        notification_type: NotificationType,
+        title: str,
+        message: str,
+        dinner_id: Optional[int] = None,
+        topic: Optional[str] = None
+    ) -> List[Notification]:
+        """Create the same notification for many recipients in one transaction.
+
+        `recipients` are (user_id, booking_id, has_push_token, on_topic)
+        tuples. One INSERT ... RETURNING writes the notifications, one more
+        writes the outbox rows (only for users with a token), and the unread
+        counters move in a single upsert. With `topic`, recipients on it are
+        reached by a single topic push instead of rows of their own.
+        """
+        if not recipients:
+            return []
+
+        # The driver stores the enum's name in the string column, as create_notification does
+        type_value = notification_type.name if isinstance(notification_type, NotificationType) else notification_type
+        result = await db.scalars(
+            insert(Notification).returning(Notification, sort_by_parameter_order=True),
+            [
+                {
+                    "user_id": user_id,
+                    "dinner_id": dinner_id,
+                    "booking_id": booking_id,
+                    "type": type_value,
+                    "title": title,
+                    "message": message
+                }
+                for user_id, booking_id, _, _ in recipients
+            ]
+        )
+        notifications = result.all()
+
+        realtime_users = {
+            user_id for user_id in {r[0] for r in recipients}
+            if NotificationService._realtime_candidate(user_id)
+        }
+        now = datetime.utcnow()
+        deferred = now + timedelta(seconds=settings.WS_NOTIFICATION_ACK_SECONDS)
+        outbox_rows = [
+            {
+                "user_id": notification.user_id,
+                "notification_id": notification.id,
+                "title": title,
+                "body": message,
+                "data": NotificationService._push_data(notification_type, dinner_id, booking_id, None),
+                "next_attempt_at": deferred if notification.user_id in realtime_users else now
+            }
+            for notification, (_, booking_id, has_token, on_topic) in zip(notifications, recipients)
+            if has_token and not (topic and on_topic)
+        ]
+        if outbox_rows:
+            await db.execute(insert(PushOutbox), outbox_rows)
+        use_topic = bool(topic) and any(on_topic for *_, on_topic in recipients)
+        if use_topic:
+            await PushOutboxService.enqueue_topic(
+                db, topic, title, message,
+                data=NotificationService._push_data(notification_type, dinner_id, None, None)
+            )
+
+        new_unread: Dict[int, int] = {}
+        for notification in notifications:
+            new_unread[notification.user_id] = new_unread.get(notification.user_id, 0) + 1
+        badges = await UnreadCounterService.adjust(db, notifications=new_unread)
+
+        await db.commit()
+
+        realtime_notifications = [n for n in notifications if n.user_id in realtime_users]
+        if realtime_notifications:
+            await NotificationService._deliver_realtime(db, realtime_notifications)
+        await UnreadCounterService.publish(badges)
+        if outbox_rows or use_topic:
+            PushOutboxService.wake()
+
+        return notifications
+
+    @staticmethod
+    async def notify_dinner_users(
+        db: AsyncSession,
         dinner_id: int,
         notification_type: NotificationType,
         title: str,
         message: str,
         exclude_user_id: Optional[int] = None
     ) -> List[Notification]:
-        """Send notification to all users who have bookings for a dinner"""
-        # Get all confirmed bookings for this dinner
-        bookings = db.query(Booking).filter(
-            Booking.dinner_id == dinner_id,
-            Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.PENDING])
-        ).all()
-        
-        notifications = []
-        for booking in bookings:
-            # Skip if this is the user who triggered the notification
-            if exclude_user_id and booking.user_id == exclude_user_id:
-                continue
-                
-            notification = NotificationService.create_notification(
-                db=db,
-                user_id=booking.user_id,
-                notification_type=notification_type,
-                title=title,
-                message=message,
-                dinner_id=dinner_id,
-                booking_id=booking.id
+        """Send notification to all users who have bookings for a dinner.
+
+        Recipients, whether they have a push token and whether that token is
+        on the dinner topic come from one query; the notifications are then
+        written in bulk.
+        """
+        query = (
+            select(
+                Booking.user_id,
+                Booking.id,
+                User.fcm_token.isnot(None).label("has_token"),
+                DinnerTopicSubscription.token.isnot(None).label("on_topic")
             )
-            notifications.append(notification)
-        
-        return notifications
-    
+            .join(User, User.id == Booking.user_id)
+            .outerjoin(DinnerTopicSubscription, and_(
+                DinnerTopicSubscription.dinner_id == Booking.dinner_id,
+                DinnerTopicSubscription.user_id == Booking.user_id,
+                DinnerTopicSubscription.token == User.fcm_token
+            ))
+            .where(
+                Booking.dinner_id == dinner_id,
+                Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.PENDING])
+            )
+            .order_by(Booking.id)
+        )
+        # Skip the user who triggered the notification
+        if exclude_user_id:
+            query = query.where(Booking.user_id != exclude_user_id)
+        recipients = [tuple(row) for row in (await db.execute(query)).all()]
+
+        # A topic can't leave anyone out, so it is only used when nobody is excluded
+        topic = dinner_topic(dinner_id) if settings.PUSH_DINNER_TOPICS and not exclude_user_id else None
+        return await NotificationService.create_notifications_bulk(
+            db,
+            recipients,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            dinner_id=dinner_id,
+            topic=topic
+        )
+
+    @staticmethod
+    async def _get_booking_with_dinner(db: AsyncSession, booking_id: int) -> Optional[Booking]:
+        """Load a booking with its dinner eagerly (lazy loads are not allowed on AsyncSession)"""
+        result = await db.execute(
+            select(Booking).options(selectinload(Booking.dinner)).where(Booking.id == booking_id)
+        )
+        return result.scalars().first()
+
     @staticmethod
-    def notify_booking_confirmed(db: Session, booking_id: int):
+    async def notify_booking_confirmed(db: AsyncSession, booking_id: int):
         """Send notification when booking is confirmed"""
-        booking = db.query(Booking).filter(Booking.id == booking_id).first()
+        booking = await NotificationService._get_booking_with_dinner(db, booking_id)
         if not booking:
             return None
-            
+
         dinner = booking.dinner
-        NotificationService.create_notification(
+        await NotificationService.create_notification(
             db=db,
             user_id=booking.user_id,
             notification_type=NotificationType.BOOKING_CONFIRMED,
@@ -109,16 +355,16 @@ class NotificationService:
             dinner_id=booking.dinner_id,
             booking_id=booking_id
         )
-    
+
     @staticmethod
-    def notify_booking_cancelled(db: Session, booking_id: int):
+    async def notify_booking_cancelled(db: AsyncSession, booking_id: int):
         """Send notification when booking is confirmed"""
-        booking = db.query(Booking).filter(Booking.id == booking_id).first()
+        booking = await NotificationService._get_booking_with_dinner(db, booking_id)
         if not booking:
             return None
-            
+
         dinner = booking.dinner
-        NotificationService.create_notification(
+        await NotificationService.create_notification(
             db=db,
             user_id=booking.user_id,
             notification_type=NotificationType.BOOKING_CONFIRMED,
@@ -127,52 +373,52 @@ class NotificationService:
             dinner_id=booking.dinner_id,
             booking_id=booking_id
         )
-    
+
     @staticmethod
-    def notify_dinner_updated(db: Session, dinner_id: int, update_message: str):
+    async def notify_dinner_updated(db: AsyncSession, dinner_id: int, update_message: str):
         """Notify all dinner participants about updates"""
-        dinner = db.query(Dinner).filter(Dinner.id == dinner_id).first()
+        dinner = await db.get(Dinner, dinner_id)
         if not dinner:
             return []
-            
-        return NotificationService.notify_dinner_users(
+
+        return await NotificationService.notify_dinner_users(
             db=db,
             dinner_id=dinner_id,
             notification_type=NotificationType.DINNER_UPDATED,
             title=f"Update: {dinner.title}",
             message=update_message
         )
-    
+
     @staticmethod
-    def notify_dinner_cancelled(db: Session, dinner_id: int):
+    async def notify_dinner_cancelled(db: AsyncSession, dinner_id: int):
         """Notify all participants that dinner is cancelled"""
-        dinner = db.query(Dinner).filter(Dinner.id == dinner_id).first()
+        dinner = await db.get(Dinner, dinner_id)
         if not dinner:
             return []
-            
-        return NotificationService.notify_dinner_users(
+
+        return await NotificationService.notify_dinner_users(
             db=db,
             dinner_id=dinner_id,
             notification_type=NotificationType.DINNER_CANCELLED,
             title="Dinner Cancelled",
             message=f"Unfortunately, '{dinner.title}' has been cancelled. You will receive a full refund."
         )
-    
+
 
     @staticmethod
-    def schedule_booking_reminders(db: Session, booking_id: int):
+    async def schedule_booking_reminders(db: AsyncSession, booking_id: int):
         """Schedule reminder notifications for a booking"""
-        booking = db.query(Booking).filter(Booking.id == booking_id).first()
-        
+        booking = await NotificationService._get_booking_with_dinner(db, booking_id)
+
         if not booking:
             return
-        
+
         dinner_datetime = booking.dinner.date
-        
+
         # Schedule day-before reminder (at 6 PM the day before)
         day_before = dinner_datetime.date() - timedelta(days=1)
         day_before_time = datetime.combine(day_before, datetime.min.time().replace(hour=18, minute=0))
-        
+
         # Only schedule if it's in the future
         if day_before_time > datetime.utcnow():
             scheduled_notification = ScheduledNotification(
@@ -184,7 +430,7 @@ class NotificationService:
 
         # Schedule day-of reminder (2 hours before dinner)
         day_of_time = dinner_datetime - timedelta(hours=2)
-        
+
         if day_of_time > datetime.utcnow():
             scheduled_notification = ScheduledNotification(
                 booking_id=booking_id,
@@ -192,73 +438,149 @@ class NotificationService:
                 scheduled_time=day_of_time
             )
             db.add(scheduled_notification)
-        
-        db.commit()
+
+        await db.commit()
 
 
     @staticmethod
-    def process_scheduled_notifications(db: Session):
-        """Process due scheduled notifications (call this from a background task)"""
+    async def process_scheduled_notifications(db: AsyncSession, batch_size: int = 100):
+        """Send one batch of due scheduled notifications (call this from a background task).
+
+        Rows are claimed with FOR UPDATE SKIP LOCKED and marked sent in the
+        same transaction that creates the notifications, so concurrent
+        schedulers (other workers or replicas) never send a reminder twice.
+        Returns the number of reminders processed.
+        """
         now = datetime.utcnow()
-        
-        # Get all unsent notifications that are due
-        due_notifications = db.query(ScheduledNotification).filter(
-            ScheduledNotification.is_sent == False,
-            ScheduledNotification.scheduled_time <= now
-        ).all()
-        
+
+        # Booking and dinner are inner-joined (both FKs are non-null) so the
+        # batch loads in one query and the row lock can apply to it
+        result = await db.execute(
+            select(ScheduledNotification).options(
+                joinedload(ScheduledNotification.booking, innerjoin=True)
+                .joinedload(Booking.dinner, innerjoin=True)
+            ).where(
+                ScheduledNotification.is_sent == False,
+                ScheduledNotification.scheduled_time <= now
+            ).order_by(
+                ScheduledNotification.scheduled_time
+            ).limit(batch_size).with_for_update(
+                of=ScheduledNotification, skip_locked=True
+            )
+        )
+        due_notifications = result.scalars().all()
+
+        if not due_notifications:
+            await db.rollback()
+            return 0
+
+        # (dinner_id, user_id) pairs whose current token is on the dinner topic
+        on_topic = set()
+        if settings.PUSH_DINNER_TOPICS:
+            result = await db.execute(
+                select(DinnerTopicSubscription.dinner_id, DinnerTopicSubscription.user_id)
+                .join(User, and_(
+                    User.id == DinnerTopicSubscription.user_id,
+                    User.fcm_token == DinnerTopicSubscription.token
+                ))
+                .where(DinnerTopicSubscription.dinner_id.in_(
+                    {scheduled.booking.dinner_id for scheduled in due_notifications}
+                ))
+            )
+            on_topic = {(row.dinner_id, row.user_id) for row in result.all()}
+
+        realtime_notifications = []
+        new_unread: Dict[int, int] = {}
+        # One topic push per dinner and reminder type covers every subscribed attendee
+        topic_pushes: Dict[Tuple[int, ScheduledNotificationType], Tuple[str, str]] = {}
         for scheduled in due_notifications:
             booking = scheduled.booking
             dinner = booking.dinner
-            
+
             if scheduled.notification_type == ScheduledNotificationType.DAY_BEFORE_REMINDER:
                 title = f"Reminder: {dinner.title} Tomorrow"
                 message = f"Don't forget! You have dinner at {dinner.location} tomorrow at {dinner.date.strftime('%I:%M %p')}."
             else:  # DAY_OF_REMINDER
                 title = f"Today: {dinner.title}"
                 message = f"Your dinner is in 2 hours at {dinner.location}. See you there!"
-            
-            # Create the actual notification
-            NotificationService.create_notification(
+
+            # Create the actual notification; its push goes through the outbox
+            realtime = NotificationService._realtime_candidate(booking.user_id)
+            via_topic = (booking.dinner_id, booking.user_id) in on_topic
+            if via_topic:
+                topic_pushes[(booking.dinner_id, scheduled.notification_type)] = (title, message)
+            notification = NotificationService._add_notification(
                 db=db,
                 user_id=booking.user_id,
                 notification_type=NotificationType.DINNER_REMINDER,
                 title=title,
                 message=message,
                 dinner_id=booking.dinner_id,
-                booking_id=booking.id
+                booking_id=booking.id,
+                send_push=not via_topic,
+                realtime=realtime
             )
-            
+            if realtime:
+                realtime_notifications.append(notification)
+            new_unread[booking.user_id] = new_unread.get(booking.user_id, 0) + 1
+
             # Mark as sent
             scheduled.is_sent = True
             scheduled.sent_at = now
-        
-        db.commit()
+
+        # Reminders of one dinner can span batches (or schedulers); the key sends the topic push once
+        for (dinner_id, reminder_type), (title, message) in topic_pushes.items():
+            topic = dinner_topic(dinner_id)
+            await PushOutboxService.enqueue_topic(
+                db, topic, title, message,
+                data=NotificationService._push_data(NotificationType.DINNER_REMINDER, dinner_id, None, None),
+                dedupe_key=f"{topic}:{reminder_type.name}"
+            )
+
+        badges = await UnreadCounterService.adjust(db, notifications=new_unread)
+
+        await db.commit()
+        if realtime_notifications:
+            await NotificationService._deliver_realtime(db, realtime_notifications)
+        await UnreadCounterService.publish(badges)
+        PushOutboxService.wake()
         return len(due_notifications)
 
     @staticmethod
-    def delete_scheduled_notifications_for_booking(db: Session, booking_id: int):
+    async def get_next_scheduled_time(db: AsyncSession) -> Optional[datetime]:
+        """Earliest scheduled_time among unsent scheduled notifications"""
+        result = await db.execute(
+            select(func.min(ScheduledNotification.scheduled_time)).where(
+                ScheduledNotification.is_sent == False
+            )
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def delete_scheduled_notifications_for_booking(db: AsyncSession, booking_id: int):
         """Delete all scheduled notifications for a booking (e.g., if cancelled)."""
-        db.query(ScheduledNotification).filter(
-            ScheduledNotification.booking_id == booking_id,
-            ScheduledNotification.is_sent == False
-        ).delete(synchronize_session=False)
-        db.commit()
+        await db.execute(
+            delete(ScheduledNotification).where(
+                ScheduledNotification.booking_id == booking_id,
+                ScheduledNotification.is_sent == False
+            ).execution_options(synchronize_session=False)
+        )
+        await db.commit()
 
     @staticmethod
-    def send_admin_notification_to_dinner_users(
-        db: Session,
+    async def send_admin_notification_to_dinner_users(
+        db: AsyncSession,
         dinner_id: int,
         title: str,
         message: str,
         admin_user_id: int
     ) -> List[Notification]:
         """Admin endpoint to send custom notifications to all dinner participants"""
-        return NotificationService.notify_dinner_users(
+        return await NotificationService.notify_dinner_users(
             db=db,
             dinner_id=dinner_id,
             notification_type=NotificationType.DINNER_UPDATED,
             title=title,
             message=message,
             exclude_user_id=None  # Don't exclude admin
-        )
\ No newline at end of file
+        )
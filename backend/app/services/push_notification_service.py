@@ -1,9 +1,41 @@
 import firebase_admin
 from firebase_admin import credentials, messaging
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 import os
+import random
+import time
 from app.core.config import settings
 
+# FCM accepts at most this many messages per send_each call
+FCM_MAX_BATCH_SIZE = 500
+# ... and at most this many tokens per topic (un)subscribe call
+FCM_MAX_TOPIC_BATCH_SIZE = 1000
+
+# Topic management errors that mean the token itself is dead
+FCM_DEAD_TOKEN_REASONS = {"registration-token-not-registered", "invalid-argument"}
+
+
+class PushMessage:
+    """A push for one device token or, if `topic` is set, for every device subscribed to it"""
+
+    def __init__(self, token: Optional[str], title: str, body: str, data: Optional[dict] = None, topic: Optional[str] = None):
+        self.token = token
+        self.title = title
+        self.body = body
+        self.data = data or {}
+        self.topic = topic
+
+
+class PushResult:
+    """Outcome of delivering one PushMessage"""
+
+    def __init__(self, success: bool, error: Optional[str] = None, unregistered: bool = False, retryable: bool = True):
+        self.success = success
+        self.error = error
+        # Firebase no longer recognises the token; it should be removed from the user
+        self.unregistered = unregistered
+        self.retryable = retryable
+
 class PushNotificationService:
     _app = None
     
@@ -28,6 +60,37 @@ class PushNotificationService:
                 print(f"Error initializing Firebase Admin SDK: {e}")
                 cls._app = None
     
+    @staticmethod
+    def build_message(push: PushMessage) -> messaging.Message:
+        """Build the FCM message with our Android channel and APNs settings"""
+        return messaging.Message(
+            notification=messaging.Notification(
+                title=push.title,
+                body=push.body,
+            ),
+            data=push.data,
+            token=push.token,
+            topic=push.topic,
+            android=messaging.AndroidConfig(
+                notification=messaging.AndroidNotification(
+                    channel_id="timeleft_notifications",
+                    priority="high",
+                )
+            ),
+            apns=messaging.APNSConfig(
+                payload=messaging.APNSPayload(
+                    aps=messaging.Aps(
+                        alert=messaging.ApsAlert(
+                            title=push.title,
+                            body=push.body,
+                        ),
+                        badge=1,
+                        sound="default",
+                    )
+                )
+            )
+        )
+    
     @classmethod
     def send_notification(
         cls,
@@ -45,32 +108,7 @@ class PushNotificationService:
             return False
         
         try:
-            message = messaging.Message(
-                notification=messaging.Notification(
-                    title=title,
-                    body=body,
-                ),
-                data=data or {},
-                token=token,
-                android=messaging.AndroidConfig(
-                    notification=messaging.AndroidNotification(
-                        channel_id="timeleft_notifications",
-                        priority="high",
-                    )
-                ),
-                apns=messaging.APNSConfig(
-                    payload=messaging.APNSPayload(
-                        aps=messaging.Aps(
-                            alert=messaging.ApsAlert(
-                                title=title,
-                                body=body,
-                            ),
-                            badge=1,
-                            sound="default",
-                        )
-                    )
-                )
-            )
+            message = cls.build_message(PushMessage(token, title, body, data))
             
             response = messaging.send(message)
             print(f"Successfully sent message: {response}")
@@ -78,4 +116,143 @@ class PushNotificationService:
             
         except Exception as e:
             print(f"Error sending push notification: {e}")
-            return False
\ No newline at end of file
+            return False
+
+
+class FirebasePushSender:
+    """Delivers batches through FCM send_each (one HTTP/2 round trip per batch).
+
+    Blocking; the outbox workers call it from a thread.
+    """
+
+    def send_batch(self, messages: List[PushMessage]) -> List[PushResult]:
+        if PushNotificationService._app is None:
+            PushNotificationService.initialize()
+
+        if PushNotificationService._app is None:
+            return [PushResult(False, "Firebase not initialized", retryable=False) for _ in messages]
+
+        results: List[PushResult] = []
+        for start in range(0, len(messages), FCM_MAX_BATCH_SIZE):
+            chunk = messages[start:start + FCM_MAX_BATCH_SIZE]
+            try:
+                batch_response = messaging.send_each(
+                    [PushNotificationService.build_message(m) for m in chunk]
+                )
+            except Exception as e:
+                results.extend(PushResult(False, str(e)) for _ in chunk)
+                continue
+
+            for response in batch_response.responses:
+                if response.success:
+                    results.append(PushResult(True))
+                else:
+                    unregistered = isinstance(
+                        response.exception,
+                        (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+                    )
+                    results.append(PushResult(
+                        False,
+                        str(response.exception),
+                        unregistered=unregistered,
+                        retryable=not unregistered
+                    ))
+        return results
+
+    def subscribe_to_topic(self, tokens: List[str], topic: str) -> List[PushResult]:
+        return self._manage_topic(messaging.subscribe_to_topic, tokens, topic)
+
+    def unsubscribe_from_topic(self, tokens: List[str], topic: str) -> List[PushResult]:
+        return self._manage_topic(messaging.unsubscribe_from_topic, tokens, topic)
+
+    def _manage_topic(self, call, tokens: List[str], topic: str) -> List[PushResult]:
+        if PushNotificationService._app is None:
+            PushNotificationService.initialize()
+
+        if PushNotificationService._app is None:
+            return [PushResult(False, "Firebase not initialized", retryable=False) for _ in tokens]
+
+        results: List[PushResult] = []
+        for start in range(0, len(tokens), FCM_MAX_TOPIC_BATCH_SIZE):
+            chunk = tokens[start:start + FCM_MAX_TOPIC_BATCH_SIZE]
+            try:
+                response = call(chunk, topic)
+            except Exception as e:
+                results.extend(PushResult(False, str(e)) for _ in chunk)
+                continue
+
+            chunk_results = [PushResult(True) for _ in chunk]
+            for error in response.errors:
+                dead = error.reason in FCM_DEAD_TOKEN_REASONS
+                chunk_results[error.index] = PushResult(False, error.reason, unregistered=dead, retryable=not dead)
+            results.extend(chunk_results)
+        return results
+
+
+class FakePushSender:
+    """Offline stand-in for FCM, for local runs and delivery throughput benchmarks.
+
+    Sleeps `latency_seconds` per batch, reports tokens in `unregistered_tokens`
+    as unregistered and fails roughly `failure_rate` of the remaining sends.
+    Keeps topic membership in memory; `topic_deliveries` counts the devices
+    that topic sends would have reached.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0, failure_rate: float = 0.0, unregistered_tokens: Optional[Set[str]] = None):
+        self.latency_seconds = latency_seconds
+        self.failure_rate = failure_rate
+        self.unregistered_tokens = unregistered_tokens or set()
+        self.sent: List[PushMessage] = []
+        self.batches = 0
+        self.topics: Dict[str, Set[str]] = {}
+        self.topic_deliveries = 0
+
+    def send_batch(self, messages: List[PushMessage]) -> List[PushResult]:
+        self.batches += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+        results: List[PushResult] = []
+        for message in messages:
+            if message.topic:
+                self.sent.append(message)
+                self.topic_deliveries += len(self.topics.get(message.topic, ()))
+                results.append(PushResult(True))
+            elif message.token in self.unregistered_tokens:
+                results.append(PushResult(False, "Requested entity was not found.", unregistered=True, retryable=False))
+            elif self.failure_rate and random.random() < self.failure_rate:
+                results.append(PushResult(False, "Simulated FCM failure"))
+            else:
+                self.sent.append(message)
+                results.append(PushResult(True))
+        return results
+
+    def subscribe_to_topic(self, tokens: List[str], topic: str) -> List[PushResult]:
+        results: List[PushResult] = []
+        members = self.topics.setdefault(topic, set())
+        for token in tokens:
+            if token in self.unregistered_tokens:
+                results.append(PushResult(False, "registration-token-not-registered", unregistered=True, retryable=False))
+            else:
+                members.add(token)
+                results.append(PushResult(True))
+        return results
+
+    def unsubscribe_from_topic(self, tokens: List[str], topic: str) -> List[PushResult]:
+        members = self.topics.get(topic, set())
+        members.difference_update(tokens)
+        return [PushResult(True) for _ in tokens]
+
+
+_sender = None
+
+
+def get_push_sender():
+    """Process-wide sender selected by PUSH_SENDER ("firebase" or "fake")"""
+    global _sender
+    if _sender is None:
+        if settings.PUSH_SENDER == "fake":
+            _sender = FakePushSender(latency_seconds=settings.PUSH_FAKE_LATENCY_SECONDS)
+        else:
+            _sender = FirebasePushSender()
+    return _sender
@@ -0,0 +1,368 @@
+# backend/app/services/push_outbox_service.py
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.push_outbox import PushOutbox, PushOutboxStatus
+from app.models.user import User
+from app.services.push_notification_service import PushMessage, PushResult, get_push_sender
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Claimed rows are hidden from other workers for this long; if a worker dies
+# mid-batch its rows become due again afterwards
+CLAIM_LEASE_SECONDS = 120
+
+BACKOFF_BASE_SECONDS = 15
+BACKOFF_MAX_SECONDS = 1800
+
+PURGE_INTERVAL_SECONDS = 3600
+
+_wake_event = asyncio.Event()
+
+_stats = {
+    "batches": 0,
+    "sent": 0,
+    "retried": 0,
+    "failed": 0,
+    "skipped": 0,
+    "tokens_pruned": 0,
+    # Notifications offered over the websocket, acknowledged there (push avoided),
+    # and sent straight to push because no socket took them
+    "websocket_offered": 0,
+    "websocket_acknowledged": 0,
+    "websocket_fallback": 0,
+}
+
+
+class ClaimedPush:
+    """An outbox row claimed by a worker, joined with the recipient's current token (None for topic rows)"""
+
+    def __init__(self, row):
+        self.id = row.id
+        self.user_id = row.user_id
+        self.notification_id = row.notification_id
+        self.title = row.title
+        self.body = row.body
+        self.data = row.data or {}
+        self.attempts = row.attempts
+        self.token = row.fcm_token
+        self.topic = row.topic
+
+    def to_message(self) -> PushMessage:
+        # FCM data payloads only carry strings
+        data = {k: str(v) for k, v in self.data.items() if v is not None}
+        if self.notification_id:
+            data["notification_id"] = str(self.notification_id)
+        return PushMessage(self.token, self.title, self.body, data, topic=self.topic)
+
+
+class PushOutboxService:
+
+    @staticmethod
+    def enqueue(
+        db: AsyncSession,
+        user_id: int,
+        title: str,
+        body: str,
+        data: Optional[dict] = None,
+        notification=None,
+        defer_seconds: float = 0
+    ) -> PushOutbox:
+        """Add a push to the outbox; it is delivered once the caller commits.
+
+        `defer_seconds` holds it back, giving a websocket delivery time to be
+        acknowledged first.
+        """
+        entry = PushOutbox(
+            user_id=user_id,
+            notification=notification,
+            title=title,
+            body=body,
+            data=data,
+            next_attempt_at=datetime.utcnow() + timedelta(seconds=defer_seconds)
+        )
+        db.add(entry)
+        return entry
+
+    @staticmethod
+    async def enqueue_topic(
+        db: AsyncSession,
+        topic: str,
+        title: str,
+        body: str,
+        data: Optional[dict] = None,
+        dedupe_key: Optional[str] = None
+    ):
+        """Add one push for every device subscribed to `topic`; delivered once the caller commits.
+
+        With `dedupe_key`, a broadcast already enqueued under the same key is
+        left alone (so overlapping reminder batches send it once).
+        """
+        if dedupe_key is None:
+            db.add(PushOutbox(topic=topic, title=title, body=body, data=data))
+            return
+        await db.execute(
+            pg_insert(PushOutbox)
+            .values(
+                topic=topic,
+                title=title,
+                body=body,
+                data=data,
+                status=PushOutboxStatus.PENDING,
+                attempts=0,
+                next_attempt_at=datetime.utcnow(),
+                created_at=datetime.utcnow(),
+                dedupe_key=dedupe_key
+            )
+            .on_conflict_do_nothing(index_elements=[PushOutbox.dedupe_key])
+        )
+
+    @staticmethod
+    async def release_deferred(db: AsyncSession, notification_ids: List[int]):
+        """Make held-back pushes due now (their websocket delivery didn't go through).
+
+        Only call this for rows enqueued with defer_seconds: until the deferral
+        ends no worker can have claimed them, so this can't race a claim lease.
+        """
+        if not notification_ids:
+            return
+        result = await db.execute(
+            update(PushOutbox)
+            .where(
+                PushOutbox.notification_id.in_(notification_ids),
+                PushOutbox.status == PushOutboxStatus.PENDING,
+                PushOutbox.attempts == 0
+            )
+            .values(next_attempt_at=datetime.utcnow())
+        )
+        await db.commit()
+        _stats["websocket_fallback"] += result.rowcount
+        PushOutboxService.wake()
+
+    @staticmethod
+    async def acknowledge(db: AsyncSession, user_id: int, notification_ids: List[int]) -> int:
+        """Cancel the pending pushes of notifications the client received over the websocket"""
+        if not notification_ids:
+            return 0
+        result = await db.execute(
+            update(PushOutbox)
+            .where(
+                PushOutbox.user_id == user_id,
+                PushOutbox.notification_id.in_(notification_ids),
+                PushOutbox.status == PushOutboxStatus.PENDING
+            )
+            .values(status=PushOutboxStatus.ACKNOWLEDGED, sent_at=datetime.utcnow())
+        )
+        await db.commit()
+        _stats["websocket_acknowledged"] += result.rowcount
+        return result.rowcount
+
+    @staticmethod
+    def record_websocket_offered(count: int):
+        _stats["websocket_offered"] += count
+
+    @staticmethod
+    def wake():
+        """Nudge idle workers after committing new outbox rows"""
+        _wake_event.set()
+
+    @staticmethod
+    async def claim_batch(db: AsyncSession, limit: int) -> List[ClaimedPush]:
+        """Lease up to `limit` due rows. SKIP LOCKED keeps concurrent workers off each other's rows."""
+        now = datetime.utcnow()
+        result = await db.execute(
+            select(
+                PushOutbox.id,
+                PushOutbox.user_id,
+                PushOutbox.notification_id,
+                PushOutbox.title,
+                PushOutbox.body,
+                PushOutbox.data,
+                PushOutbox.attempts,
+                PushOutbox.topic,
+                User.fcm_token
+            )
+            .outerjoin(User, User.id == PushOutbox.user_id)
+            .where(
+                PushOutbox.status == PushOutboxStatus.PENDING,
+                PushOutbox.next_attempt_at <= now
+            )
+            .order_by(PushOutbox.next_attempt_at)
+            .limit(limit)
+            .with_for_update(of=PushOutbox, skip_locked=True)
+        )
+        claimed = [ClaimedPush(row) for row in result.all()]
+
+        if claimed:
+            await db.execute(
+                update(PushOutbox)
+                .where(PushOutbox.id.in_([c.id for c in claimed]))
+                .values(next_attempt_at=now + timedelta(seconds=CLAIM_LEASE_SECONDS))
+            )
+        await db.commit()
+        return claimed
+
+    @staticmethod
+    def _backoff(attempts: int) -> timedelta:
+        delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)))
+        return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+    @staticmethod
+    async def record_results(db: AsyncSession, claimed: List[ClaimedPush], results: List[PushResult]):
+        """Write delivery outcomes back in one transaction"""
+        now = datetime.utcnow()
+        sent_ids = []
+        retry_rows = []
+        failed_rows = []
+        pruned: Dict[int, str] = {}
+
+        for push, result in zip(claimed, results):
+            attempts = push.attempts + 1
+            if result.success:
+                sent_ids.append(push.id)
+                continue
+
+            if result.unregistered:
+                pruned[push.user_id] = push.token
+
+            if result.retryable and attempts < settings.PUSH_MAX_ATTEMPTS:
+                retry_rows.append({
+                    "id": push.id,
+                    "attempts": attempts,
+                    "next_attempt_at": now + PushOutboxService._backoff(attempts),
+                    "last_error": result.error
+                })
+                _stats["retried"] += 1
+            else:
+                failed_rows.append({
+                    "id": push.id,
+                    "attempts": attempts,
+                    "status": PushOutboxStatus.FAILED,
+                    "last_error": result.error
+                })
+                _stats["failed"] += 1
+
+        if sent_ids:
+            await db.execute(
+                update(PushOutbox)
+                .where(PushOutbox.id.in_(sent_ids))
+                .values(status=PushOutboxStatus.SENT, sent_at=now, attempts=PushOutbox.attempts + 1)
+            )
+            _stats["sent"] += len(sent_ids)
+
+        # Per-row values, each group sent as a single executemany
+        for rows in (retry_rows, failed_rows):
+            if rows:
+                await db.execute(update(PushOutbox), rows)
+
+        # Only clear the token if the user hasn't registered a new one since
+        for user_id, token in pruned.items():
+            await db.execute(
+                update(User)
+                .where(User.id == user_id, User.fcm_token == token)
+                .values(fcm_token=None)
+            )
+        _stats["tokens_pruned"] += len(pruned)
+
+        await db.commit()
+
+    @staticmethod
+    async def process_batch(sender) -> int:
+        """Claim, deliver and record one batch. Returns the number of rows claimed."""
+        async with AsyncSessionLocal() as db:
+            claimed = await PushOutboxService.claim_batch(db, settings.PUSH_OUTBOX_BATCH_SIZE)
+
+            if not claimed:
+                return 0
+
+            deliverable = [c for c in claimed if c.token or c.topic]
+            skipped_ids = [c.id for c in claimed if not (c.token or c.topic)]
+            if skipped_ids:
+                await db.execute(
+                    update(PushOutbox)
+                    .where(PushOutbox.id.in_(skipped_ids))
+                    .values(status=PushOutboxStatus.SKIPPED)
+                )
+                await db.commit()
+                _stats["skipped"] += len(skipped_ids)
+
+        if deliverable:
+            # The sender blocks on network I/O, and no DB connection is held meanwhile
+            try:
+                results = await asyncio.to_thread(
+                    sender.send_batch, [c.to_message() for c in deliverable]
+                )
+            except Exception as e:
+                # Count it as an attempt for every row, so a batch that always
+                # throws still backs off and ends up FAILED
+                logger.error(f"Push sender raised for a batch of {len(deliverable)}: {e}")
+                results = [PushResult(False, str(e)) for _ in deliverable]
+            async with AsyncSessionLocal() as db:
+                await PushOutboxService.record_results(db, deliverable, results)
+
+        _stats["batches"] += 1
+        return len(claimed)
+
+    @staticmethod
+    async def purge_delivered(db: AsyncSession) -> int:
+        """Delete finished rows older than the retention window"""
+        cutoff = datetime.utcnow() - timedelta(days=settings.PUSH_OUTBOX_RETENTION_DAYS)
+        result = await db.execute(
+            delete(PushOutbox).where(
+                PushOutbox.status != PushOutboxStatus.PENDING,
+                PushOutbox.created_at < cutoff
+            )
+        )
+        await db.commit()
+        return result.rowcount
+
+    @staticmethod
+    async def run_worker(worker_id: int, sender):
+        """Drain the outbox until cancelled"""
+        last_purge = datetime.utcnow()
+        while True:
+            try:
+                processed = await PushOutboxService.process_batch(sender)
+                if processed:
+                    logger.info(f"Push worker {worker_id} processed {processed} outbox rows")
+
+                if worker_id == 0 and (datetime.utcnow() - last_purge).total_seconds() > PURGE_INTERVAL_SECONDS:
+                    async with AsyncSessionLocal() as db:
+                        purged = await PushOutboxService.purge_delivered(db)
+                    last_purge = datetime.utcnow()
+                    if purged:
+                        logger.info(f"Purged {purged} delivered push outbox rows")
+
+                # A full batch likely means more is waiting
+                if processed < settings.PUSH_OUTBOX_BATCH_SIZE:
+                    try:
+                        await asyncio.wait_for(_wake_event.wait(), timeout=settings.PUSH_OUTBOX_POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    _wake_event.clear()
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in push outbox worker {worker_id}: {e}")
+                await asyncio.sleep(settings.PUSH_OUTBOX_POLL_SECONDS)
+
+    @staticmethod
+    def start_workers() -> List[asyncio.Task]:
+        """Spawn the outbox worker pool on the running event loop"""
+        sender = get_push_sender()
+        return [
+            asyncio.create_task(PushOutboxService.run_worker(worker_id, sender))
+            for worker_id in range(settings.PUSH_OUTBOX_WORKERS)
+        ]
+
+    @staticmethod
+    def stats() -> Dict[str, int]:
+        return dict(_stats)
@@ -0,0 +1,178 @@
+# backend/app/services/push_topic_service.py
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Set
+from sqlalchemy import select, delete, union
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.booking import Booking, BookingStatus
+from app.models.dinner import Dinner
+from app.models.dinner_topic_subscription import DinnerTopicSubscription
+from app.models.user import User
+from app.services.push_notification_service import get_push_sender
+import logging
+
+logger = logging.getLogger(__name__)
+
+_stats = {
+    "subscribed": 0,
+    "unsubscribed": 0,
+    "failed": 0,
+    "dinners_reconciled": 0,
+}
+
+
+# Background membership syncs, referenced until done so they aren't garbage collected
+_pending_syncs: Set[asyncio.Task] = set()
+
+
+def dinner_topic(dinner_id: int) -> str:
+    return f"dinner_{dinner_id}"
+
+
+class PushTopicService:
+    """Keeps each upcoming dinner's FCM topic in line with its confirmed attendees' tokens.
+
+    DinnerTopicSubscription records what we subscribed; every sync diffs the
+    wanted (dinner, token) pairs against it and calls FCM only for the
+    difference, PUSH_TOPIC_BATCH_SIZE tokens per call.
+    """
+
+    @staticmethod
+    def _wanted_query(dinner_id: int):
+        return (
+            select(Booking.user_id, User.fcm_token)
+            .join(User, User.id == Booking.user_id)
+            .join(Dinner, Dinner.id == Booking.dinner_id)
+            .where(
+                Booking.dinner_id == dinner_id,
+                Booking.status == BookingStatus.CONFIRMED,
+                User.fcm_token.isnot(None),
+                # Past dinners need no topic; reconciliation unsubscribes them
+                Dinner.date > datetime.utcnow()
+            )
+        )
+
+    @staticmethod
+    def schedule_member_sync(dinner_id: int, user_id: int):
+        """Update one user's topic membership in the background (after booking,
+        cancelling or removing), so the request doesn't wait for FCM"""
+        if not settings.PUSH_DINNER_TOPICS:
+            return
+        task = asyncio.create_task(PushTopicService.sync_member(dinner_id, user_id))
+        _pending_syncs.add(task)
+        task.add_done_callback(_pending_syncs.discard)
+
+    @staticmethod
+    async def sync_member(dinner_id: int, user_id: int):
+        """Bring one user's membership of a dinner topic up to date.
+
+        FCM errors are logged, never raised, and left for reconciliation.
+        """
+        try:
+            async with AsyncSessionLocal() as db:
+                wanted = await db.execute(
+                    PushTopicService._wanted_query(dinner_id).where(Booking.user_id == user_id)
+                )
+                current = await db.execute(
+                    select(DinnerTopicSubscription.user_id, DinnerTopicSubscription.token).where(
+                        DinnerTopicSubscription.dinner_id == dinner_id,
+                        DinnerTopicSubscription.user_id == user_id
+                    )
+                )
+                wanted = {row.fcm_token: row.user_id for row in wanted.all()}
+                current = {row.token: row.user_id for row in current.all()}
+            await PushTopicService._apply(dinner_id, wanted, current)
+        except Exception as e:
+            logger.error(f"Error syncing topic membership of user {user_id} for dinner {dinner_id}: {e}")
+
+    @staticmethod
+    async def sync_dinner(dinner_id: int):
+        """Reconcile a whole dinner topic against its confirmed bookings"""
+        async with AsyncSessionLocal() as db:
+            wanted = await db.execute(PushTopicService._wanted_query(dinner_id))
+            current = await db.execute(
+                select(DinnerTopicSubscription.user_id, DinnerTopicSubscription.token)
+                .where(DinnerTopicSubscription.dinner_id == dinner_id)
+            )
+            wanted = {row.fcm_token: row.user_id for row in wanted.all()}
+            current = {row.token: row.user_id for row in current.all()}
+        await PushTopicService._apply(dinner_id, wanted, current)
+        _stats["dinners_reconciled"] += 1
+
+    @staticmethod
+    async def _apply(dinner_id: int, wanted: Dict[str, int], current: Dict[str, int]):
+        """Subscribe tokens in `wanted` but not `current` and unsubscribe the
+        reverse, then record what FCM accepted.
+
+        The FCM calls run with no database connection held; the results
+        are written afterwards in one short transaction.
+        """
+        topic = dinner_topic(dinner_id)
+        sender = get_push_sender()
+        batch_size = settings.PUSH_TOPIC_BATCH_SIZE
+
+        subscribed: List[dict] = []
+        to_add = sorted(set(wanted) - set(current))
+        for start in range(0, len(to_add), batch_size):
+            chunk = to_add[start:start + batch_size]
+            results = await asyncio.to_thread(sender.subscribe_to_topic, chunk, topic)
+            rows = [
+                {"dinner_id": dinner_id, "token": token, "user_id": wanted[token]}
+                for token, result in zip(chunk, results) if result.success
+            ]
+            subscribed.extend(rows)
+            _stats["failed"] += len(chunk) - len(rows)
+
+        unsubscribed: List[str] = []
+        to_remove = sorted(set(current) - set(wanted))
+        for start in range(0, len(to_remove), batch_size):
+            chunk = to_remove[start:start + batch_size]
+            results = await asyncio.to_thread(sender.unsubscribe_from_topic, chunk, topic)
+            # A dead token is no longer subscribed to anything
+            done = [token for token, result in zip(chunk, results) if result.success or result.unregistered]
+            unsubscribed.extend(done)
+            _stats["failed"] += len(chunk) - len(done)
+
+        if not (subscribed or unsubscribed):
+            return
+        async with AsyncSessionLocal() as db:
+            for start in range(0, len(subscribed), batch_size):
+                await db.execute(
+                    pg_insert(DinnerTopicSubscription)
+                    .values(subscribed[start:start + batch_size])
+                    .on_conflict_do_nothing()
+                )
+            if unsubscribed:
+                await db.execute(
+                    delete(DinnerTopicSubscription).where(
+                        DinnerTopicSubscription.dinner_id == dinner_id,
+                        DinnerTopicSubscription.token.in_(unsubscribed)
+                    )
+                )
+            await db.commit()
+        _stats["subscribed"] += len(subscribed)
+        _stats["unsubscribed"] += len(unsubscribed)
+
+    @staticmethod
+    async def next_dinners(db: AsyncSession, after_dinner_id: int, limit: int) -> List[int]:
+        """Dinners needing reconciliation: upcoming ones, plus any that still have
+        recorded subscriptions (so past dinners get cleaned up)"""
+        candidates = union(
+            select(Dinner.id.label("dinner_id")).where(
+                Dinner.date > datetime.utcnow(), Dinner.id > after_dinner_id
+            ),
+            select(DinnerTopicSubscription.dinner_id).where(
+                DinnerTopicSubscription.dinner_id > after_dinner_id
+            )
+        ).subquery()
+        result = await db.execute(
+            select(candidates.c.dinner_id).order_by(candidates.c.dinner_id).limit(limit)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    def stats() -> Dict[str, int]:
+        return dict(_stats)
@@ -0,0 +1,309 @@
+# backend/app/services/websocket_backplane.py
+import asyncio
+import uuid
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Called with (user_id, serialized message) when a published message
+# arrives for a user whose socket this process holds
+DeliverCallback = Callable[[int, str], Awaitable[None]]
+
+
+def user_channel(user_id: int) -> str:
+    return f"ws_user_{user_id}"
+
+
+class Backplane(ABC):
+    """Pub/sub used by ConnectionManager to reach sockets held by other workers.
+
+    Each process subscribes to a per-user channel while it holds any of that
+    user's sockets, so a publish only reaches nodes that can deliver it. A
+    user's devices may be spread over several nodes, so the publishing node
+    delivers to its own sockets directly and skips its own echo.
+    """
+
+    def __init__(self):
+        self.node_id = uuid.uuid4().hex[:12]
+
+    async def start(self, deliver: DeliverCallback):
+        self._deliver = deliver
+
+    def _wrap(self, payload: str) -> str:
+        return f"{self.node_id}|{payload}"
+
+    async def _receive(self, user_id: int, raw: str):
+        origin, _, payload = raw.partition("|")
+        if origin != self.node_id:
+            await self._deliver(user_id, payload)
+
+    async def stop(self):
+        pass
+
+    @abstractmethod
+    async def subscribe(self, user_id: int):
+        ...
+
+    @abstractmethod
+    async def unsubscribe(self, user_id: int):
+        ...
+
+    @abstractmethod
+    async def publish(self, user_id: int, payload: str) -> bool:
+        """Deliver to other nodes. Returns False when it is known that none holds the user's socket."""
+
+
+class InMemoryBus:
+    """Channel registry shared by the in-memory backplanes of one process"""
+
+    def __init__(self):
+        self.subscribers: Dict[int, Set["InMemoryBackplane"]] = {}
+
+
+_default_bus = InMemoryBus()
+
+
+class InMemoryBackplane(Backplane):
+    """Single-process backplane. Several managers sharing one bus behave like separate nodes."""
+
+    def __init__(self, bus: Optional[InMemoryBus] = None):
+        super().__init__()
+        self.bus = bus or _default_bus
+
+    async def subscribe(self, user_id: int):
+        self.bus.subscribers.setdefault(user_id, set()).add(self)
+
+    async def unsubscribe(self, user_id: int):
+        nodes = self.bus.subscribers.get(user_id)
+        if nodes:
+            nodes.discard(self)
+            if not nodes:
+                del self.bus.subscribers[user_id]
+
+    async def publish(self, user_id: int, payload: str) -> bool:
+        nodes = [node for node in self.bus.subscribers.get(user_id, ()) if node is not self]
+        for node in nodes:
+            await node._deliver(user_id, payload)
+        return bool(nodes)
+
+
+class RedisBackplane(Backplane):
+    """Redis pub/sub backplane (docker-compose's `redis` service). Requires the redis package."""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise RuntimeError("WS_BACKPLANE=redis requires the 'redis' package")
+        super().__init__()
+        self._redis = aioredis.from_url(url, decode_responses=True)
+        self._pubsub = self._redis.pubsub()
+        self._reader: Optional[asyncio.Task] = None
+        self._local_users: Set[int] = set()
+
+    async def start(self, deliver: DeliverCallback):
+        await super().start(deliver)
+        self._reader = asyncio.create_task(self._read_loop())
+
+    async def stop(self):
+        if self._reader:
+            self._reader.cancel()
+        await self._pubsub.aclose()
+        await self._redis.aclose()
+
+    async def subscribe(self, user_id: int):
+        self._local_users.add(user_id)
+        await self._pubsub.subscribe(user_channel(user_id))
+
+    async def unsubscribe(self, user_id: int):
+        self._local_users.discard(user_id)
+        await self._pubsub.unsubscribe(user_channel(user_id))
+
+    async def publish(self, user_id: int, payload: str) -> bool:
+        # PUBLISH returns the number of subscribers that received it, including this node
+        receivers = await self._redis.publish(user_channel(user_id), self._wrap(payload))
+        return receivers > (1 if user_id in self._local_users else 0)
+
+    async def _read_loop(self):
+        while True:
+            try:
+                if not self._pubsub.subscribed:
+                    await asyncio.sleep(0.1)
+                    continue
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message and message["type"] == "message":
+                    user_id = int(message["channel"].rsplit("_", 1)[1])
+                    await self._receive(user_id, message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis backplane read error: {e}")
+                await asyncio.sleep(1)
+
+
+class PostgresBackplane(Backplane):
+    """LISTEN/NOTIFY backplane; needs no extra infrastructure beyond the database.
+
+    Uses two dedicated (non-pooled) autocommit connections: one listening,
+    one for pg_notify. NOTIFY payloads are limited to just under 8000 bytes.
+
+    Only the reader loop touches the listening connection. It keeps the
+    LISTENed channels in line with the subscribed users; subscribe() wakes
+    it through a per-node control channel and returns once the LISTEN is
+    active, so nothing published after a user connects is missed. If either
+    connection drops, both are reopened and every channel is LISTENed again.
+    """
+
+    MAX_PAYLOAD_BYTES = 7999
+    POLL_SECONDS = 0.5
+    SUBSCRIBE_TIMEOUT_SECONDS = 5
+    RECONNECT_MAX_DELAY_SECONDS = 30
+
+    def __init__(self, url: str):
+        super().__init__()
+        # psycopg wants a plain libpq URL, not the SQLAlchemy dialect form
+        self.url = url.replace("postgresql+psycopg://", "postgresql://")
+        self._listen_conn = None
+        self._notify_conn = None
+        self._control_channel = f"ws_node_{self.node_id}"
+        # Users this node should be LISTENing for, and what the connection actually has
+        self._channels: Set[int] = set()
+        self._listening: Set[int] = set()
+        # subscribe() calls waiting for the reader to apply their LISTEN
+        self._waiters: List[asyncio.Future] = []
+        self._notify_lock = asyncio.Lock()
+        self._reader: Optional[asyncio.Task] = None
+
+    async def _connect(self):
+        import psycopg
+
+        return await psycopg.AsyncConnection.connect(
+            self.url, autocommit=True, application_name="TimeLeft-API-backplane"
+        )
+
+    async def start(self, deliver: DeliverCallback):
+        await super().start(deliver)
+        self._listen_conn = await self._connect()
+        self._notify_conn = await self._connect()
+        await self._listen_conn.execute(f"LISTEN {self._control_channel}")
+        self._reader = asyncio.create_task(self._read_loop())
+
+    async def stop(self):
+        if self._reader:
+            self._reader.cancel()
+        for conn in (self._listen_conn, self._notify_conn):
+            await self._close(conn)
+
+    @staticmethod
+    async def _close(conn):
+        if conn is not None:
+            try:
+                await conn.close()
+            except Exception:
+                pass
+
+    async def subscribe(self, user_id: int):
+        self._channels.add(user_id)
+        if user_id in self._listening:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # Interrupts the reader's poll so the LISTEN goes out now
+            await self._notify(self._control_channel, "")
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.SUBSCRIBE_TIMEOUT_SECONDS)
+        except Exception as e:
+            # The reader still LISTENs once it (or its connection) is back
+            logger.warning(f"Postgres backplane LISTEN for user {user_id} not confirmed: {e}")
+
+    async def unsubscribe(self, user_id: int):
+        # Applied at the reader's next poll; a stray message meanwhile finds no socket
+        self._channels.discard(user_id)
+
+    async def publish(self, user_id: int, payload: str) -> bool:
+        payload = self._wrap(payload)
+        if len(payload.encode()) > self.MAX_PAYLOAD_BYTES:
+            logger.error(f"Dropping websocket message for user {user_id}: payload too large for NOTIFY")
+            return False
+        await self._notify(user_channel(user_id), payload)
+        # NOTIFY can't tell us whether anyone was listening
+        return True
+
+    async def _notify(self, channel: str, payload: str):
+        async with self._notify_lock:
+            try:
+                await self._notify_conn.execute("SELECT pg_notify(%s, %s)", (channel, payload))
+            except Exception as e:
+                # One retry on a fresh connection; a second failure goes to the caller
+                logger.warning(f"Postgres backplane notify connection failed, reconnecting: {e}")
+                await self._close(self._notify_conn)
+                self._notify_conn = await self._connect()
+                await self._notify_conn.execute("SELECT pg_notify(%s, %s)", (channel, payload))
+
+    async def _sync_channels(self):
+        """Bring the listening connection's channels in line with the subscribed users"""
+        for user_id in self._channels - self._listening:
+            await self._listen_conn.execute(f"LISTEN {user_channel(user_id)}")
+            self._listening.add(user_id)
+        for user_id in self._listening - self._channels:
+            await self._listen_conn.execute(f"UNLISTEN {user_channel(user_id)}")
+            self._listening.discard(user_id)
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def _reconnect(self):
+        """Reopen both connections, retrying with backoff, and LISTEN everything again"""
+        delay = 1
+        while True:
+            try:
+                await self._close(self._listen_conn)
+                self._listen_conn = await self._connect()
+                async with self._notify_lock:
+                    await self._close(self._notify_conn)
+                    self._notify_conn = await self._connect()
+                await self._listen_conn.execute(f"LISTEN {self._control_channel}")
+                self._listening = set()
+                await self._sync_channels()
+                logger.info(f"Postgres backplane reconnected; listening for {len(self._listening)} users")
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Postgres backplane reconnect failed, retrying in {delay}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.RECONNECT_MAX_DELAY_SECONDS)
+
+    async def _read_loop(self):
+        while True:
+            try:
+                await self._sync_channels()
+                # stop_after=1 returns as soon as something arrives, keeping latency low
+                received = [
+                    n async for n in self._listen_conn.notifies(timeout=self.POLL_SECONDS, stop_after=1)
+                ]
+                for notify in received:
+                    if notify.channel == self._control_channel:
+                        continue
+                    user_id = int(notify.channel.rsplit("_", 1)[1])
+                    await self._receive(user_id, notify.payload)
+                await asyncio.sleep(0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Postgres backplane read error, reconnecting: {e}")
+                await self._reconnect()
+
+
+def create_backplane() -> Backplane:
+    """Backplane selected by WS_BACKPLANE ("memory", "redis" or "postgres")"""
+    if settings.WS_BACKPLANE == "redis":
+        return RedisBackplane(settings.REDIS_URL)
+    if settings.WS_BACKPLANE == "postgres":
+        return PostgresBackplane(settings.DATABASE_URL)
+    return InMemoryBackplane()
@@ -1,62 +1,484 @@
-from typing import Dict, List
-from fastapi import WebSocket
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Iterator, List, Optional, Set
+from fastapi import WebSocket, status
+import asyncio
 import json
 import logging
+import random
+import sys
+import time
+import uuid
+
+from app.core.config import settings
+from app.services.websocket_backplane import Backplane, create_backplane
 
 logger = logging.getLogger(__name__)
 
+# Typing indicators are superseded by the next one, so they are the first
+# thing shed under backpressure. Payloads are json.dumps'ed dicts whose first
+# key is "type", which lets a queued payload be classified without parsing it.
+TYPING_PREFIX = json.dumps({"type": "typing"})[:-1]
+
+SERVER_PING = json.dumps({"type": "ping", "data": {}})
+
+_stats = {
+    "typing_dropped": 0,
+    "messages_dropped": 0,
+    "slow_consumer_disconnects": 0,
+    "send_timeouts": 0,
+    "inbound_throttled": 0,
+    "flood_disconnects": 0,
+    "heartbeats_sent": 0,
+    "stale_reaped": 0,
+    "rejected_over_cap": 0,
+    "resumed": 0,
+    "resume_failed": 0,
+    "replayed_events": 0,
+}
+
+
+def _is_typing(payload: str) -> bool:
+    return payload.startswith(TYPING_PREFIX)
+
+
+class ReplayBuffer:
+    """A user's most recent events on this process, numbered for session resume.
+
+    Sequence numbers are per user and per buffer; `epoch` changes whenever a
+    buffer is recreated, so a client can't resume against numbers it never saw.
+    """
+
+    def __init__(self, size: int):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self.events: Deque[tuple] = deque(maxlen=size)
+        # When the user's last socket on this process went away; None while connected
+        self.parked_at: Optional[float] = None
+
+    def append(self, payload: str) -> str:
+        """Number an event and keep it. Returns the payload with "seq" added."""
+        self.seq += 1
+        # Append the key instead of re-serializing: payloads are JSON objects
+        stamped = f'{payload[:-1]}, "seq": {self.seq}}}'
+        self.events.append((self.seq, stamped))
+        return stamped
+
+    def since(self, last_seq: int) -> Optional[List[str]]:
+        """Events after `last_seq`, or None if some of them were already evicted"""
+        if last_seq > self.seq:
+            return None
+        oldest = self.events[0][0] if self.events else self.seq + 1
+        if last_seq < oldest - 1:
+            return None
+        return [payload for seq, payload in self.events if seq > last_seq]
+
+
+class ClientConnection:
+    """An accepted socket with its own bounded outbound queue and writer task.
+
+    Senders only enqueue, so a client that reads slowly can't stall the
+    handler that produced the message or any other recipient; the writer task
+    drains the queue at whatever pace the client manages.
+    """
+
+    def __init__(self, websocket: WebSocket, user_id: int, on_close: Callable[["ClientConnection"], Awaitable[None]]):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: Deque[str] = deque()
+        self._on_close = on_close
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self._closed = False
+        self._closing = False
+        # Inbound token bucket
+        self._tokens = float(settings.WS_INBOUND_BURST)
+        self._refilled_at = time.monotonic()
+        self.inbound_dropped = 0
+        # Heartbeat bookkeeping
+        self.connected_at = time.monotonic()
+        self.last_seen = self.connected_at
+        self.last_ping = 0.0
+
+    def touch(self):
+        """Record that the client is alive; any inbound frame counts"""
+        self.last_seen = time.monotonic()
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def shutdown(self):
+        """Stop the writer without touching the socket (it is already gone)"""
+        self._closed = True
+        self.queue.clear()
+        if self._writer and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+    async def close(self, code: int = status.WS_1000_NORMAL_CLOSURE):
+        """Close the socket from the server side and unregister it"""
+        if self._closing:
+            return
+        self._closing = True
+        self.shutdown()
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+        await self._on_close(self)
+
+    def enqueue(self, payload: str) -> bool:
+        """Queue a serialized message without waiting on the client"""
+        if self._closed:
+            return False
+
+        if len(self.queue) >= settings.WS_OUTBOUND_QUEUE_SIZE:
+            if _is_typing(payload):
+                _stats["typing_dropped"] += 1
+                return False
+
+            # Make room by shedding a queued typing indicator before anything else
+            for index, queued in enumerate(self.queue):
+                if _is_typing(queued):
+                    del self.queue[index]
+                    _stats["typing_dropped"] += 1
+                    break
+            else:
+                if settings.WS_SLOW_CONSUMER_POLICY == "drop":
+                    _stats["messages_dropped"] += 1
+                    return False
+
+                logger.warning(f"Disconnecting slow websocket consumer: user {self.user_id}")
+                _stats["slow_consumer_disconnects"] += 1
+                # Stop accepting frames now; the close itself needs the event loop
+                self.shutdown()
+                asyncio.create_task(self.close(status.WS_1013_TRY_AGAIN_LATER))
+                return False
+
+        self.queue.append(payload)
+        self._ready.set()
+        return True
+
+    def allow_inbound(self) -> bool:
+        """Take a token for an incoming frame; False means the frame should be dropped"""
+        now = time.monotonic()
+        self._tokens = min(
+            float(settings.WS_INBOUND_BURST),
+            self._tokens + (now - self._refilled_at) * settings.WS_INBOUND_RATE
+        )
+        self._refilled_at = now
+
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+
+        self.inbound_dropped += 1
+        _stats["inbound_throttled"] += 1
+        if self.inbound_dropped == settings.WS_INBOUND_MAX_DROPPED + 1:
+            _stats["flood_disconnects"] += 1
+        return False
+
+    @property
+    def flooding(self) -> bool:
+        """True once the client has kept sending past its rate long enough to be cut off"""
+        return self.inbound_dropped > settings.WS_INBOUND_MAX_DROPPED
+
+    async def _write_loop(self):
+        try:
+            while True:
+                await self._ready.wait()
+                while self.queue:
+                    payload = self.queue.popleft()
+                    await asyncio.wait_for(
+                        self.websocket.send_text(payload), timeout=settings.WS_SEND_TIMEOUT_SECONDS
+                    )
+                self._ready.clear()
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning(f"Websocket send to user {self.user_id} timed out")
+            _stats["send_timeouts"] += 1
+            await self.close(status.WS_1013_TRY_AGAIN_LATER)
+        except Exception as e:
+            logger.error(f"Error sending message to user {self.user_id}: {e}")
+            # Connection might be broken, remove it
+            await self.close(status.WS_1011_INTERNAL_ERROR)
+
+
 class ConnectionManager:
-    def __init__(self):
-        # Store active connections: {user_id: websocket}
-        self.active_connections: Dict[int, WebSocket] = {}
-    
-    async def connect(self, websocket: WebSocket, user_id: int):
-        """Accept a WebSocket connection and store it"""
+    def __init__(self, backplane: Optional[Backplane] = None):
+        # Store active connections: {user_id: {connection, ...}}, one per device
+        self.active_connections: Dict[int, Set[ClientConnection]] = {}
+        self.connection_count = 0
+        # Reaches sockets held by other workers/replicas
+        self.backplane = backplane or create_backplane()
+        # Replay buffers by user; they (and the backplane subscription) outlive
+        # the user's last socket by WS_RESUME_WINDOW_SECONDS
+        self.replay: Dict[int, ReplayBuffer] = {}
+        self._reaper: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the heartbeat reaper and the backplane; call once per process at startup"""
+        self._reaper = asyncio.create_task(self._reap_loop())
+        await self.backplane.start(self._deliver_local)
+
+    async def stop(self):
+        if self._reaper:
+            self._reaper.cancel()
+        for connection in list(self._all_connections()):
+            connection.shutdown()
+        await self.backplane.stop()
+
+    def _all_connections(self) -> Iterator[ClientConnection]:
+        for connections in self.active_connections.values():
+            yield from connections
+
+    def resume_token(self, user_id: int) -> str:
+        return f"{self.backplane.node_id}.{self.replay[user_id].epoch}"
+
+    def reconnect_delay_ms(self) -> int:
+        """Jittered delay a client should wait before reconnecting.
+
+        The spread grows with the sockets this process would shed at once, so
+        a restart is absorbed at about WS_RECONNECT_RATE clients per second.
+        """
+        spread = max(1.0, self.connection_count / settings.WS_RECONNECT_RATE)
+        return settings.WS_RECONNECT_MIN_DELAY_MS + int(random.uniform(0, spread) * 1000)
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        user_id: int,
+        resume_token: Optional[str] = None,
+        last_seq: Optional[int] = None
+    ) -> Optional[ClientConnection]:
+        """Accept a WebSocket connection and add it to the user's devices.
+
+        The first frame is a "session" event carrying a resume token, the
+        current sequence number and a jittered reconnect delay. A client that
+        reconnects with its previous token and last seen "seq" gets the missed
+        events replayed; "resumed": false means it must refetch over REST.
+
+        Returns None (after closing the socket with 1013) when this process is
+        already at WS_MAX_CONNECTIONS; the client should retry, ideally landing
+        on another worker.
+        """
         await websocket.accept()
-        
-        # Disconnect any existing connection for this user
-        if user_id in self.active_connections:
+
+        devices = self.active_connections.get(user_id, set())
+        if len(devices) >= settings.WS_MAX_DEVICES_PER_USER:
+            # Make room by retiring the user's oldest device
+            await min(devices, key=lambda c: c.connected_at).close()
+        elif self.connection_count >= settings.WS_MAX_CONNECTIONS:
+            logger.warning(f"Rejecting websocket for user {user_id}: connection cap reached")
+            _stats["rejected_over_cap"] += 1
             try:
-                await self.active_connections[user_id].close()
-            except:
+                await websocket.send_text(json.dumps({
+                    "type": "reconnect", "data": {"delay_ms": self.reconnect_delay_ms()}
+                }))
+            except Exception:
                 pass
-        
-        self.active_connections[user_id] = websocket
-        logger.info(f"User {user_id} connected. Total connections: {len(self.active_connections)}")
-    
-    def disconnect(self, user_id: int):
-        """Remove a user's connection"""
-        if user_id in self.active_connections:
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            return None
+
+        if user_id not in self.replay:
+            self.replay[user_id] = ReplayBuffer(settings.WS_REPLAY_BUFFER_SIZE)
+            await self.backplane.subscribe(user_id)
+        buffer = self.replay[user_id]
+        buffer.parked_at = None
+
+        # From here to registering the socket nothing awaits, so the replay
+        # can't interleave with new events
+        missed = None
+        if resume_token is not None and last_seq is not None and resume_token == self.resume_token(user_id):
+            missed = buffer.since(last_seq)
+        if resume_token is not None:
+            _stats["resumed" if missed is not None else "resume_failed"] += 1
+
+        connection = ClientConnection(websocket, user_id, self._on_connection_closed)
+        connection.enqueue(json.dumps({
+            "type": "session",
+            "data": {
+                "resume_token": self.resume_token(user_id),
+                "seq": buffer.seq,
+                "resumed": missed is not None,
+                "replayed": len(missed or ()),
+                "reconnect_delay_ms": self.reconnect_delay_ms()
+            }
+        }))
+        for payload in missed or ():
+            connection.enqueue(payload)
+        _stats["replayed_events"] += len(missed or ())
+        connection.start()
+        self.active_connections.setdefault(user_id, set()).add(connection)
+        self.connection_count += 1
+        logger.info(f"User {user_id} connected. Total connections: {self.connection_count}")
+        return connection
+
+    async def _on_connection_closed(self, connection: ClientConnection):
+        await self.disconnect(connection.user_id, connection.websocket)
+
+    async def disconnect(self, user_id: int, websocket: Optional[WebSocket] = None):
+        """Remove a user's connections.
+
+        When `websocket` is given only that device is removed; otherwise all of
+        the user's sockets on this process are.
+        """
+        devices = self.active_connections.get(user_id)
+        if not devices:
+            return
+
+        removed = [c for c in devices if websocket is None or c.websocket is websocket]
+        if not removed:
+            return
+
+        for connection in removed:
+            devices.discard(connection)
+            connection.shutdown()
+        self.connection_count -= len(removed)
+
+        if not devices:
             del self.active_connections[user_id]
-            logger.info(f"User {user_id} disconnected. Total connections: {len(self.active_connections)}")
-    
-    async def send_personal_message(self, message: dict, user_id: int):
-        """Send a message to a specific user"""
-        if user_id in self.active_connections:
-            try:
-                websocket = self.active_connections[user_id]
-                await websocket.send_text(json.dumps(message))
-                return True
-            except Exception as e:
-                logger.error(f"Error sending message to user {user_id}: {e}")
-                # Connection might be broken, remove it
-                self.disconnect(user_id)
-                return False
-        return False
-    
+            # Keep buffering for a while so a reconnecting client can resume
+            buffer = self.replay.get(user_id)
+            if buffer is not None:
+                buffer.parked_at = time.monotonic()
+            if settings.WS_RESUME_WINDOW_SECONDS <= 0:
+                await self._drop_replay(user_id)
+        logger.info(f"User {user_id} disconnected. Total connections: {self.connection_count}")
+
+    async def _drop_replay(self, user_id: int):
+        del self.replay[user_id]
+        try:
+            await self.backplane.unsubscribe(user_id)
+        except Exception as e:
+            logger.error(f"Error unsubscribing user {user_id} from backplane: {e}")
+
+    async def _deliver_local(self, user_id: int, payload: str, exclude: Optional[ClientConnection] = None) -> bool:
+        """Queue an already-serialized message on each of the user's sockets held by this process.
+
+        Everything but typing indicators is numbered and kept for replay, even
+        while the user is between connections.
+        """
+        buffer = self.replay.get(user_id)
+        if buffer is not None and not _is_typing(payload):
+            payload = buffer.append(payload)
+
+        delivered = False
+        for connection in list(self.active_connections.get(user_id, ())):
+            if connection is not exclude:
+                delivered = connection.enqueue(payload) or delivered
+        return delivered
+
+    async def send_payload(self, payload: str, user_id: int, exclude: Optional[ClientConnection] = None) -> bool:
+        """Send a serialized message to every device of a user, on any worker.
+
+        `exclude` skips one local socket, typically the device the event came from.
+        """
+        delivered = await self._deliver_local(user_id, payload, exclude)
+        try:
+            return await self.backplane.publish(user_id, payload) or delivered
+        except Exception as e:
+            logger.error(f"Error publishing message for user {user_id}: {e}")
+            return delivered
+
+    async def send_personal_message(self, message: dict, user_id: int, exclude: Optional[ClientConnection] = None):
+        """Send a message to a specific user, on whichever workers hold their sockets"""
+        return await self.send_payload(json.dumps(message), user_id, exclude)
+
     async def send_message_to_chat(self, message: dict, chat_participants: List[int], sender_id: int):
         """Send a message to all participants in a chat (except sender)"""
+        payload = json.dumps(message)
         for user_id in chat_participants:
             if user_id != sender_id:  # Don't send back to sender
-                await self.send_personal_message(message, user_id)
-    
+                await self.send_payload(payload, user_id)
+
     def is_user_online(self, user_id: int) -> bool:
-        """Check if a user is currently connected"""
+        """Check if a user has any device connected to this process"""
         return user_id in self.active_connections
-    
+
     def get_online_users(self) -> List[int]:
-        """Get list of all online user IDs"""
+        """Get list of user IDs connected to this process"""
         return list(self.active_connections.keys())
 
+    async def reap_stale(self) -> int:
+        """Ping idle sockets and close the ones that have missed their deadline.
+
+        Half-open TCP connections never error on their own, so without this
+        they would linger in active_connections and be reported as online.
+        """
+        now = time.monotonic()
+        stale = []
+        for connection in self._all_connections():
+            idle = now - connection.last_seen
+            if idle > settings.WS_HEARTBEAT_TIMEOUT_SECONDS:
+                stale.append(connection)
+            elif idle > settings.WS_HEARTBEAT_INTERVAL_SECONDS and now - connection.last_ping > settings.WS_HEARTBEAT_INTERVAL_SECONDS:
+                connection.last_ping = now
+                if connection.enqueue(SERVER_PING):
+                    _stats["heartbeats_sent"] += 1
+
+        for connection in stale:
+            await connection.close(status.WS_1001_GOING_AWAY)
+        _stats["stale_reaped"] += len(stale)
+
+        # Forget users whose resume window has passed
+        expired = [
+            user_id for user_id, buffer in self.replay.items()
+            if buffer.parked_at is not None and now - buffer.parked_at > settings.WS_RESUME_WINDOW_SECONDS
+        ]
+        for user_id in expired:
+            await self._drop_replay(user_id)
+        return len(stale)
+
+    async def _reap_loop(self):
+        # Scan a few times per interval so deadlines are enforced with little slack
+        period = min(settings.WS_HEARTBEAT_INTERVAL_SECONDS, settings.WS_HEARTBEAT_TIMEOUT_SECONDS) / 5
+        while True:
+            try:
+                await asyncio.sleep(period)
+                reaped = await self.reap_stale()
+                if reaped:
+                    logger.info(f"Reaped {reaped} stale websocket connections")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in websocket reaper: {e}")
+
+    def memory_report(self) -> Dict[str, int]:
+        """Approximate Python-side memory held per connection (excludes kernel socket buffers)"""
+        connections = list(self._all_connections())
+        if not connections:
+            return {"connections": 0, "bytes_per_connection": 0, "queued_bytes": 0, "replay_bytes": 0}
+
+        sample = connections[0]
+        fixed = (
+            sys.getsizeof(sample) + sys.getsizeof(sample.__dict__) + sys.getsizeof(sample.queue)
+            + sys.getsizeof(sample._ready) + sys.getsizeof(sample.websocket)
+            + sys.getsizeof(sample.websocket.__dict__)
+        )
+        queued = sum(sys.getsizeof(p) for c in connections for p in c.queue)
+        replay = sum(sys.getsizeof(p) for b in self.replay.values() for _, p in b.events)
+        return {
+            "connections": len(connections),
+            "bytes_per_connection": fixed + (queued + replay) // len(connections),
+            "queued_bytes": queued,
+            "replay_bytes": replay
+        }
+
+    def stats(self) -> Dict[str, float]:
+        depths = [len(c.queue) for c in self._all_connections()]
+        return {
+            "connections": len(depths),
+            "users": len(self.active_connections),
+            "replay_buffers": len(self.replay),
+            "parked_users": sum(1 for b in self.replay.values() if b.parked_at is not None),
+            "connection_limit": settings.WS_MAX_CONNECTIONS,
+            "queued_messages": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "queue_limit": settings.WS_OUTBOUND_QUEUE_SIZE,
+            "slow_consumer_policy": settings.WS_SLOW_CONSUMER_POLICY,
+            "memory": self.memory_report(),
+            **_stats
+        }
+
 # Global connection manager instance
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
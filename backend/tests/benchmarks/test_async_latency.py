@@ -0,0 +1,100 @@
+# backend/tests/benchmarks/test_async_latency.py
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.models.connection import Connection, ConnectionStatus
+from app.models.user import User
+from app.services.connection_service import ConnectionService
+
+CLIENTS = 200
+REQUESTS_PER_CLIENT = 5
+# Each client sends on its own fixed schedule, 100 req/s in aggregate
+CLIENT_INTERVAL_SECONDS = 2.0
+# Database time per request, so blocking the event loop has something to cost
+QUERY_SECONDS = 0.005
+
+
+def _emulate_pg_sleep(engine):
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _pg_sleep(dbapi_connection, connection_record):
+            dbapi_connection.create_function("pg_sleep", 1, time.sleep)
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def test_p99_latency_sync_against_async_sessions(db_engine, session_factory, report):
+    """The same handler on a sync Session (what the async def routes used to
+    do, blocking the event loop) and on an AsyncSession, under CLIENTS
+    concurrent clients"""
+    # postgresql+psycopg is psycopg 3 under both engines; sqlite needs the stdlib driver
+    drivername = "sqlite" if db_engine.dialect.name == "sqlite" else db_engine.url.drivername
+    sync_engine = create_engine(db_engine.url.set(drivername=drivername), poolclass=NullPool)
+    SyncSession = sessionmaker(bind=sync_engine)
+    _emulate_pg_sleep(sync_engine)
+    _emulate_pg_sleep(db_engine.sync_engine)
+
+    bench = FastAPI()
+
+    @bench.get("/sync/{user_id}")
+    async def blocking(user_id: int):
+        with SyncSession() as db:
+            db.execute(select(func.pg_sleep(QUERY_SECONDS)))
+            connections = db.execute(
+                select(Connection.receiver_id).where(Connection.sender_id == user_id)
+            ).scalars().all()
+        return {"connections": len(connections)}
+
+    @bench.get("/async/{user_id}")
+    async def non_blocking(user_id: int):
+        async with session_factory() as db:
+            await db.execute(select(func.pg_sleep(QUERY_SECONDS)))
+            connections = await ConnectionService.get_user_connections(db, user_id)
+        return {"connections": len(connections)}
+
+    async def seed():
+        async with session_factory() as db:
+            db.add_all([User(id=i, email=f"user{i}@example.com", display_name=f"User {i}") for i in range(1, 12)])
+            await db.flush()
+            db.add_all([Connection(sender_id=1, receiver_id=i, status=ConnectionStatus.ACCEPTED) for i in range(2, 12)])
+            await db.commit()
+
+    async def load(path: str):
+        """Latency is measured from when each request was due, not when the
+        client got to send it, so time spent waiting on a blocked loop counts"""
+        latencies = []
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=bench), base_url="http://bench") as client:
+            async def run_client(offset: float):
+                for n in range(REQUESTS_PER_CLIENT):
+                    due = started + offset + n * CLIENT_INTERVAL_SECONDS
+                    await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                    response = await client.get(path)
+                    latencies.append(time.perf_counter() - due)
+                    assert response.json() == {"connections": 10}
+
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                run_client(client * CLIENT_INTERVAL_SECONDS / CLIENTS) for client in range(CLIENTS)
+            ))
+            return latencies, time.perf_counter() - started
+
+    async def scenario():
+        await seed()
+        return {mode: await load(f"/{mode}/1") for mode in ("sync", "async")}
+
+    results = asyncio.run(scenario())
+    sync_engine.dispose()
+    for mode, (latencies, elapsed) in results.items():
+        report(
+            f"{mode}: p50 {_percentile(latencies, 0.5) * 1000:.0f} ms, p99 {_percentile(latencies, 0.99) * 1000:.0f} ms, "
+            f"{len(latencies) / elapsed:.0f} req/s ({CLIENTS} clients)"
+        )
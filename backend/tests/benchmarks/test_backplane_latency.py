@@ -0,0 +1,59 @@
+# backend/tests/benchmarks/test_backplane_latency.py
+import asyncio
+import os
+import statistics
+import time
+
+import pytest
+
+from app.services.websocket_backplane import InMemoryBackplane, InMemoryBus, PostgresBackplane, RedisBackplane
+
+MESSAGES = 1000
+
+
+def _nodes(kind: str):
+    if kind == "memory":
+        bus = InMemoryBus()
+        return InMemoryBackplane(bus), InMemoryBackplane(bus)
+    url = os.environ.get("TEST_DATABASE_URL" if kind == "postgres" else "TEST_REDIS_URL")
+    if not url:
+        pytest.skip(f"{kind} backplane needs a server URL")
+    factory = PostgresBackplane if kind == "postgres" else RedisBackplane
+    return factory(url), factory(url)
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+@pytest.mark.parametrize("kind", ["memory", "postgres", "redis"])
+def test_publish_to_delivery_latency(kind, report):
+    """Publish on one node, time until the other node's deliver callback runs"""
+    sender, receiver = _nodes(kind)
+
+    async def scenario():
+        latencies = []
+        arrived = asyncio.Event()
+
+        async def deliver(user_id, payload):
+            latencies.append(time.perf_counter() - float(payload))
+            arrived.set()
+
+        await sender.start(lambda user_id, payload: asyncio.sleep(0))
+        await receiver.start(deliver)
+        await receiver.subscribe(1)
+        for _ in range(MESSAGES):
+            arrived.clear()
+            await sender.publish(1, repr(time.perf_counter()))
+            await asyncio.wait_for(arrived.wait(), 5)
+        await sender.stop()
+        await receiver.stop()
+        return latencies
+
+    latencies = asyncio.run(scenario())
+    assert len(latencies) == MESSAGES
+    report(
+        f"p50 {statistics.median(latencies) * 1000:.3f} ms, "
+        f"p99 {_percentile(latencies, 0.99) * 1000:.3f} ms over {MESSAGES} messages"
+    )
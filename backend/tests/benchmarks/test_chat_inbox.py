@@ -0,0 +1,75 @@
+# backend/tests/benchmarks/test_chat_inbox.py
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import desc, func, insert, select
+
+from app.core.query_stats import query_budget
+from app.models.chat import Chat, Message
+from app.models.user import User
+from app.services.chat_service import ChatService
+
+CHATS = 500
+MESSAGES = 50_000
+LOADS = 20
+
+
+async def _legacy_inbox(db, user_id: int) -> list:
+    """What GET /api/chat/ used to do: the chats, then three queries per chat"""
+    inbox = []
+    for chat in await ChatService.get_user_chats(db, user_id):
+        other_user_id = chat.user2_id if chat.user1_id == user_id else chat.user1_id
+        other_user = (await db.execute(select(User).where(User.id == other_user_id))).scalar_one_or_none()
+        last_message = (await db.execute(
+            select(Message).where(Message.chat_id == chat.id).order_by(desc(Message.sent_at)).limit(1)
+        )).scalar_one_or_none()
+        unread_count = (await db.execute(
+            select(func.count(Message.id)).where(
+                Message.chat_id == chat.id, Message.sender_id != user_id, Message.is_read == False
+            )
+        )).scalar_one()
+        inbox.append((chat.id, other_user.display_name, last_message.id, unread_count))
+    return inbox
+
+
+@pytest.mark.postgres
+def test_inbox_of_five_hundred_chats(session_factory, report):
+    """User 1 chats with users 2..CHATS+1; MESSAGES spread evenly, every other one from user 1"""
+    async def scenario():
+        async with session_factory() as db:
+            await db.execute(insert(User), [
+                {"id": i, "email": f"user{i}@example.com", "display_name": f"User {i}"}
+                for i in range(1, CHATS + 2)
+            ])
+            await db.execute(insert(Chat), [
+                {"id": k, "user1_id": 1, "user2_id": k + 1} for k in range(1, CHATS + 1)
+            ])
+            sent_at = datetime.utcnow() - timedelta(days=1)
+            rows = [
+                {
+                    "chat_id": 1 + n % CHATS, "sender_id": 1 if n % 2 else 2 + n % CHATS,
+                    "content": f"Message {n}", "sent_at": sent_at + timedelta(milliseconds=n)
+                }
+                for n in range(MESSAGES)
+            ]
+            for start in range(0, MESSAGES, 10_000):
+                await db.execute(insert(Message), rows[start:start + 10_000])
+            await db.commit()
+
+        timings = {}
+        async with session_factory() as db:
+            for name, load in (("per-chat queries", _legacy_inbox), ("aggregated", ChatService.get_inbox)):
+                await load(db, 1)
+                with query_budget(10 ** 9) as stats:
+                    started = time.perf_counter()
+                    for _ in range(LOADS):
+                        inbox = await load(db, 1)
+                    timings[name] = ((time.perf_counter() - started) / LOADS, stats.count // LOADS, len(inbox))
+        return timings
+
+    timings = asyncio.run(scenario())
+    assert {chats for _, _, chats in timings.values()} == {CHATS}
+    for name, (seconds, queries, _) in timings.items():
+        report(f"{name}: {seconds * 1000:.1f} ms and {queries} queries per inbox load ({CHATS} chats, {MESSAGES} messages)")
@@ -0,0 +1,62 @@
+# backend/tests/benchmarks/test_group_commit.py
+import asyncio
+import statistics
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.models.chat import Chat
+from app.models.user import User
+from app.services import message_writer as message_writer_module
+from app.services.message_writer import GroupCommitWriter
+
+CHATS = 100
+SECONDS = 2
+TICK_SECONDS = 0.001
+
+
+@pytest.mark.parametrize("rate", [1000, 5000, 20000])
+def test_group_commit_under_offered_load(rate, session_factory, monkeypatch, report):
+    """Offer `rate` messages/s for SECONDS, spread over CHATS chats, and report what got committed"""
+    monkeypatch.setattr(message_writer_module, "AsyncSessionLocal", session_factory)
+
+    async def scenario():
+        async with session_factory() as db:
+            db.add_all([User(id=i, email=f"user{i}@example.com", display_name=f"User {i}") for i in range(1, CHATS + 2)])
+            db.add_all([Chat(id=i, user1_id=i, user2_id=i + 1, change_seq=i) for i in range(1, CHATS + 1)])
+            await db.commit()
+
+        writer = GroupCommitWriter(
+            window_ms=settings.CHAT_GROUP_COMMIT_WINDOW_MS,
+            max_batch=settings.CHAT_GROUP_COMMIT_MAX_BATCH
+        )
+        latencies = []
+
+        async def send(n: int):
+            started = time.perf_counter()
+            await writer.submit(1 + n % CHATS, 1 + n % CHATS, f"Message {n}")
+            latencies.append(time.perf_counter() - started)
+
+        sends, n = [], 0
+        started = time.perf_counter()
+        # Release messages on a fixed clock, catching up on ticks lost to slow loop turns
+        while n < rate * SECONDS:
+            due = min(rate * SECONDS, int((time.perf_counter() - started) * rate) + 1)
+            while n < due:
+                sends.append(asyncio.create_task(send(n)))
+                n += 1
+            await asyncio.sleep(TICK_SECONDS)
+        await asyncio.gather(*sends)
+        elapsed = time.perf_counter() - started
+        await writer.stop()
+        return writer, latencies, elapsed
+
+    writer, latencies, elapsed = asyncio.run(scenario())
+    assert writer.messages == rate * SECONDS and writer.failures == 0
+    latencies.sort()
+    report(
+        f"offered {rate} msg/s: committed {writer.messages / elapsed:.0f} msg/s, "
+        f"{writer.stats()['avg_batch_size']} per commit, "
+        f"latency p50 {statistics.median(latencies) * 1000:.1f} ms / p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms"
+    )
@@ -0,0 +1,61 @@
+# backend/tests/benchmarks/test_history_scroll.py
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.models.chat import Chat, Message
+from app.models.user import User
+from app.services.chat_service import ChatService
+
+MESSAGES = 100_000
+PAGE = 50
+# Offset pages are sampled at these depths; scrolling all of them would take minutes
+OFFSET_DEPTHS = (0, 25_000, 50_000, 75_000, MESSAGES - PAGE)
+SAMPLES = 5
+
+
+def test_scrolling_a_hundred_thousand_messages_deep(session_factory, report):
+    async def scenario():
+        async with session_factory() as db:
+            db.add_all([User(id=i, email=f"user{i}@example.com", display_name=f"User {i}") for i in (1, 2)])
+            db.add(Chat(id=1, user1_id=1, user2_id=2, change_seq=1))
+            await db.flush()
+            sent_at = datetime.utcnow() - timedelta(days=30)
+            rows = [
+                {"chat_id": 1, "sender_id": 1 + n % 2, "content": f"Message {n}", "sent_at": sent_at + timedelta(seconds=n)}
+                for n in range(MESSAGES)
+            ]
+            for start in range(0, MESSAGES, 20_000):
+                await db.execute(insert(Message), rows[start:start + 20_000])
+            await db.commit()
+
+        async with session_factory() as db:
+            # Keyset: the whole scroll, newest page first, timed page by page
+            keyset, seen = [], 0
+            page = await ChatService.get_chat_messages(db, 1, 1, limit=PAGE)
+            while page:
+                seen += len(page)
+                started = time.perf_counter()
+                page = await ChatService.get_chat_messages(db, 1, 1, limit=PAGE, before_id=page[0].id)
+                keyset.append((seen, time.perf_counter() - started))
+
+            offset = []
+            for depth in OFFSET_DEPTHS:
+                started = time.perf_counter()
+                for _ in range(SAMPLES):
+                    await ChatService.get_chat_messages(db, 1, 1, limit=PAGE, offset=depth)
+                offset.append((depth, (time.perf_counter() - started) / SAMPLES))
+        return seen, keyset, offset
+
+    seen, keyset, offset = asyncio.run(scenario())
+    assert seen == MESSAGES
+
+    def keyset_at(depth: int) -> float:
+        # Mean of the 20 pages around `depth`, to smooth out single slow pages
+        window = [seconds for at, seconds in keyset if abs(at - depth) <= 10 * PAGE]
+        return sum(window) / len(window)
+
+    for depth, seconds in offset:
+        report(f"{depth:>6} deep: before_id {keyset_at(depth) * 1000:.2f} ms, offset {seconds * 1000:.2f} ms per {PAGE}-message page")
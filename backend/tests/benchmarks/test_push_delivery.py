@@ -0,0 +1,71 @@
+# backend/tests/benchmarks/test_push_delivery.py
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import event, func, insert, select
+
+from app.core.config import settings
+from app.models.push_outbox import PushOutbox, PushOutboxStatus
+from app.models.user import User
+from app.services import push_outbox_service
+from app.services.push_notification_service import FakePushSender
+from app.services.push_outbox_service import PushOutboxService
+from conftest import TEST_DATABASE_URL
+
+USERS = 2000
+PUSHES = 20_000
+# Per-batch round trip of the fake sender, roughly an FCM send_each call
+LATENCY_SECONDS = 0.05
+
+
+@pytest.mark.parametrize("workers", [1, 2, 4])
+def test_outbox_delivery_throughput(db_engine, session_factory, monkeypatch, workers, report):
+    """Drain PUSHES outbox rows with `workers` concurrent workers and the fake FCM sender"""
+    if not TEST_DATABASE_URL:
+        # sqlite ignores FOR UPDATE SKIP LOCKED; serialize claims instead
+        @event.listens_for(db_engine.sync_engine, "connect")
+        def _manual_transactions(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(db_engine.sync_engine, "begin")
+        def _begin_immediate(connection):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    monkeypatch.setattr(push_outbox_service, "AsyncSessionLocal", session_factory)
+    sender = FakePushSender(latency_seconds=LATENCY_SECONDS, unregistered_tokens={"token-1"})
+
+    async def scenario():
+        async with session_factory() as db:
+            await db.execute(insert(User), [
+                {"id": i, "email": f"user{i}@example.com", "display_name": f"User {i}", "fcm_token": f"token-{i}"}
+                for i in range(1, USERS + 1)
+            ])
+            await db.commit()
+        async with session_factory() as db:
+            for n in range(PUSHES):
+                PushOutboxService.enqueue(db, user_id=1 + n % USERS, title="Hello", body=f"Push {n}")
+            await db.commit()
+
+        async def worker():
+            while await PushOutboxService.process_batch(sender):
+                pass
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        elapsed = time.perf_counter() - started
+
+        async with session_factory() as db:
+            result = await db.execute(select(PushOutbox.status, func.count(PushOutbox.id)).group_by(PushOutbox.status))
+            statuses = dict(result.all())
+        return statuses, elapsed
+
+    statuses, elapsed = asyncio.run(scenario())
+    # The user with the unregistered token has their pushes dropped, not retried
+    unregistered = PUSHES // USERS
+    assert len(sender.sent) == PUSHES - unregistered
+    assert statuses[PushOutboxStatus.SENT] == PUSHES - unregistered
+    report(
+        f"{workers} worker(s): {len(sender.sent) / elapsed:.0f} pushes/s in batches of "
+        f"{settings.PUSH_OUTBOX_BATCH_SIZE} at {LATENCY_SECONDS * 1000:.0f} ms per batch"
+    )
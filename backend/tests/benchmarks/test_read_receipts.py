@@ -0,0 +1,87 @@
+# backend/tests/benchmarks/test_read_receipts.py
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, text, update
+
+from app.models.chat import Chat, Message
+from app.models.user import User
+from app.services.chat_service import ChatService
+
+CHATS = 200
+ROUNDS = 10
+MESSAGES_PER_ROUND = 20
+
+
+async def _legacy_mark_read(db, chat_id: int, user_id: int) -> int:
+    """What mark_messages_as_read used to do: flip is_read on every unread row"""
+    result = await db.execute(
+        update(Message)
+        .where(Message.chat_id == chat_id, Message.sender_id != user_id, Message.is_read == False)
+        .values(is_read=True)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def _watermark_mark_read(db, chat_id: int, user_id: int) -> int:
+    await ChatService.mark_messages_as_read(db, chat_id, user_id)
+    return 1
+
+
+@pytest.mark.postgres
+def test_write_volume_of_read_receipts(session_factory, report):
+    """User 1 has CHATS chats per approach. Each round every chat gets
+    MESSAGES_PER_ROUND messages and user 1 then opens it"""
+    approaches = {"per-row is_read": (_legacy_mark_read, 0), "watermark": (_watermark_mark_read, CHATS)}
+
+    async def scenario():
+        async with session_factory() as db:
+            await db.execute(insert(User), [
+                {"id": i, "email": f"user{i}@example.com", "display_name": f"User {i}"}
+                for i in range(1, 2 * CHATS + 2)
+            ])
+            await db.execute(insert(Chat), [
+                {"id": k, "user1_id": 1, "user2_id": k + 1} for k in range(1, 2 * CHATS + 1)
+            ])
+            await db.commit()
+
+        results = {}
+        async with session_factory() as db:
+            for name, (mark_read, first_chat) in approaches.items():
+                rows = wal_bytes = seconds = 0
+                chat_ids = range(first_chat + 1, first_chat + CHATS + 1)
+                for _ in range(ROUNDS):
+                    await db.execute(insert(Message), [
+                        {"chat_id": chat_id, "sender_id": chat_id + 1, "content": "Hello", "sent_at": datetime.utcnow()}
+                        for chat_id in chat_ids for _ in range(MESSAGES_PER_ROUND)
+                    ])
+                    await db.commit()
+
+                    wal_start = (await db.execute(text("SELECT pg_current_wal_lsn()"))).scalar_one()
+                    started = time.perf_counter()
+                    for chat_id in chat_ids:
+                        rows += await mark_read(db, chat_id, 1)
+                    seconds += time.perf_counter() - started
+                    wal_bytes += (await db.execute(
+                        text("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), :start)"), {"start": wal_start}
+                    )).scalar_one()
+                    await db.commit()
+
+                results[name] = (rows, int(wal_bytes), seconds)
+            # Unread counts come from the watermarks
+            unread = {row.Chat.id: row.unread_count for row in await ChatService.get_inbox(db, 1)}
+        return results, unread
+
+    results, unread = asyncio.run(scenario())
+    assert [unread[chat_id] for chat_id in range(CHATS + 1, 2 * CHATS + 1)] == [0] * CHATS
+    reads = CHATS * ROUNDS
+    assert results["per-row is_read"][0] == reads * MESSAGES_PER_ROUND
+    assert results["watermark"][0] == reads
+    for name, (rows, wal_bytes, seconds) in results.items():
+        report(
+            f"{name}: {rows} rows and {wal_bytes / 1024:.0f} KiB of WAL written for {reads} chat opens, "
+            f"{seconds / reads * 1000:.2f} ms per open"
+        )
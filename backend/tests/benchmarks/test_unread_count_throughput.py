@@ -0,0 +1,34 @@
+# backend/tests/benchmarks/test_unread_count_throughput.py
+import asyncio
+import time
+
+import pytest
+
+from app.core.user_cache import user_cache
+from app.models.user import User
+from app.services.counter_service import UnreadCounterService
+
+REQUESTS = 2000
+
+
+@pytest.mark.parametrize("cached", [True, False], ids=["warm-cache", "no-cache"])
+def test_unread_count_requests_per_second(client, session_factory, auth_headers, cached, report):
+    async def seed():
+        async with session_factory() as db:
+            db.add(User(id=1, email="user1@example.com", display_name="User 1"))
+            await db.flush()
+            await UnreadCounterService.adjust(db, notifications={1: 7})
+            await db.commit()
+
+    asyncio.run(seed())
+    headers = auth_headers(1)
+
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        if not cached:
+            user_cache.clear()
+        response = client.get("/api/notifications/unread-count", headers=headers)
+    elapsed = time.perf_counter() - started
+
+    assert response.json() == {"unread_count": 7}
+    report(f"{REQUESTS / elapsed:.0f} req/s, {elapsed / REQUESTS * 1000:.2f} ms/request (one client)")
@@ -0,0 +1,66 @@
+# backend/tests/benchmarks/test_unread_counters.py
+import asyncio
+import time
+
+from sqlalchemy import func, insert, select
+
+from app.core.config import settings
+from app.models.notification import Notification, NotificationType
+from app.models.user import User
+from app.services import background_service
+from app.services.background_service import BackgroundTaskService
+from app.services.counter_service import UnreadCounterService
+
+USERS = 1000
+NOTIFICATIONS = 1_000_000
+LOOKUPS = 1000
+
+
+def test_badge_lookup_against_count_over_a_million_notifications(session_factory, monkeypatch, report):
+    monkeypatch.setattr(background_service, "AsyncSessionLocal", session_factory)
+
+    async def scenario():
+        async with session_factory() as db:
+            await db.execute(insert(User), [
+                {"id": i, "email": f"user{i}@example.com", "display_name": f"User {i}"}
+                for i in range(1, USERS + 1)
+            ])
+            rows = [
+                {
+                    "user_id": 1 + n % USERS, "type": NotificationType.ANNOUNCEMENT.value,
+                    "title": "Hello", "message": "Hello", "is_read": n % 3 == 0
+                }
+                for n in range(NOTIFICATIONS)
+            ]
+            for start in range(0, NOTIFICATIONS, 50_000):
+                await db.execute(insert(Notification), rows[start:start + 50_000])
+            await db.commit()
+
+        started = time.perf_counter()
+        await BackgroundTaskService.repair_unread_counters()
+        repair_seconds = time.perf_counter() - started
+
+        async with session_factory() as db:
+            started = time.perf_counter()
+            for n in range(LOOKUPS):
+                counted = (await db.execute(
+                    select(func.count(Notification.id))
+                    .where(Notification.user_id == 1 + n % USERS, Notification.is_read == False)
+                )).scalar_one()
+            count_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for n in range(LOOKUPS):
+                maintained, _ = await UnreadCounterService.get(db, 1 + n % USERS)
+            counter_seconds = time.perf_counter() - started
+        return counted, maintained, repair_seconds, count_seconds, counter_seconds
+
+    counted, maintained, repair_seconds, count_seconds, counter_seconds = asyncio.run(scenario())
+    assert counted == maintained
+    report(
+        f"{NOTIFICATIONS} notifications over {USERS} users: "
+        f"COUNT(*) {count_seconds / LOOKUPS * 1000:.3f} ms/badge, "
+        f"counter {counter_seconds / LOOKUPS * 1000:.3f} ms/badge, "
+        f"full repair {repair_seconds:.1f} s "
+        f"({settings.COUNTER_REPAIR_BATCH_SIZE} users per batch)"
+    )
@@ -0,0 +1,54 @@
+# backend/tests/benchmarks/test_websocket_fanout.py
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.websocket_backplane import InMemoryBackplane, InMemoryBus
+from app.services.websocket_service import ConnectionManager
+
+MESSAGES = 2000
+
+
+class CountingWebSocket:
+    def __init__(self):
+        self.received = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload: str):
+        self.received += 1
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+@pytest.mark.parametrize("devices", [1, 3, 5])
+def test_fan_out_cost_per_device(devices, monkeypatch, report):
+    """Time from the first send until every device has written every message"""
+    monkeypatch.setattr(settings, "WS_MAX_DEVICES_PER_USER", devices)
+    monkeypatch.setattr(settings, "WS_OUTBOUND_QUEUE_SIZE", MESSAGES + 1)
+
+    async def scenario():
+        manager = ConnectionManager(backplane=InMemoryBackplane(InMemoryBus()))
+        sockets = [CountingWebSocket() for _ in range(devices)]
+        for websocket in sockets:
+            await manager.connect(websocket, user_id=1)
+        payload = json.dumps({"type": "new_message", "data": {"content": "x" * 200}})
+
+        started = time.perf_counter()
+        for _ in range(MESSAGES):
+            await manager.send_payload(payload, 1)
+        enqueued = time.perf_counter() - started
+        while any(websocket.received < MESSAGES + 1 for websocket in sockets):
+            await asyncio.sleep(0.001)
+        return enqueued, time.perf_counter() - started
+
+    enqueued, delivered = asyncio.run(scenario())
+    report(
+        f"{devices} device(s): send {enqueued / MESSAGES * 1e6:.1f} us/message, "
+        f"delivered to all in {delivered / MESSAGES * 1e6:.1f} us/message"
+    )
@@ -0,0 +1,77 @@
+# backend/tests/benchmarks/test_websocket_sends.py
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.chat_cache import chat_cache
+from app.core.query_stats import query_budget
+from app.core.query_stats import instrument_engine
+from app.core.user_cache import user_cache
+from app.models.chat import Chat, Message
+from app.models.user import User
+from app.routers import websocket as websocket_router
+
+CHATS = 1000
+MESSAGES_PER_CHAT = 5
+
+
+@pytest.mark.parametrize("cached", [True, False], ids=["warm-cache", "no-cache"])
+def test_websocket_sends_per_second_over_a_thousand_chats(db_engine, monkeypatch, cached, report):
+    """One sender per chat, all CHATS sending at once through the websocket
+    message handler, sharing a pool sized like production's (5 + 10 overflow)"""
+    engine = create_async_engine(
+        db_engine.url,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=5,
+        max_overflow=10,
+        pool_timeout=120,
+        **({"connect_args": {"timeout": 60}} if db_engine.dialect.name == "sqlite" else {})
+    )
+    instrument_engine(engine.sync_engine)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    monkeypatch.setattr(websocket_router, "AsyncSessionLocal", session_factory)
+
+    async def scenario():
+        async with session_factory() as db:
+            await db.execute(insert(User), [
+                {"id": i, "email": f"user{i}@example.com", "display_name": f"User {i}"}
+                for i in range(1, 2 * CHATS + 1)
+            ])
+            await db.execute(insert(Chat), [
+                {"id": k, "user1_id": 2 * k - 1, "user2_id": 2 * k, "change_seq": k}
+                for k in range(1, CHATS + 1)
+            ])
+            await db.commit()
+
+        async def sender(chat_id: int):
+            for n in range(MESSAGES_PER_CHAT):
+                if not cached:
+                    chat_cache.invalidate(chat_id)
+                    user_cache.invalidate(2 * chat_id - 1)
+                await websocket_router.handle_message(
+                    {"chat_id": chat_id, "content": f"Message {n}"}, sender_id=2 * chat_id - 1
+                )
+
+        # Warm the caches the way a first message per chat would
+        await asyncio.gather(*(websocket_router.handle_message(
+            {"chat_id": chat_id, "content": "Hello"}, sender_id=2 * chat_id - 1
+        ) for chat_id in range(1, CHATS + 1)))
+
+        with query_budget(10 ** 9) as stats:
+            started = time.perf_counter()
+            await asyncio.gather(*(sender(chat_id) for chat_id in range(1, CHATS + 1)))
+            elapsed = time.perf_counter() - started
+
+        async with session_factory() as db:
+            stored = (await db.execute(select(func.count(Message.id)))).scalar_one()
+        await engine.dispose()
+        return stored, stats.count, elapsed
+
+    stored, queries, elapsed = asyncio.run(scenario())
+    sent = CHATS * MESSAGES_PER_CHAT
+    assert stored == CHATS + sent
+    report(f"{sent / elapsed:.0f} msg/s, {queries / sent:.1f} statements per send ({CHATS} concurrent chats)")
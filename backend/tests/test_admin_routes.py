@@ -0,0 +1,63 @@
+# backend/tests/test_admin_routes.py
+import asyncio
+
+import pytest
+from sqlalchemy import update
+
+from app.core.user_cache import user_cache
+from app.models.user import User
+
+
+@pytest.fixture
+def users(session_factory):
+    """User 1 is an admin, user 2 is not"""
+    async def seed():
+        async with session_factory() as db:
+            db.add_all([
+                User(id=1, email="admin@example.com", display_name="Admin", is_admin=True),
+                User(id=2, email="user@example.com", display_name="User")
+            ])
+            await db.commit()
+
+    asyncio.run(seed())
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/api/dinners/admin/send-to-dinner", {"dinner_id": 999, "title": "Hi", "message": "Hello"}),
+    ("/api/dinners/admin/send-to-booking", {"booking_id": 999, "title": "Hi", "message": "Hello"}),
+])
+def test_dinner_broadcasts_are_admin_only(client, users, auth_headers, path, params):
+    assert client.post(path, params=params, headers=auth_headers(2)).status_code == 403
+    # Admins get past the guard (and on to the missing dinner/booking)
+    assert client.post(path, params=params, headers=auth_headers(1)).status_code == 404
+
+
+@pytest.mark.parametrize("method, path, body, admin_status", [
+    ("post", "/api/admin/campaigns/", {"title": "News", "message": "Hello"}, 201),
+    ("get", "/api/admin/campaigns/", None, 200),
+    ("get", "/api/admin/campaigns/999", None, 404),
+    ("post", "/api/admin/campaigns/999/cancel", None, 400),
+    ("post", "/api/admin/campaigns/999/resume", None, 400),
+])
+def test_campaign_routes_are_admin_only(client, users, auth_headers, method, path, body, admin_status):
+    request = getattr(client, method)
+    kwargs = {"json": body} if body else {}
+    assert request(path, headers=auth_headers(2), **kwargs).status_code == 403
+    assert request(path, headers=auth_headers(1), **kwargs).status_code == admin_status
+
+
+@pytest.mark.parametrize("change", [{"is_admin": False}, {"is_active": False}])
+def test_admin_revoked_elsewhere_loses_access_despite_the_cache(client, users, auth_headers, session_factory, change):
+    assert client.get("/api/admin/campaigns/", headers=auth_headers(1)).status_code == 200
+    assert user_cache.get(1).is_admin
+
+    async def revoke():
+        # As another worker would: no invalidation reaches this process's cache
+        async with session_factory() as db:
+            await db.execute(update(User).where(User.id == 1).values(**change))
+            await db.commit()
+
+    asyncio.run(revoke())
+    assert client.get("/api/admin/campaigns/", headers=auth_headers(1)).status_code == 403
+    # The stale snapshot was dropped along the way
+    assert user_cache.get(1) is None
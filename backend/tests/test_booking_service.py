@@ -0,0 +1,132 @@
+# backend/tests/test_booking_service.py
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, func
+
+from app.core.exceptions import ValidationError
+from app.models.booking import Booking, BookingStatus
+from app.models.dinner import Dinner
+from app.models.user import User
+from app.services.booking_service import BookingService
+
+
+async def _seed(session_factory, users: int, seats: int) -> int:
+    async with session_factory() as db:
+        db.add_all([User(email=f"user{i}@example.com", display_name=f"User {i}") for i in range(users)])
+        dinner = Dinner(
+            title="Test dinner",
+            location="Somewhere",
+            date=datetime.utcnow() + timedelta(days=1),
+            max_attendees=seats
+        )
+        db.add(dinner)
+        await db.commit()
+        return dinner.id
+
+
+async def _seat_state(session_factory, dinner_id: int):
+    async with session_factory() as db:
+        dinner = await db.get(Dinner, dinner_id)
+        confirmed = await db.scalar(
+            select(func.count(Booking.id)).where(
+                Booking.dinner_id == dinner_id,
+                Booking.status == BookingStatus.CONFIRMED
+            )
+        )
+        return dinner.confirmed_count, confirmed
+
+
+def test_concurrent_bookings_never_overbook(session_factory, report):
+    users = 500
+
+    async def scenario():
+        dinner_id = await _seed(session_factory, users=users, seats=6)
+
+        async def book(user_id: int) -> bool:
+            async with session_factory() as db:
+                try:
+                    await BookingService.reserve_seat(db, dinner_id, user_id)
+                    return True
+                except ValidationError:
+                    return False
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(book(user_id) for user_id in range(1, users + 1)))
+        elapsed = time.perf_counter() - started
+        return sum(results), elapsed, await _seat_state(session_factory, dinner_id)
+
+    booked, elapsed, (confirmed_count, confirmed) = asyncio.run(scenario())
+    assert booked == 6
+    assert confirmed_count == confirmed == 6
+    report(f"{users} concurrent bookings for 6 seats in {elapsed:.2f} s ({users / elapsed:.0f} attempts/s)")
+
+
+def test_duplicate_booking_rejected_without_taking_a_seat(session_factory):
+    async def scenario():
+        dinner_id = await _seed(session_factory, users=1, seats=6)
+        async with session_factory() as db:
+            await BookingService.reserve_seat(db, dinner_id, 1)
+        async with session_factory() as db:
+            with pytest.raises(ValidationError):
+                await BookingService.reserve_seat(db, dinner_id, 1)
+        return await _seat_state(session_factory, dinner_id)
+
+    assert asyncio.run(scenario()) == (1, 1)
+
+
+def test_racing_removals_release_one_seat(session_factory):
+    async def scenario():
+        dinner_id = await _seed(session_factory, users=2, seats=6)
+        for user_id in (1, 2):
+            async with session_factory() as db:
+                await BookingService.reserve_seat(db, dinner_id, user_id)
+
+        # Both requests loaded the booking while it was still confirmed
+        async with session_factory() as first, session_factory() as second:
+            booking_a = await first.get(Booking, 1)
+            booking_b = await second.get(Booking, 1)
+            await BookingService.remove_booking(first, booking_a)
+            await BookingService.remove_booking(second, booking_b)
+        return await _seat_state(session_factory, dinner_id)
+
+    assert asyncio.run(scenario()) == (1, 1)
+
+
+def test_removing_a_cancelled_booking_keeps_the_seat_count(session_factory):
+    async def scenario():
+        dinner_id = await _seed(session_factory, users=2, seats=6)
+        for user_id in (1, 2):
+            async with session_factory() as db:
+                await BookingService.reserve_seat(db, dinner_id, user_id)
+
+        async with session_factory() as first, session_factory() as second:
+            booking_a = await first.get(Booking, 1)
+            booking_b = await second.get(Booking, 1)
+            assert await BookingService.cancel_booking(first, booking_a)
+            # Stale copy still says CONFIRMED; the deleted row says CANCELLED
+            await BookingService.remove_booking(second, booking_b)
+        return await _seat_state(session_factory, dinner_id)
+
+    assert asyncio.run(scenario()) == (1, 1)
+
+
+def test_removing_a_pending_booking_releases_its_seat(session_factory):
+    async def scenario():
+        dinner_id = await _seed(session_factory, users=2, seats=6)
+        for user_id in (1, 2):
+            async with session_factory() as db:
+                await BookingService.reserve_seat(db, dinner_id, user_id)
+        async with session_factory() as db:
+            booking = await db.get(Booking, 1)
+            booking.status = BookingStatus.PENDING
+            await db.commit()
+
+        async with session_factory() as db:
+            await BookingService.remove_booking(db, await db.get(Booking, 1))
+        return await _seat_state(session_factory, dinner_id)
+
+    # PENDING bookings hold a seat too (see ACTIVE_BOOKING_STATUSES)
+    assert asyncio.run(scenario()) == (1, 1)
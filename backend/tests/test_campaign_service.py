@@ -0,0 +1,129 @@
+# backend/tests/test_campaign_service.py
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.models.campaign import Campaign, CampaignStatus
+from app.models.notification import Notification
+from app.models.user import User
+from app.services import campaign_service
+from app.services.campaign_service import CampaignService
+from app.services.notification_service import NotificationService
+
+USERS = 10
+
+
+@pytest.fixture
+def campaigns(session_factory, monkeypatch):
+    """USERS users and one pending campaign to all of them, sent 3 at a time"""
+    monkeypatch.setattr(campaign_service, "AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(settings, "CAMPAIGN_CHUNK_SIZE", 3)
+    monkeypatch.setattr(settings, "CAMPAIGN_PUSH_RATE", 1_000_000)
+
+    async def seed():
+        async with session_factory() as db:
+            db.add_all([User(id=i, email=f"user{i}@example.com", display_name=f"User {i}") for i in range(1, USERS + 1)])
+            db.add(Campaign(id=1, title="News", message="Hello", segment={}, send_push=False))
+            await db.commit()
+
+    asyncio.run(seed())
+    return session_factory
+
+
+async def _state(session_factory):
+    async with session_factory() as db:
+        campaign = await db.get(Campaign, 1)
+        recipients = (await db.execute(select(Notification.user_id))).scalars().all()
+    return campaign, Counter(recipients)
+
+
+def _stop_after_chunks(monkeypatch, chunks: int, error: BaseException):
+    """Make the notification write of chunk `chunks + 1` raise `error`, once"""
+    original = NotificationService.create_notifications_bulk
+    calls = []
+
+    async def bulk(db, *args, **kwargs):
+        calls.append(1)
+        if len(calls) == chunks + 1:
+            raise error
+        return await original(db, *args, **kwargs)
+
+    monkeypatch.setattr(NotificationService, "create_notifications_bulk", bulk)
+
+
+def test_runner_that_died_is_resumed_from_its_checkpoint_after_the_lease(campaigns, monkeypatch):
+    _stop_after_chunks(monkeypatch, 2, asyncio.CancelledError())
+
+    async def scenario():
+        async with campaigns() as db:
+            claimed = await CampaignService.claim_next(db)
+        with pytest.raises(asyncio.CancelledError):
+            await CampaignService.run(claimed)
+        died, _ = await _state(campaigns)
+
+        # The lease is still held, so nobody takes it over yet
+        async with campaigns() as db:
+            too_early = await CampaignService.claim_next(db)
+            await db.execute(update(Campaign).values(
+                heartbeat_at=datetime.utcnow() - timedelta(seconds=settings.CAMPAIGN_LEASE_SECONDS + 1)
+            ))
+            await db.commit()
+        async with campaigns() as db:
+            taken_over = await CampaignService.claim_next(db)
+        await CampaignService.run(taken_over)
+        return claimed, died, too_early, taken_over, await _state(campaigns)
+
+    claimed, died, too_early, taken_over, (campaign, recipients) = asyncio.run(scenario())
+    assert (died.status, died.last_user_id, died.recipients) == (CampaignStatus.RUNNING, 6, 6)
+    assert too_early is None and taken_over == claimed == 1
+    assert campaign.status == CampaignStatus.COMPLETED
+    assert (campaign.last_user_id, campaign.recipients) == (USERS, USERS)
+    # Every user got the announcement exactly once across both runners
+    assert recipients == {user_id: 1 for user_id in range(1, USERS + 1)}
+
+
+def test_failed_campaign_resumes_without_repeating_committed_chunks(campaigns, monkeypatch):
+    _stop_after_chunks(monkeypatch, 1, RuntimeError("database went away"))
+
+    async def scenario():
+        async with campaigns() as db:
+            await CampaignService.run(await CampaignService.claim_next(db))
+        failed, _ = await _state(campaigns)
+
+        async with campaigns() as db:
+            resumed = await CampaignService.set_status(
+                db, 1, CampaignStatus.PENDING, allowed=[CampaignStatus.FAILED, CampaignStatus.CANCELLED]
+            )
+        async with campaigns() as db:
+            await CampaignService.run(await CampaignService.claim_next(db))
+        return failed, resumed, await _state(campaigns)
+
+    failed, resumed, (campaign, recipients) = asyncio.run(scenario())
+    # The failing chunk rolled back along with its checkpoint
+    assert (failed.status, failed.last_user_id, failed.last_error) == (CampaignStatus.FAILED, 3, "database went away")
+    assert resumed
+    assert (campaign.status, campaign.recipients, campaign.last_error) == (CampaignStatus.COMPLETED, USERS, None)
+    assert recipients == {user_id: 1 for user_id in range(1, USERS + 1)}
+
+
+def test_runner_that_lost_its_lease_writes_nothing(campaigns):
+    async def scenario():
+        async with campaigns() as db:
+            await CampaignService.claim_next(db)
+            stale = await db.get(Campaign, 1)
+        chunk = await CampaignService._next_chunk(stale)
+        async with campaigns() as db:
+            # Another runner took over and checkpointed past this one
+            await db.execute(update(Campaign).values(last_user_id=3, recipients=3))
+            await db.commit()
+        sent = await CampaignService._send_chunk(stale, chunk)
+        return sent, await _state(campaigns)
+
+    sent, (campaign, recipients) = asyncio.run(scenario())
+    assert sent is False
+    assert (campaign.last_user_id, campaign.recipients) == (3, 3)
+    assert recipients == {}
@@ -0,0 +1,88 @@
+# backend/tests/test_chat_service.py
+import asyncio
+from datetime import datetime, timedelta
+
+from app.core.chat_cache import chat_cache
+from app.core.query_stats import query_budget
+from app.models.chat import Chat, Message
+from app.models.user import User
+from app.services.chat_service import ChatService
+
+
+async def _seed_chat(session_factory, messages: int) -> int:
+    """Users 1-3, a chat between 1 and 2, and `messages` alternating messages in it"""
+    async with session_factory() as db:
+        db.add_all([User(id=i, email=f"user{i}@example.com", display_name=f"User {i}") for i in (1, 2, 3)])
+        chat = Chat(user1_id=1, user2_id=2, change_seq=1)
+        db.add(chat)
+        await db.flush()
+        sent_at = datetime.utcnow() - timedelta(hours=1)
+        db.add_all([
+            Message(chat_id=chat.id, sender_id=1 + n % 2, content=f"Message {n}", sent_at=sent_at + timedelta(seconds=n))
+            for n in range(messages)
+        ])
+        await db.commit()
+        return chat.id
+
+
+def test_history_pages_by_message_id(session_factory):
+    async def scenario():
+        chat_id = await _seed_chat(session_factory, 25)
+        pages = []
+        async with session_factory() as db:
+            page = await ChatService.get_chat_messages(db, chat_id, user_id=1, limit=10)
+            while page:
+                pages.append([message.id for message in page])
+                page = await ChatService.get_chat_messages(db, chat_id, user_id=1, limit=10, before_id=page[0].id)
+
+            newer = await ChatService.get_chat_messages(db, chat_id, user_id=2, limit=10, after_id=20)
+            outsider = await ChatService.get_chat_messages(db, chat_id, user_id=3, limit=10)
+        return pages, [message.id for message in newer], outsider
+
+    pages, newer, outsider = asyncio.run(scenario())
+    # Newest page first, each page in chronological order, no gaps or repeats
+    assert pages == [list(range(16, 26)), list(range(6, 16)), list(range(1, 6))]
+    assert newer == [21, 22, 23, 24, 25]
+    assert outsider == []
+
+
+def test_sender_profiles_resolved_in_one_query(session_factory):
+    async def scenario():
+        chat_id = await _seed_chat(session_factory, 25)
+        async with session_factory() as db:
+            page = await ChatService.get_chat_messages(db, chat_id, user_id=1, limit=25)
+            with query_budget(1):
+                profiles = await ChatService.get_sender_profiles(db, {message.sender_id for message in page})
+            with query_budget(0):
+                assert await ChatService.get_sender_profiles(db, set()) == {}
+        return profiles
+
+    profiles = asyncio.run(scenario())
+    assert {user_id: profile.display_name for user_id, profile in profiles.items()} == {1: "User 1", 2: "User 2"}
+
+
+def test_warm_membership_lookup_issues_no_queries(session_factory):
+    chat_cache.clear()
+
+    async def scenario():
+        chat_id = await _seed_chat(session_factory, 0)
+        async with session_factory() as db:
+            with query_budget(1):
+                cold = await ChatService.get_participants(db, chat_id)
+            with query_budget(0):
+                warm = await ChatService.get_participants(db, chat_id)
+
+            chat = await db.get(Chat, chat_id)
+            chat.is_active = False
+            await db.commit()
+            # Still served from the cache until the delete path invalidates it
+            with query_budget(0):
+                stale = await ChatService.get_participants(db, chat_id)
+            chat_cache.invalidate(chat_id)
+            gone = await ChatService.get_participants(db, chat_id)
+        return cold, warm, stale, gone
+
+    try:
+        assert asyncio.run(scenario()) == ((1, 2), (1, 2), (1, 2), None)
+    finally:
+        chat_cache.clear()
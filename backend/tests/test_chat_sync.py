@@ -0,0 +1,160 @@
+# backend/tests/test_chat_sync.py
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.core.security import get_current_user_snapshot
+from app.main import app as api
+from app.core.config import settings
+from app.models.chat import Chat, Message
+from app.models.user import User
+from app.schemas.user import UserSnapshot
+from app.services.chat_service import ChatService
+
+
+@pytest.fixture
+def sync(client):
+    """GET /api/chat/sync as user 1"""
+    api.dependency_overrides[get_current_user_snapshot] = lambda: UserSnapshot(
+        id=1, email="user1@example.com", display_name="User 1"
+    )
+
+    def get(since=None):
+        return client.get("/api/chat/sync", params={} if since is None else {"since": since})
+
+    return get
+
+
+def _run(session_factory, *statements):
+    """Apply ORM changes in one committed session"""
+    async def apply():
+        async with session_factory() as db:
+            for statement in statements:
+                await statement(db)
+            await db.commit()
+
+    asyncio.run(apply())
+
+
+async def _seed_users(db):
+    db.add_all([User(id=i, email=f"user{i}@example.com", display_name=f"User {i}") for i in (1, 2, 3, 4)])
+
+
+def _timestamp(settled: bool) -> datetime:
+    """A change time either past the settle window or inside it"""
+    age = settings.CHAT_SYNC_SETTLE_SECONDS + 60 if settled else 0
+    return datetime.utcnow() - timedelta(seconds=age)
+
+
+def _add_chat(chat_id: int, user1_id: int, user2_id: int, change_seq: int, settled: bool = True):
+    async def add(db):
+        db.add(Chat(
+            id=chat_id, user1_id=user1_id, user2_id=user2_id,
+            change_seq=change_seq, changed_at=_timestamp(settled)
+        ))
+    return add
+
+
+def _delete_chat(chat_id: int, change_seq: int, settled: bool = True):
+    """What ChatService.delete_chat does to the row (sqlite has no sequence to draw from)"""
+    async def delete(db):
+        chat = await db.get(Chat, chat_id)
+        chat.is_active = False
+        chat.change_seq = change_seq
+        chat.changed_at = _timestamp(settled)
+    return delete
+
+
+def _settle_chat(chat_id: int):
+    async def settle(db):
+        chat = await db.get(Chat, chat_id)
+        chat.changed_at = _timestamp(True)
+    return settle
+
+
+def _settle_messages(chat_id: int):
+    async def settle(db):
+        for message in (await db.execute(select(Message).where(Message.chat_id == chat_id))).scalars():
+            message.sent_at = _timestamp(True)
+    return settle
+
+
+def _add_messages(chat_id: int, *settled: bool):
+    async def add(db):
+        db.add_all([
+            Message(chat_id=chat_id, sender_id=2, content="Hi", sent_at=_timestamp(is_settled))
+            for is_settled in settled
+        ])
+    return add
+
+
+@pytest.mark.parametrize("cursor", ["", "12", "a.b", "1.2.3", "1.-"])
+def test_malformed_cursor_is_rejected(sync, cursor):
+    with pytest.raises(ValueError):
+        ChatService.parse_sync_cursor(cursor)
+    assert sync(cursor).status_code == 400
+
+
+def test_cursor_round_trip():
+    assert ChatService.parse_sync_cursor("120.7") == (120, 7)
+
+
+def test_sync_reports_each_chat_change_once(sync, session_factory):
+    _run(session_factory, _seed_users, _add_chat(1, 1, 2, 1), _add_chat(2, 3, 1, 2), _add_chat(3, 2, 3, 3))
+
+    first = sync().json()
+    assert sorted(chat["id"] for chat in first["chats"]) == [1, 2]
+    assert {chat["id"]: chat["other_user"]["id"] for chat in first["chats"]} == {1: 2, 2: 3}
+    # No messages yet; the change part stops at the newest of user 1's chats
+    assert first["cursor"] == "0.2"
+
+    # A new chat and a deletion since the first sync
+    _run(session_factory, _add_chat(4, 1, 4, 4), _delete_chat(1, 5))
+    second = sync(first["cursor"]).json()
+    assert [chat["id"] for chat in second["chats"]] == [4]
+    assert second["deleted_chat_ids"] == [1]
+    assert second["messages"] == [] and second["has_more"] is False
+    assert second["cursor"] == "0.5"
+
+    # Nothing new: same cursor back, nothing repeated
+    third = sync(second["cursor"]).json()
+    assert third["chats"] == [] and third["deleted_chat_ids"] == []
+    assert third["cursor"] == second["cursor"]
+
+
+def test_chat_change_committed_late_is_not_skipped(sync, session_factory):
+    # Seq 2 was drawn before seq 3 but its transaction is still settling
+    _run(session_factory, _seed_users, _add_chat(1, 1, 2, 1), _add_chat(2, 1, 3, 2, settled=False), _add_chat(3, 1, 4, 3))
+
+    first = sync("0.0").json()
+    assert [chat["id"] for chat in first["chats"]] == [1, 2, 3]
+    # Stops before the unsettled change instead of jumping to 3
+    assert first["cursor"] == "0.1"
+
+    _run(session_factory, _settle_chat(2))
+    second = sync(first["cursor"]).json()
+    assert [chat["id"] for chat in second["chats"]] == [2, 3]
+    assert second["cursor"] == "0.3"
+
+
+def test_has_more_only_when_the_cursor_moves(sync, session_factory, monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_SYNC_MAX_MESSAGES", 2)
+    _run(session_factory, _seed_users, _add_chat(1, 1, 2, 1))
+
+    # The oldest new message is still settling: returned, but nothing to page on to
+    _run(session_factory, _add_messages(1, False, True, True))
+    unsettled = sync("0.1").json()
+    assert [message["id"] for message in unsettled["messages"]] == [1, 2]
+    assert unsettled["has_more"] is False
+    assert unsettled["cursor"] == "0.1"
+
+    _run(session_factory, _settle_messages(1))
+    settled = sync("0.1").json()
+    assert [message["id"] for message in settled["messages"]] == [1, 2]
+    assert settled["has_more"] is True
+    assert settled["cursor"] == "2.1"
+    last = sync(settled["cursor"]).json()
+    assert [message["id"] for message in last["messages"]] == [3]
+    assert last["has_more"] is False and last["cursor"] == "3.1"
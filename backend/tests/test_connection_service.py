@@ -0,0 +1,39 @@
+# backend/tests/test_connection_service.py
+import asyncio
+
+from app.core.query_stats import query_budget
+from app.models.connection import Connection, ConnectionStatus
+from app.models.user import User
+from app.services.connection_service import ConnectionService
+
+
+async def _seed_connections(session_factory):
+    """User 1's connections, sent and received, in every status"""
+    async with session_factory() as db:
+        db.add_all([User(id=i, email=f"user{i}@example.com", display_name=f"User {i}") for i in range(1, 8)])
+        await db.flush()
+        db.add_all([
+            Connection(sender_id=1, receiver_id=2, status=ConnectionStatus.ACCEPTED),
+            Connection(sender_id=3, receiver_id=1, status=ConnectionStatus.ACCEPTED),
+            Connection(sender_id=1, receiver_id=4, status=ConnectionStatus.PENDING),
+            Connection(sender_id=5, receiver_id=1, status=ConnectionStatus.REJECTED),
+            Connection(sender_id=6, receiver_id=1, status=ConnectionStatus.ACCEPTED),
+            # Not involving user 1
+            Connection(sender_id=2, receiver_id=7, status=ConnectionStatus.ACCEPTED),
+        ])
+        await db.commit()
+
+
+def test_connected_users_load_in_one_query(session_factory):
+    async def scenario():
+        await _seed_connections(session_factory)
+        async with session_factory() as db:
+            with query_budget(1):
+                accepted = await ConnectionService.get_user_connections(db, 1)
+            with query_budget(1):
+                pending = await ConnectionService.get_user_connections(db, 1, ConnectionStatus.PENDING)
+            with query_budget(1):
+                other_side = await ConnectionService.get_user_connections(db, 7)
+        return [[user.id for user in users] for users in (accepted, pending, other_side)]
+
+    assert asyncio.run(scenario()) == [[2, 3, 6], [4], [2]]
@@ -0,0 +1,94 @@
+# backend/tests/test_counter_service.py
+import asyncio
+
+from app.core.config import settings
+from app.models.chat import Chat, Message
+from app.models.notification import Notification, NotificationType
+from app.models.user import User
+from app.models.user_counter import UserCounter
+from app.services import background_service
+from app.services.background_service import BackgroundTaskService
+from app.services.counter_service import UnreadCounterService
+
+
+async def _seed_users(session_factory, count: int):
+    async with session_factory() as db:
+        db.add_all([
+            User(id=i, email=f"user{i}@example.com", display_name=f"User {i}")
+            for i in range(1, count + 1)
+        ])
+        await db.commit()
+
+
+def _notification(user_id: int, is_read: bool = False) -> Notification:
+    return Notification(
+        user_id=user_id, type=NotificationType.ANNOUNCEMENT.value,
+        title="Hello", message="Hello", is_read=is_read
+    )
+
+
+def test_adjust_upserts_increments_and_clamps_decrements(session_factory):
+    async def scenario():
+        await _seed_users(session_factory, 3)
+        async with session_factory() as db:
+            created = await UnreadCounterService.adjust(db, notifications={1: 2, 2: 1}, messages={1: 1})
+            await db.commit()
+        async with session_factory() as db:
+            mixed = await UnreadCounterService.adjust(db, notifications={1: 3, 2: -5}, messages={1: -1})
+            # User 3 never had a counter row; a decrement must not create one
+            missing = await UnreadCounterService.adjust(db, notifications={3: -1})
+            await db.commit()
+        async with session_factory() as db:
+            stored = [await UnreadCounterService.get(db, user_id) for user_id in (1, 2, 3)]
+            rows = await db.get(UserCounter, 3)
+        return created, mixed, missing, stored, rows
+
+    created, mixed, missing, stored, rows = asyncio.run(scenario())
+    assert created == {1: (2, 1), 2: (1, 0)}
+    assert mixed == {1: (5, 0), 2: (0, 0)}
+    assert missing == {3: (0, 0)}
+    assert stored == [(5, 0), (0, 0), (0, 0)]
+    assert rows is None
+
+
+def test_adjust_ignores_zero_deltas(session_factory):
+    async def scenario():
+        await _seed_users(session_factory, 1)
+        async with session_factory() as db:
+            badges = await UnreadCounterService.adjust(db, notifications={1: 0}, messages={})
+            await db.commit()
+            return badges, await db.get(UserCounter, 1)
+
+    assert asyncio.run(scenario()) == ({}, None)
+
+
+def test_repair_recomputes_drifted_counters_in_batches(session_factory, monkeypatch):
+    monkeypatch.setattr(background_service, "AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(settings, "COUNTER_REPAIR_BATCH_SIZE", 2)
+
+    async def scenario():
+        await _seed_users(session_factory, 5)
+        async with session_factory() as db:
+            db.add_all([_notification(1), _notification(1), _notification(1, is_read=True), _notification(4)])
+            # User 2 has read up to message 2 of 4 from user 1; user 1 has read everything
+            chat = Chat(id=1, user1_id=1, user2_id=2, change_seq=1, user1_last_read_message_id=4, user2_last_read_message_id=2)
+            closed = Chat(id=2, user1_id=3, user2_id=2, change_seq=2, is_active=False)
+            db.add_all([chat, closed])
+            await db.flush()
+            db.add_all([Message(id=n, chat_id=1, sender_id=1, content=f"Message {n}") for n in range(1, 5)])
+            db.add(Message(id=5, chat_id=2, sender_id=3, content="Unread but the chat is closed"))
+            # Drifted values, e.g. from cascaded deletes; user 5 has none and stays at zero
+            db.add_all([
+                UserCounter(user_id=1, unread_notifications=9, unread_messages=9),
+                UserCounter(user_id=3, unread_notifications=4, unread_messages=0),
+            ])
+            await db.commit()
+
+        batches = await BackgroundTaskService.repair_unread_counters()
+        async with session_factory() as db:
+            counters = {user_id: await UnreadCounterService.get(db, user_id) for user_id in range(1, 6)}
+        return batches, counters
+
+    batches, counters = asyncio.run(scenario())
+    assert batches == 3
+    assert counters == {1: (2, 0), 2: (0, 2), 3: (0, 0), 4: (1, 0), 5: (0, 0)}
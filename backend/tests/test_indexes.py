@@ -0,0 +1,123 @@
+# backend/tests/test_indexes.py
+import asyncio
+import importlib.util
+import os
+
+import pytest
+from sqlalchemy import inspect, text
+
+from app.database import Base
+
+VERSIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic", "versions")
+
+# Indexes of 9fbdd7c21234 that a later migration dropped again, and which one
+SUPERSEDED = {"ix_messages_unread_chat_sender": "5b8d3e6f1c94"}
+
+# A hot query each index exists for. Parameters are literals or binds that
+# need no type processing, so the same text runs under either dialect.
+HOT_QUERIES = {
+    "ix_bookings_dinner_id_status": (
+        "SELECT count(id) FROM bookings WHERE dinner_id = :id AND status = 'CONFIRMED'"
+    ),
+    "ix_bookings_user_id_status": (
+        "SELECT dinner_id FROM bookings WHERE user_id = :id AND status = 'CANCELLED'"
+    ),
+    "ix_messages_chat_id_sent_at": (
+        "SELECT id FROM messages WHERE chat_id = :id ORDER BY sent_at DESC LIMIT 1"
+    ),
+    "ix_notifications_user_read_created": (
+        "SELECT id FROM notifications WHERE user_id = :id AND is_read = false "
+        "ORDER BY created_at DESC LIMIT 20"
+    ),
+    "ix_scheduled_notifications_pending_time": (
+        "SELECT id FROM scheduled_notifications WHERE is_sent = false "
+        "AND scheduled_time <= '2026-01-01 00:00:00' ORDER BY scheduled_time LIMIT 100"
+    ),
+    "ix_connections_receiver_id_status": (
+        "SELECT id FROM connections WHERE receiver_id = :id AND status = 'PENDING'"
+    ),
+    "ix_chats_user1_user2_active": (
+        "SELECT id FROM chats WHERE user1_id = :id AND user2_id = :id AND is_active = true"
+    ),
+}
+
+
+def _migration_path(revision: str) -> str:
+    filename = next(name for name in os.listdir(VERSIONS_DIR) if name.startswith(revision))
+    return os.path.join(VERSIONS_DIR, filename)
+
+
+def _migration(revision: str):
+    spec = importlib.util.spec_from_file_location(revision, _migration_path(revision))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+MIGRATED = [
+    (name, table, columns, where)
+    for name, table, columns, where in _migration("9fbdd7c21234").INDEXES
+    if name not in SUPERSEDED
+]
+
+
+def test_superseded_indexes_are_dropped_by_their_migration():
+    for name, revision in SUPERSEDED.items():
+        with open(_migration_path(revision)) as f:
+            assert f"op.drop_index('{name}'" in f.read()
+
+
+@pytest.mark.parametrize("name, table, columns, where", MIGRATED, ids=[index[0] for index in MIGRATED])
+def test_migrated_index_is_declared_on_the_model(name, table, columns, where):
+    """Otherwise autogenerate would try to drop it"""
+    declared = {index.name: index for index in Base.metadata.tables[table].indexes}
+    assert name in declared
+    index = declared[name]
+    assert [column.name for column in index.columns] == columns
+    predicate = index.dialect_options["postgresql"]["where"]
+    assert (str(predicate) if predicate is not None else None) == where
+
+
+def test_every_hot_query_has_its_index():
+    assert set(HOT_QUERIES) == {index[0] for index in MIGRATED}
+
+
+def test_indexes_exist_in_the_created_schema(db_engine):
+    async def scenario():
+        async with db_engine.connect() as conn:
+            return await conn.run_sync(lambda sync_conn: {
+                table: {index["name"] for index in inspect(sync_conn).get_indexes(table)}
+                for table in {index[1] for index in MIGRATED}
+            })
+
+    existing = asyncio.run(scenario())
+    for name, table, _, _ in MIGRATED:
+        assert name in existing[table]
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_plan_uses_its_index(db_engine, name):
+    """EXPLAIN each hot query. On Postgres sequential scans are disabled and the
+    table's other indexes dropped (in a transaction that is rolled back), so
+    the tiny test tables still show whether the index can serve the query shape."""
+    table = next(t.name for t in Base.metadata.sorted_tables if name in {index.name for index in t.indexes})
+
+    async def scenario():
+        async with db_engine.connect() as conn:
+            if conn.dialect.name == "postgresql":
+                others = (await conn.execute(text(
+                    "SELECT indexname FROM pg_indexes WHERE tablename = :table AND indexname != :name "
+                    "AND indexname NOT IN (SELECT conname FROM pg_constraint)"
+                ), {"table": table, "name": name})).scalars().all()
+                for other in others:
+                    await conn.execute(text(f'DROP INDEX "{other}"'))
+                await conn.execute(text("SET LOCAL enable_seqscan = off"))
+                result = await conn.execute(text(f"EXPLAIN {HOT_QUERIES[name]}"), {"id": 1})
+                plan = "\n".join(row[0] for row in result)
+                await conn.rollback()
+                return plan
+            result = await conn.execute(text(f"EXPLAIN QUERY PLAN {HOT_QUERIES[name]}"), {"id": 1})
+            return "\n".join(row[-1] for row in result)
+
+    plan = asyncio.run(scenario())
+    assert name in plan, plan
@@ -0,0 +1,110 @@
+# backend/tests/test_message_writer.py
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from app.models.chat import Chat, Message
+from app.models.user import User
+from app.services import message_writer as message_writer_module
+from app.services.counter_service import UnreadCounterService
+from app.services.message_writer import GroupCommitWriter
+
+
+@pytest.fixture
+def writer_db(session_factory, monkeypatch):
+    """Users 1-3 and chats 1 (users 1 and 2) and 2 (users 1 and 3)"""
+    monkeypatch.setattr(message_writer_module, "AsyncSessionLocal", session_factory)
+
+    async def seed():
+        async with session_factory() as db:
+            db.add_all([User(id=i, email=f"user{i}@example.com", display_name=f"User {i}") for i in (1, 2, 3)])
+            db.add_all([Chat(id=1, user1_id=1, user2_id=2, change_seq=1), Chat(id=2, user1_id=1, user2_id=3, change_seq=2)])
+            await db.commit()
+
+    asyncio.run(seed())
+    return session_factory
+
+
+async def _stored(session_factory):
+    async with session_factory() as db:
+        result = await db.execute(select(Message.id, Message.chat_id, Message.sender_id, Message.content).order_by(Message.id))
+        return [tuple(row) for row in result.all()]
+
+
+def test_concurrent_submits_share_one_commit(writer_db):
+    async def scenario():
+        writer = GroupCommitWriter(window_ms=20, max_batch=100)
+        submits = [
+            writer.submit(1 + n % 2, 1 if n % 3 else 2 + n % 2, f"Message {n}")
+            for n in range(30)
+        ]
+        results = await asyncio.gather(*submits)
+        await writer.stop()
+        async with writer_db() as db:
+            counters = {user_id: await UnreadCounterService.get(db, user_id) for user_id in (1, 2, 3)}
+        return writer, results, await _stored(writer_db), counters
+
+    writer, results, stored, counters = asyncio.run(scenario())
+    assert (writer.batches, writer.messages, writer.failures) == (1, 30, 0)
+    # Each submitter gets back the ID of its own row
+    assert [message_id for message_id, _ in results] == [row[0] for row in stored]
+    assert [row[3] for row in stored] == [f"Message {n}" for n in range(30)]
+    assert all(sent_at is not None for _, sent_at in results)
+    # Recipients' unread counters moved in the same commit
+    sent_to = {2: 0, 3: 0, 1: 0}
+    for _, chat_id, sender_id, _ in stored:
+        sent_to[(2 if chat_id == 1 else 3) if sender_id == 1 else 1] += 1
+    assert counters == {user_id: (0, count) for user_id, count in sent_to.items()}
+
+
+def test_batches_are_capped_at_max_batch(writer_db):
+    async def scenario():
+        writer = GroupCommitWriter(window_ms=20, max_batch=10)
+        await asyncio.gather(*(writer.submit(1, 1, f"Message {n}") for n in range(25)))
+        await writer.stop()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert (writer.batches, writer.messages) == (3, 25)
+
+
+def test_stop_writes_everything_already_submitted(writer_db):
+    async def scenario():
+        writer = GroupCommitWriter(window_ms=50, max_batch=4)
+        submits = [asyncio.create_task(writer.submit(1, 1, f"Message {n}")) for n in range(10)]
+        await asyncio.sleep(0)
+        # Stops mid-window, with the first batch taken and the rest still queued
+        await writer.stop()
+        done = [task.done() for task in submits]
+        results = await asyncio.gather(*submits)
+        stopped = writer._task is None
+        # The next submit starts a fresh writer
+        again = await writer.submit(1, 1, "After restart")
+        await writer.stop()
+        return done, results, stopped, again, await _stored(writer_db)
+
+    done, results, stopped, again, stored = asyncio.run(scenario())
+    assert all(done) and stopped
+    assert [message_id for message_id, _ in results] + [again[0]] == [row[0] for row in stored]
+    assert len(stored) == 11
+
+
+def test_a_bad_message_fails_only_its_own_sender(writer_db):
+    async def scenario():
+        writer = GroupCommitWriter(window_ms=20, max_batch=100)
+        outcomes = await asyncio.gather(
+            writer.submit(1, 1, "Fine"),
+            writer.submit(999, 1, "No such chat"),
+            writer.submit(2, 3, "Also fine"),
+            return_exceptions=True
+        )
+        await writer.stop()
+        return writer, outcomes, await _stored(writer_db)
+
+    writer, outcomes, stored = asyncio.run(scenario())
+    assert isinstance(outcomes[1], Exception)
+    assert [row[3] for row in stored] == ["Fine", "Also fine"]
+    assert [outcomes[0][0], outcomes[2][0]] == [row[0] for row in stored]
+    # The failed batch is not counted; the two retried messages commit on their own
+    assert (writer.batches, writer.messages, writer.failures) == (2, 2, 1)
@@ -0,0 +1,224 @@
+# backend/tests/test_push_outbox.py
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.notification import Notification, NotificationType
+from app.models.push_outbox import PushOutbox, PushOutboxStatus
+from app.models.user import User
+from app.services import push_outbox_service
+from app.services.notification_service import NotificationService
+from app.services.push_notification_service import FakePushSender
+from app.services.push_outbox_service import PushOutboxService, BACKOFF_BASE_SECONDS, BACKOFF_MAX_SECONDS
+from app.services.websocket_service import manager as websocket_manager
+
+
+class RaisingSender:
+    """A sender whose whole batch call fails, e.g. FCM unreachable"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def send_batch(self, messages):
+        self.calls += 1
+        raise ConnectionError("FCM unreachable")
+
+
+@pytest.fixture
+def outbox(session_factory, monkeypatch):
+    monkeypatch.setattr(push_outbox_service, "AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(settings, "PUSH_MAX_ATTEMPTS", 3)
+    return session_factory
+
+
+async def _seed(session_factory, tokens):
+    async with session_factory() as db:
+        for i, token in enumerate(tokens, start=1):
+            db.add(User(id=i, email=f"user{i}@example.com", display_name=f"User {i}", fcm_token=token))
+        await db.flush()
+        for i in range(1, len(tokens) + 1):
+            PushOutboxService.enqueue(db, user_id=i, title="Hello", body=f"Push {i}")
+        await db.commit()
+
+
+async def _rows(session_factory):
+    async with session_factory() as db:
+        result = await db.execute(select(PushOutbox).order_by(PushOutbox.id))
+        return result.scalars().all()
+
+
+async def _make_due(session_factory):
+    async with session_factory() as db:
+        for row in (await db.execute(select(PushOutbox))).scalars():
+            row.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        await db.commit()
+
+
+def test_backoff_doubles_with_jitter_and_is_capped(monkeypatch):
+    monkeypatch.setattr(push_outbox_service.random, "uniform", lambda low, high: high)
+    assert [PushOutboxService._backoff(n).total_seconds() for n in (1, 2, 3)] == [
+        BACKOFF_BASE_SECONDS, 2 * BACKOFF_BASE_SECONDS, 4 * BACKOFF_BASE_SECONDS
+    ]
+    assert PushOutboxService._backoff(30).total_seconds() == BACKOFF_MAX_SECONDS
+
+    monkeypatch.setattr(push_outbox_service.random, "uniform", lambda low, high: low)
+    assert PushOutboxService._backoff(1).total_seconds() == BACKOFF_BASE_SECONDS / 2
+
+
+def test_batch_outcomes_are_recorded(outbox):
+    sender = FakePushSender(unregistered_tokens={"dead-token"})
+
+    async def scenario():
+        await _seed(outbox, ["good-token", "dead-token", None])
+        processed = await PushOutboxService.process_batch(sender)
+        async with outbox() as db:
+            tokens = (await db.execute(select(User.fcm_token).order_by(User.id))).scalars().all()
+        return processed, await _rows(outbox), tokens
+
+    processed, rows, tokens = asyncio.run(scenario())
+    assert processed == 3
+    assert [row.status for row in rows] == [
+        PushOutboxStatus.SENT, PushOutboxStatus.FAILED, PushOutboxStatus.SKIPPED
+    ]
+    assert [row.attempts for row in rows] == [1, 1, 0]
+    # The unregistered token is pruned from its user
+    assert tokens == ["good-token", None, None]
+    assert [message.token for message in sender.sent] == ["good-token"]
+
+
+def test_throwing_sender_backs_off_then_fails(outbox):
+    sender = RaisingSender()
+
+    async def scenario():
+        await _seed(outbox, ["token"])
+        history = []
+        for _ in range(settings.PUSH_MAX_ATTEMPTS):
+            before = datetime.utcnow()
+            assert await PushOutboxService.process_batch(sender) == 1
+            row = (await _rows(outbox))[0]
+            history.append((row.status, row.attempts, row.next_attempt_at > before, row.last_error))
+            # Not due again until its backoff passes
+            assert await PushOutboxService.process_batch(sender) == 0
+            await _make_due(outbox)
+        return history
+
+    history = asyncio.run(scenario())
+    assert sender.calls == settings.PUSH_MAX_ATTEMPTS
+    assert history[:-1] == [
+        (PushOutboxStatus.PENDING, 1, True, "FCM unreachable"),
+        (PushOutboxStatus.PENDING, 2, True, "FCM unreachable"),
+    ]
+    assert history[-1][:2] == (PushOutboxStatus.FAILED, 3)
+
+
+class NotificationSocket:
+    """Records the IDs of notification events sent to it"""
+
+    def __init__(self):
+        self.events = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload: str):
+        frame = json.loads(payload)
+        if frame["type"] == "notification":
+            self.events.append(frame["data"]["id"])
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def _notify(session_factory, *user_ids):
+    notifications = []
+    for user_id in user_ids:
+        async with session_factory() as db:
+            notification = await NotificationService.create_notification(
+                db, user_id, NotificationType.ANNOUNCEMENT, "Hello", f"For user {user_id}"
+            )
+            notifications.append(notification.id)
+    return notifications
+
+
+def test_acknowledge_only_cancels_the_callers_own_pushes(outbox):
+    async def scenario():
+        async with outbox() as db:
+            db.add_all([User(id=i, email=f"user{i}@example.com", display_name=f"User {i}", fcm_token=f"token-{i}") for i in (1, 2)])
+            notifications = [
+                Notification(user_id=i, type=NotificationType.ANNOUNCEMENT.value, title="Hello", message="Hello")
+                for i in (1, 1, 2)
+            ]
+            db.add_all(notifications)
+            await db.flush()
+            for notification in notifications:
+                PushOutboxService.enqueue(
+                    db, user_id=notification.user_id, title="Hello", body="Hello",
+                    notification=notification, defer_seconds=10
+                )
+            await db.commit()
+        ids = [notification.id for notification in notifications]
+        async with outbox() as db:
+            # User 1 acks one of their own and user 2's notification
+            acked = await NotificationService.acknowledge_realtime(db, 1, [ids[0], ids[2]])
+            again = await NotificationService.acknowledge_realtime(db, 1, [ids[0]])
+            empty = await NotificationService.acknowledge_realtime(db, 1, [])
+        return acked, again, empty, await _rows(outbox)
+
+    acked, again, empty, rows = asyncio.run(scenario())
+    assert (acked, again, empty) == (1, 0, 0)
+    assert [row.status for row in rows] == [
+        PushOutboxStatus.ACKNOWLEDGED, PushOutboxStatus.PENDING, PushOutboxStatus.PENDING
+    ]
+
+
+def test_unacknowledged_pushes_go_out_after_the_ack_deadline(outbox, monkeypatch):
+    monkeypatch.setattr(settings, "WS_NOTIFICATIONS", True)
+    monkeypatch.setattr(settings, "WS_BACKPLANE", "memory")
+    sender = FakePushSender()
+
+    async def scenario():
+        async with outbox() as db:
+            db.add_all([User(id=i, email=f"user{i}@example.com", display_name=f"User {i}", fcm_token=f"token-{i}") for i in (1, 2)])
+            await db.commit()
+        sockets = {user_id: NotificationSocket() for user_id in (1, 2)}
+        for user_id, websocket in sockets.items():
+            await websocket_manager.connect(websocket, user_id=user_id)
+        try:
+            ids = await _notify(outbox, 1, 2)
+            await asyncio.sleep(0.05)
+            # Both were offered over the websocket; the pushes wait for the deadline
+            held = await PushOutboxService.process_batch(sender)
+            async with outbox() as db:
+                await NotificationService.acknowledge_realtime(db, 1, [ids[0]])
+            await _make_due(outbox)
+            released = await PushOutboxService.process_batch(sender)
+        finally:
+            for user_id in sockets:
+                await websocket_manager.disconnect(user_id)
+        return ids, sockets, held, released
+
+    ids, sockets, held, released = asyncio.run(scenario())
+    assert [sockets[1].events, sockets[2].events] == [[ids[0]], [ids[1]]]
+    assert (held, released) == (0, 1)
+    assert [message.token for message in sender.sent] == ["token-2"]
+
+
+def test_push_is_released_at_once_when_no_socket_takes_it(outbox, monkeypatch):
+    # A shared backplane makes every user a websocket candidate, connected or not
+    monkeypatch.setattr(settings, "WS_NOTIFICATIONS", True)
+    monkeypatch.setattr(settings, "WS_BACKPLANE", "redis")
+    sender = FakePushSender()
+
+    async def scenario():
+        async with outbox() as db:
+            db.add(User(id=1, email="user1@example.com", display_name="User 1", fcm_token="token-1"))
+            await db.commit()
+        await _notify(outbox, 1)
+        return await PushOutboxService.process_batch(sender)
+
+    assert asyncio.run(scenario()) == 1
+    assert [message.token for message in sender.sent] == ["token-1"]
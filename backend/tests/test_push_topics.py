@@ -0,0 +1,143 @@
+# backend/tests/test_push_topics.py
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.booking import Booking, BookingStatus
+from app.models.dinner import Dinner
+from app.models.dinner_topic_subscription import DinnerTopicSubscription
+from app.models.user import User
+from app.services import background_service, push_topic_service
+from app.services.background_service import BackgroundTaskService
+from app.services.push_notification_service import FakePushSender, PushResult
+from app.services.push_topic_service import PushTopicService
+
+
+class RecordingTopicSender(FakePushSender):
+    """FakePushSender that records each topic call and can fail chosen unsubscribes"""
+
+    def __init__(self, failing_unsubscribes=(), **kwargs):
+        super().__init__(**kwargs)
+        self.failing_unsubscribes = set(failing_unsubscribes)
+        self.calls = []
+
+    def subscribe_to_topic(self, tokens, topic):
+        self.calls.append(("subscribe", topic, list(tokens)))
+        return super().subscribe_to_topic(tokens, topic)
+
+    def unsubscribe_from_topic(self, tokens, topic):
+        self.calls.append(("unsubscribe", topic, list(tokens)))
+        results = super().unsubscribe_from_topic([t for t in tokens if t not in self.failing_unsubscribes], topic)
+        return [
+            PushResult(False, "unavailable") if token in self.failing_unsubscribes else results.pop(0)
+            for token in tokens
+        ]
+
+
+@pytest.fixture
+def topics(session_factory, monkeypatch):
+    monkeypatch.setattr(push_topic_service, "AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(background_service, "AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(settings, "PUSH_DINNER_TOPICS", True)
+    monkeypatch.setattr(settings, "PUSH_TOPIC_BATCH_SIZE", 2)
+    return session_factory
+
+
+def _use_sender(monkeypatch, sender):
+    monkeypatch.setattr(push_topic_service, "get_push_sender", lambda: sender)
+    return sender
+
+
+async def _recorded(session_factory):
+    async with session_factory() as db:
+        result = await db.execute(select(
+            DinnerTopicSubscription.dinner_id, DinnerTopicSubscription.token, DinnerTopicSubscription.user_id
+        ))
+        return sorted(tuple(row) for row in result.all())
+
+
+def test_member_sync_follows_the_booking(topics, monkeypatch):
+    sender = _use_sender(monkeypatch, RecordingTopicSender())
+
+    async def scenario():
+        async with topics() as db:
+            db.add(User(id=1, email="user1@example.com", display_name="User 1", fcm_token="token-1"))
+            db.add(Dinner(id=1, title="Dinner", location="Somewhere", date=datetime.utcnow() + timedelta(days=1), max_attendees=6))
+            await db.flush()
+            db.add(Booking(id=1, user_id=1, dinner_id=1, status=BookingStatus.CONFIRMED))
+            await db.commit()
+
+        await PushTopicService.sync_member(1, 1)
+        booked = await _recorded(topics)
+        # Already in line: no FCM call at all
+        await PushTopicService.sync_member(1, 1)
+        calls_after_repeat = len(sender.calls)
+
+        async with topics() as db:
+            (await db.get(Booking, 1)).status = BookingStatus.CANCELLED
+            await db.commit()
+        await PushTopicService.sync_member(1, 1)
+        return booked, calls_after_repeat, await _recorded(topics)
+
+    booked, calls_after_repeat, cancelled = asyncio.run(scenario())
+    assert booked == [(1, "token-1", 1)]
+    assert calls_after_repeat == 1
+    assert cancelled == []
+    assert sender.calls == [("subscribe", "dinner_1", ["token-1"]), ("unsubscribe", "dinner_1", ["token-1"])]
+    assert sender.topics["dinner_1"] == set()
+
+
+def test_reconciliation_applies_only_the_difference(topics, monkeypatch):
+    sender = _use_sender(monkeypatch, RecordingTopicSender(
+        unregistered_tokens={"dead-3"}, failing_unsubscribes={"token-6"}
+    ))
+
+    async def scenario():
+        tokens = {1: "token-1", 2: "token-2", 3: "dead-3", 4: None, 5: "token-5", 6: "token-6", 7: "token-7"}
+        async with topics() as db:
+            db.add_all([User(id=i, email=f"user{i}@example.com", display_name=f"User {i}", fcm_token=token) for i, token in tokens.items()])
+            db.add_all([
+                Dinner(id=1, title="Upcoming", location="Somewhere", date=datetime.utcnow() + timedelta(days=1), max_attendees=10),
+                Dinner(id=2, title="Finished", location="Somewhere", date=datetime.utcnow() - timedelta(days=1), max_attendees=10),
+            ])
+            await db.flush()
+            db.add_all([
+                Booking(user_id=i, dinner_id=1, status=BookingStatus.CONFIRMED) for i in (1, 2, 3, 4, 7)
+            ] + [
+                Booking(user_id=5, dinner_id=1, status=BookingStatus.CANCELLED),
+                Booking(user_id=6, dinner_id=1, status=BookingStatus.CANCELLED),
+                Booking(user_id=1, dinner_id=2, status=BookingStatus.CONFIRMED),
+            ])
+            db.add_all([
+                # User 1's token changed since they were subscribed
+                DinnerTopicSubscription(dinner_id=1, token="old-1", user_id=1),
+                # Already in line
+                DinnerTopicSubscription(dinner_id=1, token="token-7", user_id=7),
+                # Cancelled; user 6's unsubscribe will fail
+                DinnerTopicSubscription(dinner_id=1, token="token-5", user_id=5),
+                DinnerTopicSubscription(dinner_id=1, token="token-6", user_id=6),
+                # The dinner is over
+                DinnerTopicSubscription(dinner_id=2, token="token-1", user_id=1),
+            ])
+            await db.commit()
+
+        failed_before = PushTopicService.stats()["failed"]
+        checked = await BackgroundTaskService.reconcile_dinner_topics()
+        return checked, PushTopicService.stats()["failed"] - failed_before, await _recorded(topics)
+
+    checked, failed, recorded = asyncio.run(scenario())
+    assert checked == 2
+    # The dead token can't subscribe and the failed unsubscribe stays recorded for the next pass
+    assert failed == 2
+    assert recorded == [(1, "token-1", 1), (1, "token-2", 2), (1, "token-6", 6), (1, "token-7", 7)]
+    # Sorted differences, PUSH_TOPIC_BATCH_SIZE tokens per call
+    assert sender.calls == [
+        ("subscribe", "dinner_1", ["dead-3", "token-1"]),
+        ("subscribe", "dinner_1", ["token-2"]),
+        ("unsubscribe", "dinner_1", ["old-1", "token-5"]),
+        ("unsubscribe", "dinner_1", ["token-6"]),
+        ("unsubscribe", "dinner_2", ["token-1"]),
+    ]
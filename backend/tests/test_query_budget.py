@@ -0,0 +1,79 @@
+# backend/tests/test_query_budget.py
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.query_stats import query_budget, QueryBudgetExceeded
+from app.models.dinner import Dinner
+from app.models.user import User
+from app.services.booking_service import BookingService
+
+
+def _seed_dinners(session_factory, count: int, full=()):
+    """`count` future dinners, dinner i on day i; the ones in `full` have 3 seats, the rest 6"""
+    async def seed():
+        async with session_factory() as db:
+            db.add_all([User(email=f"user{i}@example.com", display_name=f"User {i}") for i in range(3)])
+            db.add_all([
+                Dinner(
+                    title=f"Dinner {i}",
+                    location="Somewhere",
+                    date=datetime.utcnow() + timedelta(days=i),
+                    max_attendees=3 if i in full else 6
+                )
+                for i in range(1, count + 1)
+            ])
+            await db.commit()
+        # Bookings on every dinner, so lazy attendee loads would show up as extra queries
+        for dinner_id in range(1, count + 1):
+            for user_id in range(1, 4):
+                async with session_factory() as db:
+                    await BookingService.reserve_seat(db, dinner_id, user_id)
+
+    asyncio.run(seed())
+
+
+def test_dinner_list_is_a_single_query(client, session_factory):
+    _seed_dinners(session_factory, 10)
+
+    with query_budget(1):
+        response = client.get("/api/dinners/")
+
+    assert response.status_code == 200
+    dinners = response.json()
+    assert len(dinners) == 10
+    assert all(dinner["current_attendees"] == 3 for dinner in dinners)
+
+
+def test_dinner_pages_skip_full_dinners_at_constant_cost(client, session_factory):
+    full = set(range(5, 101, 5))
+    _seed_dinners(session_factory, 100, full=full)
+    bookable = [dinner_id for dinner_id in range(1, 101) if dinner_id not in full]
+
+    pages = []
+    for skip in range(0, 100, 20):
+        with query_budget(1):
+            response = client.get("/api/dinners/", params={"skip": skip, "limit": 20})
+        assert response.status_code == 200
+        pages.append(response.json())
+
+    # 80 bookable dinners in date order: four full pages, then an empty one
+    assert [len(page) for page in pages] == [20, 20, 20, 20, 0]
+    assert [dinner["id"] for page in pages for dinner in page] == bookable
+    assert all(
+        dinner["current_attendees"] == 3 and dinner["available_spots"] == 3 and not dinner["is_full"]
+        for page in pages for dinner in page
+    )
+    with query_budget(1):
+        response = client.get("/api/dinners/", params={"skip": 75, "limit": 10})
+    assert [dinner["id"] for dinner in response.json()] == bookable[75:]
+
+
+def test_query_budget_reports_repeated_statements(client, session_factory):
+    _seed_dinners(session_factory, 3)
+
+    with pytest.raises(QueryBudgetExceeded, match="Expected at most 1 queries, got 3"):
+        with query_budget(1):
+            for _ in range(3):
+                client.get("/api/dinners/")
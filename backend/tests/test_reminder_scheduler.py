@@ -0,0 +1,109 @@
+# backend/tests/test_reminder_scheduler.py
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, select
+
+from app.core.config import settings
+from app.models.booking import Booking, BookingStatus
+from app.models.dinner import Dinner
+from app.models.notification import Notification
+from app.models.scheduled_notification import ScheduledNotification, ScheduledNotificationType
+from app.models.user import User
+from app.services import background_service
+from app.services.background_service import BackgroundTaskService
+
+from conftest import TEST_DATABASE_URL
+
+BOOKINGS = 60
+
+
+@pytest.fixture
+def scheduler_db(db_engine, session_factory, monkeypatch):
+    """Point the scheduler at the test database.
+
+    sqlite ignores FOR UPDATE, so there each transaction takes the write lock
+    up front (BEGIN IMMEDIATE): schedulers then serialize the way Postgres
+    row locks make them, and a claim that was not marked sent in the same
+    transaction would be sent twice.
+    """
+    if not TEST_DATABASE_URL:
+        @event.listens_for(db_engine.sync_engine, "connect")
+        def _manual_transactions(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(db_engine.sync_engine, "begin")
+        def _begin_immediate(connection):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    monkeypatch.setattr(background_service, "AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(settings, "PUSH_DINNER_TOPICS", False)
+    return session_factory
+
+
+async def _seed_due_reminders(session_factory) -> int:
+    """One dinner, BOOKINGS attendees, both reminders of every booking already due"""
+    async with session_factory() as db:
+        db.add_all([User(id=i, email=f"user{i}@example.com", display_name=f"User {i}") for i in range(1, BOOKINGS + 1)])
+        db.add(Dinner(id=1, title="Test dinner", location="Somewhere", date=datetime.utcnow() + timedelta(hours=1), max_attendees=BOOKINGS))
+        await db.flush()
+        db.add_all([
+            Booking(id=i, user_id=i, dinner_id=1, status=BookingStatus.CONFIRMED)
+            for i in range(1, BOOKINGS + 1)
+        ])
+        await db.flush()
+        due = datetime.utcnow() - timedelta(minutes=1)
+        db.add_all([
+            ScheduledNotification(booking_id=i, notification_type=reminder, scheduled_time=due)
+            for i in range(1, BOOKINGS + 1)
+            for reminder in ScheduledNotificationType
+        ])
+        await db.commit()
+    return BOOKINGS * len(ScheduledNotificationType)
+
+
+def test_concurrent_schedulers_send_each_reminder_once(scheduler_db, monkeypatch):
+    monkeypatch.setattr(settings, "REMINDER_BATCH_SIZE", 7)
+
+    async def scenario():
+        due = await _seed_due_reminders(scheduler_db)
+        processed = await asyncio.gather(*(BackgroundTaskService.run_due_reminders() for _ in range(4)))
+        async with scheduler_db() as db:
+            sent = (await db.execute(
+                select(Notification.booking_id, Notification.title)
+            )).all()
+            unsent = (await db.execute(
+                select(ScheduledNotification.id).where(ScheduledNotification.is_sent == False)
+            )).all()
+        return due, processed, sent, unsent
+
+    due, processed, sent, unsent = asyncio.run(scenario())
+    assert sum(processed) == len(sent) == due
+    # Every booking got each of its two reminders exactly once
+    assert Counter(booking_id for booking_id, _ in sent) == {i: 2 for i in range(1, BOOKINGS + 1)}
+    assert len(set(sent)) == due
+    assert unsent == []
+
+
+def test_sleep_is_floored_while_due_reminders_are_held_elsewhere(scheduler_db, monkeypatch):
+    monkeypatch.setattr(settings, "REMINDER_MIN_SLEEP_SECONDS", 2.5)
+    monkeypatch.setattr(settings, "REMINDER_MAX_SLEEP_SECONDS", 300)
+
+    async def scenario():
+        idle = await BackgroundTaskService.seconds_until_next_reminder()
+        # A due reminder another scheduler has claimed but not yet marked sent
+        await _seed_due_reminders(scheduler_db)
+        overdue = await BackgroundTaskService.seconds_until_next_reminder()
+        async with scheduler_db() as db:
+            for scheduled in (await db.execute(select(ScheduledNotification))).scalars():
+                scheduled.scheduled_time = datetime.utcnow() + timedelta(seconds=60)
+            await db.commit()
+        upcoming = await BackgroundTaskService.seconds_until_next_reminder()
+        return idle, overdue, upcoming
+
+    idle, overdue, upcoming = asyncio.run(scenario())
+    assert idle == 300
+    assert overdue == 2.5
+    assert 55 < upcoming <= 60
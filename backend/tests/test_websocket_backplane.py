@@ -0,0 +1,252 @@
+# backend/tests/test_websocket_backplane.py
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+
+import pytest
+
+from app.core.config import settings
+from app.services.websocket_backplane import Backplane, InMemoryBackplane, InMemoryBus, PostgresBackplane
+from app.services.websocket_service import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload: str):
+        self.sent.append(json.loads(payload))
+
+    async def close(self, code: int = 1000):
+        pass
+
+    def received(self, kind: str = "new_message"):
+        return [frame["data"] for frame in self.sent if frame["type"] == kind]
+
+
+def _message(n: int) -> dict:
+    return {"type": "new_message", "data": {"n": n}}
+
+
+async def _settle():
+    await asyncio.sleep(0.05)
+
+
+def test_backplane_is_abstract():
+    with pytest.raises(TypeError):
+        Backplane()
+
+
+def test_managers_on_a_shared_bus_reach_each_others_sockets(monkeypatch):
+    monkeypatch.setattr(settings, "WS_RESUME_WINDOW_SECONDS", 0)
+
+    async def scenario():
+        bus = InMemoryBus()
+        node_a = ConnectionManager(backplane=InMemoryBackplane(bus))
+        node_b = ConnectionManager(backplane=InMemoryBackplane(bus))
+        for node in (node_a, node_b):
+            await node.backplane.start(node._deliver_local)
+
+        phone, laptop, other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await node_a.connect(phone, user_id=1)
+        await node_b.connect(laptop, user_id=1)
+        await node_b.connect(other, user_id=2)
+
+        # From either node, every device of the user gets it exactly once
+        delivered = [
+            await node_a.send_personal_message(_message(1), 1),
+            await node_b.send_personal_message(_message(2), 1),
+            await node_a.send_personal_message(_message(3), 2),
+        ]
+        await _settle()
+
+        # Once node B holds none of user 2's sockets it drops the channel
+        await node_b.disconnect(2)
+        unreachable = await node_a.send_personal_message(_message(4), 2)
+        return delivered, unreachable, phone, laptop, other, bus
+
+    delivered, unreachable, phone, laptop, other, bus = asyncio.run(scenario())
+    assert delivered == [True, True, True]
+    assert phone.received() == laptop.received() == [{"n": 1}, {"n": 2}]
+    assert other.received() == [{"n": 3}]
+    assert unreachable is False
+    assert 2 not in bus.subscribers
+
+
+Notify = namedtuple("Notify", "channel payload")
+
+
+class FakePostgres:
+    """Just enough of a server for LISTEN/UNLISTEN/pg_notify across connections"""
+
+    def __init__(self):
+        self.connections = []
+        self.executed = []
+
+    async def connect(self, backplane=None):
+        conn = FakeConnection(self)
+        self.connections.append(conn)
+        return conn
+
+    def notify(self, channel: str, payload: str):
+        for conn in self.connections:
+            if not conn.closed and channel in conn.channels:
+                conn.inbox.put_nowait(Notify(channel, payload))
+
+
+class FakeConnection:
+    def __init__(self, server: FakePostgres):
+        self.server = server
+        self.channels = set()
+        self.inbox = asyncio.Queue()
+        self.closed = False
+
+    def drop(self):
+        """Simulate the server going away under this connection"""
+        self.closed = True
+        self.inbox.put_nowait(None)
+
+    async def execute(self, sql: str, params=None):
+        if self.closed:
+            raise ConnectionError("connection is closed")
+        self.server.executed.append(sql)
+        command, _, channel = sql.partition(" ")
+        if command == "LISTEN":
+            self.channels.add(channel)
+        elif command == "UNLISTEN":
+            self.channels.discard(channel)
+        else:
+            self.server.notify(*params)
+
+    async def notifies(self, timeout=None, stop_after=None):
+        if self.closed:
+            raise ConnectionError("connection is closed")
+        try:
+            notify = await asyncio.wait_for(self.inbox.get(), timeout)
+        except asyncio.TimeoutError:
+            return
+        if notify is None:
+            raise ConnectionError("server closed the connection unexpectedly")
+        yield notify
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_postgres(monkeypatch):
+    server = FakePostgres()
+    monkeypatch.setattr(PostgresBackplane, "_connect", lambda self: server.connect())
+    return server
+
+
+def test_postgres_subscribe_is_listening_when_it_returns(fake_postgres):
+    async def scenario():
+        sender, receiver = PostgresBackplane("postgresql://fake"), PostgresBackplane("postgresql://fake")
+        received = []
+
+        async def deliver(user_id, payload):
+            received.append((user_id, payload))
+
+        for node in (sender, receiver):
+            await node.start(deliver)
+        await asyncio.sleep(0.01)
+
+        started = time.monotonic()
+        await receiver.subscribe(7)
+        subscribe_seconds = time.monotonic() - started
+        # Published straight after subscribe() returned
+        await sender.publish(7, "hello")
+        await _settle()
+
+        await receiver.unsubscribe(7)
+        await asyncio.sleep(PostgresBackplane.POLL_SECONDS + 0.1)
+        await sender.publish(7, "gone")
+        await _settle()
+        for node in (sender, receiver):
+            await node.stop()
+        return subscribe_seconds, received
+
+    subscribe_seconds, received = asyncio.run(scenario())
+    # Woken through the control channel rather than waiting out a poll
+    assert subscribe_seconds < PostgresBackplane.POLL_SECONDS / 2
+    assert received == [(7, "hello")]
+    assert "UNLISTEN ws_user_7" in fake_postgres.executed
+
+
+def test_postgres_backplane_reconnects_and_listens_again(fake_postgres, monkeypatch):
+    async def scenario():
+        sender, receiver = PostgresBackplane("postgresql://fake"), PostgresBackplane("postgresql://fake")
+        received = []
+
+        async def deliver(user_id, payload):
+            received.append((user_id, payload))
+
+        for node in (sender, receiver):
+            await node.start(deliver)
+        await receiver.subscribe(7)
+        await receiver.subscribe(8)
+
+        # Both of the receiver's connections and the sender's notify connection go away
+        receiver._listen_conn.drop()
+        receiver._notify_conn.drop()
+        sender._notify_conn.drop()
+        await _settle()
+
+        await sender.publish(7, "after")
+        await sender.publish(8, "again")
+        await _settle()
+        listening = {c for conn in fake_postgres.connections if not conn.closed for c in conn.channels}
+        for node in (sender, receiver):
+            await node.stop()
+        return received, listening
+
+    received, listening = asyncio.run(scenario())
+    assert received == [(7, "after"), (8, "again")]
+    assert {"ws_user_7", "ws_user_8"} <= listening
+
+
+@pytest.mark.postgres
+def test_postgres_backplane_across_processes():
+    """Two OS processes, each with its own manager, on a real Postgres"""
+    url = os.environ["TEST_DATABASE_URL"]
+    child = (
+        "import asyncio, sys\n"
+        "from app.services.websocket_backplane import PostgresBackplane\n"
+        "async def main():\n"
+        "    done = asyncio.Event()\n"
+        "    async def deliver(user_id, payload):\n"
+        "        print(user_id, payload, flush=True)\n"
+        "        done.set()\n"
+        f"    node = PostgresBackplane({url!r})\n"
+        "    await node.start(deliver)\n"
+        "    await node.subscribe(7)\n"
+        "    print('ready', flush=True)\n"
+        "    await asyncio.wait_for(done.wait(), 10)\n"
+        "    await node.stop()\n"
+        "asyncio.run(main())\n"
+    )
+
+    async def scenario():
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-c", child,
+            stdout=asyncio.subprocess.PIPE,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            env=os.environ.copy()
+        )
+        assert (await asyncio.wait_for(process.stdout.readline(), 10)).strip() == b"ready"
+        node = PostgresBackplane(url)
+        await node.start(lambda user_id, payload: asyncio.sleep(0))
+        await node.publish(7, "across")
+        line = await asyncio.wait_for(process.stdout.readline(), 10)
+        await node.stop()
+        await process.wait()
+        return line.decode().strip()
+
+    assert asyncio.run(scenario()) == "7 across"
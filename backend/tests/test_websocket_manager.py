@@ -0,0 +1,381 @@
+# backend/tests/test_websocket_manager.py
+import asyncio
+import json
+import sys
+import time
+
+import pytest
+from fastapi import status
+
+from app.core.config import settings
+from app.services.websocket_backplane import InMemoryBackplane, InMemoryBus
+from app.services.websocket_service import ConnectionManager, ReplayBuffer
+
+
+class FakeWebSocket:
+    """Records what the server sends; `stalled` makes send_text hang like a client that stopped reading"""
+
+    def __init__(self, stalled: bool = False):
+        self.sent = []
+        self.closed_with = None
+        self._unblock = asyncio.Event()
+        if not stalled:
+            self._unblock.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload: str):
+        await self._unblock.wait()
+        self.sent.append(json.loads(payload))
+
+    async def close(self, code: int = status.WS_1000_NORMAL_CLOSURE):
+        self.closed_with = code
+
+
+def _manager() -> ConnectionManager:
+    return ConnectionManager(backplane=InMemoryBackplane(InMemoryBus()))
+
+
+def _message(n: int) -> dict:
+    return {"type": "new_message", "data": {"n": n}}
+
+
+async def _settle():
+    # Let writer tasks and scheduled closes run
+    await asyncio.sleep(0.05)
+
+
+def test_slow_consumer_is_disconnected_without_stalling_others(monkeypatch):
+    monkeypatch.setattr(settings, "WS_OUTBOUND_QUEUE_SIZE", 4)
+    monkeypatch.setattr(settings, "WS_SLOW_CONSUMER_POLICY", "disconnect")
+
+    async def scenario():
+        manager = _manager()
+        slow, fast = FakeWebSocket(stalled=True), FakeWebSocket()
+        await manager.connect(slow, user_id=1)
+        await manager.connect(fast, user_id=2)
+
+        # Would hang here if sending waited on the stalled socket
+        for n in range(10):
+            await manager.send_message_to_chat(_message(n), [1, 2], sender_id=3)
+            await _settle()
+        return manager, slow, fast
+
+    manager, slow, fast = asyncio.run(scenario())
+    assert slow.closed_with == status.WS_1013_TRY_AGAIN_LATER
+    assert not manager.is_user_online(1)
+    assert [frame["data"]["n"] for frame in fast.sent[1:]] == list(range(10))
+
+
+def test_drop_policy_sheds_typing_before_messages(monkeypatch):
+    monkeypatch.setattr(settings, "WS_OUTBOUND_QUEUE_SIZE", 3)
+    monkeypatch.setattr(settings, "WS_SLOW_CONSUMER_POLICY", "drop")
+
+    async def scenario():
+        manager = _manager()
+        websocket = FakeWebSocket(stalled=True)
+        connection = await manager.connect(websocket, user_id=1)
+        await _settle()
+        # The writer holds the session frame; these fill the queue
+        await manager.send_personal_message({"type": "typing", "data": {}}, 1)
+        await manager.send_personal_message(_message(1), 1)
+        await manager.send_personal_message(_message(2), 1)
+        # Full: the queued typing indicator makes room, then messages are dropped
+        await manager.send_personal_message(_message(3), 1)
+        await manager.send_personal_message(_message(4), 1)
+        return manager, websocket, [json.loads(payload) for payload in connection.queue]
+
+    manager, websocket, queued = asyncio.run(scenario())
+    assert [frame["data"]["n"] for frame in queued] == [1, 2, 3]
+    assert websocket.closed_with is None
+    assert manager.is_user_online(1)
+
+
+def test_send_timeout_closes_the_socket(monkeypatch):
+    monkeypatch.setattr(settings, "WS_SEND_TIMEOUT_SECONDS", 0.05)
+
+    async def scenario():
+        manager = _manager()
+        websocket = FakeWebSocket(stalled=True)
+        await manager.connect(websocket, user_id=1)
+        await asyncio.sleep(0.2)
+        return manager, websocket
+
+    manager, websocket = asyncio.run(scenario())
+    assert websocket.closed_with == status.WS_1013_TRY_AGAIN_LATER
+    assert not manager.is_user_online(1)
+
+
+def test_reaper_pings_idle_sockets_and_closes_dead_ones(monkeypatch):
+    monkeypatch.setattr(settings, "WS_HEARTBEAT_INTERVAL_SECONDS", 10)
+    monkeypatch.setattr(settings, "WS_HEARTBEAT_TIMEOUT_SECONDS", 30)
+
+    async def scenario():
+        manager = _manager()
+        idle, dead, active = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        connections = {
+            user_id: await manager.connect(websocket, user_id=user_id)
+            for user_id, websocket in ((1, idle), (2, dead), (3, active))
+        }
+        now = time.monotonic()
+        connections[1].last_seen = now - 15
+        connections[2].last_seen = now - 45
+
+        reaped = await manager.reap_stale()
+        await _settle()
+        return manager, reaped, idle, dead, active
+
+    manager, reaped, idle, dead, active = asyncio.run(scenario())
+    assert reaped == 1
+    assert dead.closed_with == status.WS_1001_GOING_AWAY
+    assert manager.get_online_users() == [1, 3]
+    assert manager.connection_count == 2
+    assert [frame["type"] for frame in idle.sent] == ["session", "ping"]
+    assert [frame["type"] for frame in active.sent] == ["session"]
+
+
+def test_connection_cap_rejects_with_retry_later(monkeypatch):
+    monkeypatch.setattr(settings, "WS_MAX_CONNECTIONS", 1)
+
+    async def scenario():
+        manager = _manager()
+        first, second = FakeWebSocket(), FakeWebSocket()
+        accepted = await manager.connect(first, user_id=1)
+        rejected = await manager.connect(second, user_id=2)
+        return manager, accepted, rejected, second
+
+    manager, accepted, rejected, second = asyncio.run(scenario())
+    assert accepted is not None and rejected is None
+    assert second.closed_with == status.WS_1013_TRY_AGAIN_LATER
+    assert second.sent[0]["type"] == "reconnect"
+    assert manager.connection_count == 1
+
+
+def test_soak_reaps_silent_clients_among_ten_thousand(monkeypatch, report):
+    monkeypatch.setattr(settings, "WS_HEARTBEAT_INTERVAL_SECONDS", 10)
+    monkeypatch.setattr(settings, "WS_HEARTBEAT_TIMEOUT_SECONDS", 30)
+    monkeypatch.setattr(settings, "WS_RESUME_WINDOW_SECONDS", 0)
+    clients = 10_000
+
+    async def scenario():
+        manager = _manager()
+        sockets = [FakeWebSocket() for _ in range(clients)]
+        connections = [await manager.connect(websocket, user_id=n) for n, websocket in enumerate(sockets)]
+        before = manager.memory_report()
+
+        # Every fifth client went silent without closing (a half-open TCP connection)
+        now = time.monotonic()
+        for connection in connections[::5]:
+            connection.last_seen = now - 45
+        started = time.perf_counter()
+        reaped = await manager.reap_stale()
+        elapsed = time.perf_counter() - started
+        await _settle()
+        return manager, sockets, reaped, elapsed, before, manager.memory_report()
+
+    manager, sockets, reaped, elapsed, before, after = asyncio.run(scenario())
+    assert reaped == clients // 5
+    assert manager.connection_count == len(manager.get_online_users()) == clients - reaped
+    assert all(websocket.closed_with == status.WS_1001_GOING_AWAY for websocket in sockets[::5])
+    assert not any(websocket.closed_with for n, websocket in enumerate(sockets) if n % 5)
+    # With no resume window the reaped users' replay buffers go too
+    assert set(manager.replay) == set(manager.active_connections)
+    assert before["connections"] == clients and after["connections"] == clients - reaped
+    report(
+        f"reaped {reaped} of {clients} sockets in {elapsed * 1000:.0f} ms, "
+        f"~{before['bytes_per_connection']} bytes per connection"
+    )
+
+
+def test_memory_report_counts_queued_and_replayed_bytes(monkeypatch):
+    monkeypatch.setattr(settings, "WS_REPLAY_BUFFER_SIZE", 2)
+
+    async def scenario():
+        manager = _manager()
+        empty = manager.memory_report()
+        stalled = FakeWebSocket(stalled=True)
+        connection = await manager.connect(stalled, user_id=1)
+        await _settle()
+        for n in range(3):
+            await manager.send_personal_message(_message(n), 1)
+        return empty, manager.memory_report(), list(connection.queue), manager.replay[1].events
+
+    empty, memory, queued, replayed = asyncio.run(scenario())
+    assert empty == {"connections": 0, "bytes_per_connection": 0, "queued_bytes": 0, "replay_bytes": 0}
+    assert memory["connections"] == 1
+    # The session frame is with the stalled writer; the three messages are queued
+    assert len(queued) == 3
+    assert memory["queued_bytes"] == sum(sys.getsizeof(payload) for payload in queued)
+    # The replay buffer keeps only the newest two
+    assert [seq for seq, _ in replayed] == [2, 3]
+    assert memory["replay_bytes"] == sum(sys.getsizeof(payload) for _, payload in replayed)
+    assert memory["bytes_per_connection"] > memory["queued_bytes"] + memory["replay_bytes"]
+
+
+def test_replay_buffer_since_at_the_eviction_edges():
+    buffer = ReplayBuffer(size=3)
+    assert buffer.since(0) == []
+    assert buffer.since(1) is None
+
+    for n in range(1, 6):
+        buffer.append(json.dumps(_message(n)))
+    seqs = lambda events: [json.loads(payload)["seq"] for payload in events]
+
+    # Events 3-5 are kept
+    assert seqs(buffer.since(5)) == []
+    assert seqs(buffer.since(4)) == [5]
+    assert seqs(buffer.since(2)) == [3, 4, 5]
+    # Event 2 was evicted, and a client can't be ahead of the buffer
+    assert buffer.since(1) is None
+    assert buffer.since(0) is None
+    assert buffer.since(6) is None
+
+
+def _session(websocket: FakeWebSocket) -> dict:
+    return next(frame["data"] for frame in websocket.sent if frame["type"] == "session")
+
+
+def test_resume_replays_events_missed_while_away(monkeypatch):
+    monkeypatch.setattr(settings, "WS_RESUME_WINDOW_SECONDS", 120)
+
+    async def scenario():
+        manager = _manager()
+        first = FakeWebSocket()
+        await manager.connect(first, user_id=1)
+        for n in range(1, 4):
+            await manager.send_personal_message(_message(n), 1)
+        await _settle()
+        await manager.disconnect(1)
+        # Buffered while the user is between connections
+        for n in range(4, 6):
+            await manager.send_personal_message(_message(n), 1)
+
+        second = FakeWebSocket()
+        await manager.connect(second, user_id=1, resume_token=_session(first)["resume_token"], last_seq=1)
+        await _settle()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    session = _session(second)
+    assert session["resumed"] is True and session["replayed"] == 4 and session["seq"] == 5
+    assert session["resume_token"] == _session(first)["resume_token"]
+    assert [(frame["data"]["n"], frame["seq"]) for frame in second.sent[1:]] == [(n, n) for n in range(2, 6)]
+
+
+def test_resume_fails_after_the_window_or_with_another_epoch(monkeypatch):
+    monkeypatch.setattr(settings, "WS_RESUME_WINDOW_SECONDS", 120)
+
+    async def scenario():
+        manager = _manager()
+        first = FakeWebSocket()
+        await manager.connect(first, user_id=1)
+        await manager.send_personal_message(_message(1), 1)
+        await _settle()
+        token = _session(first)["resume_token"]
+        node_id, epoch = token.split(".")
+
+        # Right node, wrong epoch: numbers from another buffer
+        forged = FakeWebSocket()
+        await manager.connect(forged, user_id=1, resume_token=f"{node_id}.00000000", last_seq=1)
+        await _settle()
+
+        await manager.disconnect(1)
+        manager.replay[1].parked_at -= 121
+        await manager.reap_stale()
+        # The buffer is gone, so a new one with a new epoch starts at zero
+        late = FakeWebSocket()
+        await manager.connect(late, user_id=1, resume_token=token, last_seq=1)
+        await _settle()
+        return token, forged, late
+
+    token, forged, late = asyncio.run(scenario())
+    assert _session(forged)["resumed"] is False
+    session = _session(late)
+    assert session["resumed"] is False and session["seq"] == 0
+    assert session["resume_token"] != token
+    assert [frame["type"] for frame in late.sent] == ["session"]
+
+
+async def _flush(sockets, frames: int):
+    """Wait until each socket got `frames` frames; thousands of writers take a few loop turns"""
+    for _ in range(100):
+        if all(len(websocket.sent) >= frames for websocket in sockets):
+            return
+        await _settle()
+
+
+def test_five_thousand_clients_resume_in_one_burst(monkeypatch, report):
+    monkeypatch.setattr(settings, "WS_RESUME_WINDOW_SECONDS", 120)
+    clients = 5000
+
+    async def scenario():
+        manager = _manager()
+        sockets = [FakeWebSocket() for _ in range(clients)]
+        for user_id, websocket in enumerate(sockets):
+            await manager.connect(websocket, user_id=user_id)
+            await manager.send_personal_message(_message(1), user_id)
+        await _flush(sockets, frames=2)
+        delays = [_session(websocket)["reconnect_delay_ms"] for websocket in sockets]
+
+        # The process sheds every socket; one more event each arrives meanwhile
+        for user_id in range(clients):
+            await manager.disconnect(user_id)
+            await manager.send_personal_message(_message(2), user_id)
+
+        returning = [FakeWebSocket() for _ in range(clients)]
+        started = time.perf_counter()
+        for user_id, websocket in enumerate(returning):
+            await manager.connect(websocket, user_id=user_id, resume_token=_session(sockets[user_id])["resume_token"], last_seq=1)
+        elapsed = time.perf_counter() - started
+        await _flush(returning, frames=2)
+        return manager, delays, returning, elapsed
+
+    manager, delays, returning, elapsed = asyncio.run(scenario())
+    assert manager.connection_count == clients
+    assert all(_session(websocket)["resumed"] for websocket in returning)
+    assert all([frame["data"]["n"] for frame in websocket.sent[1:]] == [2] for websocket in returning)
+    # The advertised delays spread reconnects over the sockets / WS_RECONNECT_RATE seconds
+    assert min(delays) >= settings.WS_RECONNECT_MIN_DELAY_MS
+    assert max(delays) <= settings.WS_RECONNECT_MIN_DELAY_MS + clients / settings.WS_RECONNECT_RATE * 1000
+    report(f"{clients} resumes in {elapsed * 1000:.0f} ms ({clients / elapsed:.0f}/s)")
+
+
+def test_device_cap_retires_the_oldest_device(monkeypatch):
+    monkeypatch.setattr(settings, "WS_MAX_DEVICES_PER_USER", 3)
+
+    async def scenario():
+        manager = _manager()
+        devices = [FakeWebSocket() for _ in range(4)]
+        for websocket in devices:
+            await manager.connect(websocket, user_id=1)
+            await asyncio.sleep(0.001)  # distinct connected_at
+        return manager, devices
+
+    manager, devices = asyncio.run(scenario())
+    assert devices[0].closed_with == status.WS_1000_NORMAL_CLOSURE
+    assert all(websocket.closed_with is None for websocket in devices[1:])
+    assert {c.websocket for c in manager.active_connections[1]} == set(devices[1:])
+    assert manager.connection_count == 3
+
+
+def test_fan_out_reaches_every_device_but_the_excluded_one():
+    async def scenario():
+        manager = _manager()
+        devices = [FakeWebSocket() for _ in range(3)]
+        connections = [await manager.connect(websocket, user_id=1) for websocket in devices]
+        other = FakeWebSocket()
+        await manager.connect(other, user_id=2)
+
+        # e.g. a read receipt from device 0 syncing the user's other devices
+        await manager.send_personal_message(_message(1), 1, exclude=connections[0])
+        await manager.send_personal_message(_message(2), 1)
+        await _settle()
+        return devices, other
+
+    devices, other = asyncio.run(scenario())
+    received = [[frame["data"]["n"] for frame in websocket.sent[1:]] for websocket in devices]
+    assert received == [[2], [1, 2], [1, 2]]
+    # Both were numbered once for the user, whichever devices got them
+    assert [frame["seq"] for frame in devices[1].sent[1:]] == [1, 2]
+    assert other.sent[1:] == []
@@ -0,0 +1,135 @@
+# backend/tests/test_websocket_routes.py
+import asyncio
+import json
+
+import httpx
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.security import create_access_token
+from app.database import get_async_db
+from app.main import app as api
+from app.models.chat import Chat
+from app.models.user import User
+from app.routers import websocket as websocket_router
+from app.services.websocket_service import manager as websocket_manager
+
+SOCKETS = 1000
+
+
+class ASGISocket:
+    """A websocket client driven straight through the ASGI app, so the real
+    endpoint handles its connect, frames and disconnect"""
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.frames = []
+        self.accepted = asyncio.Event()
+        self.closed = asyncio.Event()
+
+    async def run(self):
+        token = create_access_token({"sub": str(self.user_id)})
+        scope = {
+            "type": "websocket", "asgi": {"version": "3.0"}, "scheme": "ws",
+            "path": f"/api/ws/{self.user_id}", "raw_path": f"/api/ws/{self.user_id}".encode(),
+            "root_path": "", "query_string": f"token={token}".encode(), "headers": [],
+            "client": ("test", self.user_id), "server": ("test", 80), "subprotocols": []
+        }
+        await self.inbox.put({"type": "websocket.connect"})
+        await api(scope, self.inbox.get, self._receive_from_server)
+        self.closed.set()
+
+    async def _receive_from_server(self, event: dict):
+        if event["type"] == "websocket.accept":
+            self.accepted.set()
+        elif event["type"] == "websocket.send":
+            self.frames.append(json.loads(event["text"]))
+        elif event["type"] == "websocket.close":
+            self.closed.set()
+
+    async def send(self, frame: dict):
+        await self.inbox.put({"type": "websocket.receive", "text": json.dumps(frame)})
+
+    async def hang_up(self):
+        await self.inbox.put({"type": "websocket.disconnect", "code": 1000})
+
+    def received(self, frame_type: str) -> list:
+        return [frame["data"] for frame in self.frames if frame["type"] == frame_type]
+
+
+@pytest.fixture
+def pooled_engine(db_engine):
+    """The test database behind a pool sized like production's (5 + 10 overflow).
+    Sockets that pinned a connection each would exhaust it by the 16th."""
+    engine = create_async_engine(
+        db_engine.url,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=5,
+        max_overflow=10,
+        **({"connect_args": {"timeout": 60}} if db_engine.dialect.name == "sqlite" else {})
+    )
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+def test_http_keeps_serving_with_a_thousand_sockets_open(pooled_engine, auth_headers, monkeypatch):
+    pooled_sessions = async_sessionmaker(bind=pooled_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    monkeypatch.setattr(websocket_router, "AsyncSessionLocal", pooled_sessions)
+
+    async def override_get_async_db():
+        async with pooled_sessions() as db:
+            yield db
+
+    monkeypatch.setitem(api.dependency_overrides, get_async_db, override_get_async_db)
+
+    async def scenario():
+        async with pooled_sessions() as db:
+            await db.execute(insert(User), [
+                {"id": i, "email": f"user{i}@example.com", "display_name": f"User {i}"}
+                for i in range(1, SOCKETS + 1)
+            ])
+            # Users 2k-1 and 2k share chat k
+            await db.execute(insert(Chat), [
+                {"id": k, "user1_id": 2 * k - 1, "user2_id": 2 * k, "change_seq": k}
+                for k in range(1, SOCKETS // 2 + 1)
+            ])
+            await db.commit()
+
+        sockets = [ASGISocket(user_id) for user_id in range(1, SOCKETS + 1)]
+        tasks = [asyncio.create_task(socket.run()) for socket in sockets]
+        try:
+            await asyncio.wait_for(asyncio.gather(*(socket.accepted.wait() for socket in sockets)), 60)
+            # Every odd user writes to their chat partner over the socket
+            for socket in sockets[::2]:
+                await socket.send({"type": "message", "data": {"chat_id": (socket.user_id + 1) // 2, "content": "Hi"}})
+            for _ in range(600):
+                if all(socket.received("message") for socket in sockets[1::2]):
+                    break
+                await asyncio.sleep(0.05)
+
+            connected = websocket_manager.connection_count
+            # With every socket open, none of them holds a pooled connection
+            checked_out = pooled_engine.pool.checkedout()
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api), base_url="http://test") as client:
+                responses = await asyncio.wait_for(asyncio.gather(*(
+                    client.get("/api/chat/sync", headers=auth_headers(user_id)) for user_id in range(1, 51)
+                )), 30)
+        finally:
+            for socket in sockets:
+                await socket.hang_up()
+            await asyncio.wait_for(asyncio.gather(*tasks), 60)
+            for user_id in range(1, SOCKETS + 1):
+                websocket_manager.replay.pop(user_id, None)
+                await websocket_manager.backplane.unsubscribe(user_id)
+        return sockets, connected, checked_out, responses
+
+    sockets, connected, checked_out, responses = asyncio.run(scenario())
+    assert connected == SOCKETS
+    assert checked_out == 0
+    assert all(socket.received("message")[0]["content"] == "Hi" for socket in sockets[1::2])
+    assert [response.status_code for response in responses] == [200] * 50
+    assert all(socket.closed.is_set() for socket in sockets)
+    assert websocket_manager.connection_count == 0